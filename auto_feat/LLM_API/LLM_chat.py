@@ -1,19 +1,92 @@
+import os
 import time
 import openai
-from openai import APIStatusError, InternalServerError
+from openai import APIConnectionError, APIStatusError, APITimeoutError, InternalServerError, RateLimitError
+
+from auto_feat.deadline import check_deadline, time_left
+
+from auto_feat.instrumentation import get_tracer
+from auto_feat.LLM_API.limiter import CircuitOpenError, LLMLimiter
+from auto_feat.LLM_API.prompt_prefix import PrefixReuseTracker
+from auto_feat.LLM_API.singleflight import SingleFlight, request_key
 
 # === Model & Client Setup ===
 MODEL = "argo:gpt-5"
 client = openai.OpenAI(
     api_key="whatever+random",     # Replace with your real key if needed
     base_url="http://0.0.0.0:60963/v1",  # Local server / proxy endpoint
+    max_retries=0,                 # Retries are handled (and rate limited) by chatbox itself
+)
+
+# === Shared flow control (rate limits, adaptive concurrency, circuit breaker) ===
+# With a lock directory, the rate limits are shared with the other processes using it (e.g. batch workers)
+limiter = LLMLimiter(
+    requests_per_minute=float(os.environ.get("AUTOFEAT_LLM_RPM", 0)) or None,
+    tokens_per_minute=float(os.environ.get("AUTOFEAT_LLM_TPM", 0)) or None,
+    max_concurrency=int(os.environ.get("AUTOFEAT_LLM_MAX_CONCURRENCY", 16)),
+    state_dir=os.environ.get("AUTOFEAT_LLM_SINGLEFLIGHT_DIR") or None,
 )
 
 
+# === Coalescing of identical concurrent requests (set a lock directory to coalesce across processes) ===
+singleflight = SingleFlight(os.environ.get("AUTOFEAT_LLM_SINGLEFLIGHT_DIR") or None)
+
+
+# === Prefix reuse of the prompts sent upstream (how much a server-side prefix cache can serve) ===
+prefix_tracker = PrefixReuseTracker()
+
+
+def configure_limiter(**kwargs) -> LLMLimiter:
+    """Replaces the limiter shared by all chatbox calls (see `LLMLimiter` for the options)."""
+    global limiter
+    limiter = LLMLimiter(**kwargs)
+    return limiter
+
+
+def _is_server_failure(e: Exception) -> bool:
+    """True for errors that indicate an unhealthy server (as opposed to rate limiting or a bad request)."""
+    if isinstance(e, RateLimitError):
+        return False
+    if isinstance(e, APIStatusError):
+        return getattr(e, "status_code", 500) >= 500
+    return isinstance(e, APIConnectionError) or "unexpected mimetype" in str(e).lower()
+
+
+def _is_deadline_timeout(e: Exception, timeout) -> bool:
+    """True for a request timeout that came from the node's deadline rather than from the client default."""
+    if not isinstance(e, APITimeoutError) or timeout is None:
+        return False
+    left = time_left()
+    return left is not None and left <= 0.05
+
+
+def _retry_after(e: Exception) -> float:
+    """Returns the Retry-After delay (seconds) sent with a 429, or 0 if there is none."""
+    try:
+        return float(e.response.headers.get("retry-after", 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+def _backoff(seconds: float) -> None:
+    """Sleeps before a retry, no longer than the running node has left."""
+    left = time_left()
+    time.sleep(seconds if left is None else min(seconds, max(left, 0.0)))
+
+
 def chatbox(prompt, model: str = MODEL, temperature: float = 0.3, max_attempts: int = 5) -> str:
     """
     LLM wrapper around OpenAI Chat API with retry logic.
 
+    All calls share one `LLMLimiter`: they wait for request/token budget and a concurrency slot, 429s shrink the
+    concurrency limit and are retried after Retry-After, and while the circuit breaker is open calls fail fast
+    with `CircuitOpenError` instead of retrying. Identical requests that are in flight at the same time (e.g. the
+    same Summarizer prompt from several pipelines) are coalesced into one upstream call (see `SingleFlight`).
+    Each upstream call records the share of its prompt that is a prefix of a recently sent prompt
+    ("prefix_reuse"), i.e. what a server-side prefix cache can serve. Inside a node with a deadline (see
+    `auto_feat.deadline`), each request times out when the node runs out of time and `DeadlineExceeded` is raised
+    instead of retrying.
+
     Args:
         prompt (list[dict]): Messages in OpenAI chat format [{"role": "system", "content": ...}, ...].
         model (str): Model name to use.
@@ -23,26 +96,74 @@ def chatbox(prompt, model: str = MODEL, temperature: float = 0.3, max_attempts:
     Returns:
         str: LLM response content (string).
     """
+    key = request_key(model, temperature, prompt)
+    result, shared = singleflight.do(key, lambda: _chat_completion(prompt, model, temperature, max_attempts))
+    if shared:
+        get_tracer().count("llm_coalesced")
+    return result
+
+
+def _chat_completion(prompt, model: str, temperature: float, max_attempts: int) -> str:
+    """Sends one chat request upstream, with rate limiting and retries (see `chatbox`)."""
+    tracer = get_tracer()
+    prompt_chars, reused_chars = prefix_tracker.observe(prompt)
+    tracer.count("prompt_chars", prompt_chars)
+    tracer.count("prefix_reused_chars", reused_chars)
     for attempt in range(max_attempts):
+        check_deadline("an LLM request")
         try:
-            resp = client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                temperature=temperature,
-            )
+            with limiter.slot(prompt) as call:
+                tracer.count("llm_throttled_s", call["waited_s"])
+                start = time.perf_counter()
+                # Request timeout: what is left of the node's deadline (None: the client default)
+                timeout = time_left()
+                try:
+                    resp = client.chat.completions.create(
+                        model=model,
+                        messages=prompt,
+                        temperature=temperature,
+                        **({"timeout": max(timeout, 0.1)} if timeout is not None else {}),
+                    )
+                except Exception as e:
+                    # Feed the outcome back to the adaptive concurrency limit and the circuit breaker; a timeout set
+                    # by the node's deadline says nothing about the server (a short budget must not open the breaker)
+                    call["overloaded"] = isinstance(e, RateLimitError)
+                    call["cancelled"] = _is_deadline_timeout(e, timeout)
+                    call["failed"] = False if call["cancelled"] else _is_server_failure(e)
+                    raise
+            tracer.record_llm_call(time.perf_counter() - start, getattr(resp, "usage", None), model=model,
+                                   prefix_reuse=reused_chars / prompt_chars if prompt_chars else 0.0)
             return resp.choices[0].message.content.strip()
 
+        except CircuitOpenError:
+            # Server is unhealthy: fail fast instead of piling up retries
+            raise
+
+        except APITimeoutError:
+            # Out of time for this node: DeadlineExceeded; otherwise a transient timeout worth retrying
+            check_deadline("the LLM reply")
+            tracer.count("llm_retries")
+            continue
+
+        except RateLimitError as e:
+            # 429: honour Retry-After when the server sends it
+            tracer.count("rate_limited")
+            _backoff(max(_retry_after(e), 0.5 * (2 ** attempt)))
+            continue
+
         except (APIStatusError, InternalServerError) as e:
             # Retry only on 5xx server errors
             if getattr(e, "status_code", 500) >= 500:
-                time.sleep(0.5 * (2 ** attempt))  # Exponential backoff
+                tracer.count("llm_retries")
+                _backoff(0.5 * (2 ** attempt))  # Exponential backoff
                 continue
             raise
 
         except Exception as e:
             # Retry on transient errors like MIME issues
             if "unexpected mimetype" in str(e).lower():
-                time.sleep(0.5 * (2 ** attempt))
+                tracer.count("llm_retries")
+                _backoff(0.5 * (2 ** attempt))
                 continue
             raise
 
@@ -0,0 +1,285 @@
+"""
+Client-side flow control for LLM calls: token-bucket rate limits, AIMD adaptive concurrency and a circuit breaker.
+
+One `LLMLimiter` is shared by every `chatbox` call in the process, so that all agents and all pipelines running in
+threads of the same process draw from the same budget and back off together when the server struggles. With a
+state directory, the rate limits are also shared across processes (e.g. the workers of `auto_feat.batch`): each
+token bucket lives in a small file updated under an exclusive `flock`, so idle processes leave their share of the
+budget to busy ones. Concurrency and the circuit breaker stay per process. Inside a node with a deadline (see
+`auto_feat.deadline`), no wait lasts past it: `DeadlineExceeded` is raised instead.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: buckets are per process
+    fcntl = None
+
+from auto_feat.deadline import DeadlineExceeded, time_left
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the server while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second refill a bucket of size `capacity`.
+
+    Args:
+        rate: refill rate in tokens per second (None disables the bucket)
+        capacity: bucket size, i.e. the allowed burst (defaults to one minute worth of tokens)
+        state_path: file holding the bucket, shared by every process that uses the same path (None: this process)
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None,
+                 state_path: Optional[str] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else (rate * 60 if rate else 0.0)
+        self.state_path = state_path if fcntl is not None else None
+        if self.state_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        # Processes only share a clock through the wall time
+        self._clock = time.time if self.state_path else time.monotonic
+        self.tokens = self.capacity
+        self.updated = self._clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    @contextmanager
+    def _shared(self) -> Iterator[None]:
+        """Loads the bucket from its state file and saves it back, holding the file lock in between."""
+        if not self.state_path:
+            yield
+            return
+        with open(self.state_path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                    self.tokens, self.updated = float(state["tokens"]), float(state["updated"])
+                except (ValueError, KeyError, TypeError):
+                    self.tokens, self.updated = self.capacity, self._clock()   # first user: a full bucket
+                yield
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": self.tokens, "updated": self.updated}))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self, n: float = 1.0) -> float:
+        """
+        Blocks until `n` tokens are available and takes them. Returns the time spent waiting.
+
+        Raises:
+            DeadlineExceeded: if the tokens would only be available after the running node's deadline.
+        """
+        if not self.rate:
+            return 0.0
+        n = min(n, self.capacity)   # a single oversized request must still be able to go through
+        waited = 0.0
+        while True:
+            with self._lock, self._shared():
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return waited
+                delay = (n - self.tokens) / self.rate
+            left = time_left()
+            if left is not None and delay > left:
+                raise DeadlineExceeded(f"Rate limit: no budget for the request before the deadline ({delay:.1f}s)")
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: the number of in-flight calls grows by one per `limit` successful calls (additive
+    increase) and is multiplied by `backoff` on overload signals (429s, 5xx, latency above `latency_target_s`).
+    """
+
+    def __init__(self,
+                 initial: int = 4,
+                 min_limit: int = 1,
+                 max_limit: int = 32,
+                 backoff: float = 0.5,
+                 latency_target_s: Optional[float] = None) -> None:
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target_s = latency_target_s
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        Blocks until a slot is free and takes it. Returns the time spent waiting.
+
+        Raises:
+            DeadlineExceeded: if no slot was freed before the running node's deadline.
+        """
+        start = time.monotonic()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                left = time_left()
+                if left is not None and left <= 0:
+                    raise DeadlineExceeded("No free LLM concurrency slot before the deadline")
+                self._cond.wait(left)
+            self.in_flight += 1
+        return time.monotonic() - start
+
+    def release(self, overloaded: bool = False, latency_s: Optional[float] = None) -> None:
+        """Frees a slot and adapts the limit to the outcome of the call."""
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded or (self.latency_target_s is not None and latency_s is not None
+                              and latency_s > self.latency_target_s):
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive server failures and rejects calls for `cooldown_s`. Then a single
+    probe call is let through (half-open); its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_s: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown_s else "open"
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if calls are currently rejected."""
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self.probing):
+                remaining = self.cooldown_s - (time.monotonic() - self.opened_at)
+                raise CircuitOpenError(
+                    f"LLM server marked unhealthy after {self.failures} consecutive failures; "
+                    f"failing fast (retry in {max(0.0, remaining):.0f}s)"
+                )
+            if state == "half_open":
+                self.probing = True
+
+    def release_probe(self) -> None:
+        """Records a call that ended without telling anything about server health (e.g. cancelled by its caller)."""
+        with self._lock:
+            self.probing = False
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            self.probing = False
+            if not failed:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def estimate_tokens(prompt) -> int:
+    """Rough token count of a chat prompt (about 4 characters per token)."""
+    return sum(len(str(m.get("content", ""))) for m in prompt) // 4 + 1
+
+
+class LLMLimiter:
+    """
+    Shared flow control for LLM calls.
+
+    Args:
+        requests_per_minute: request rate limit (None: unlimited)
+        tokens_per_minute: prompt + expected completion tokens per minute (None: unlimited)
+        completion_tokens: completion tokens assumed per call when charging the tokens-per-minute bucket
+        max_concurrency, initial_concurrency: bounds and start of the adaptive concurrency limit
+        latency_target_s: calls slower than this count as an overload signal (None: ignore latency)
+        failure_threshold, cooldown_s: circuit breaker settings
+        state_dir: directory of the token buckets, to share the rate limits with every process using it (None:
+            limits of this process only)
+    """
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 completion_tokens: int = 1000,
+                 max_concurrency: int = 16,
+                 initial_concurrency: int = 4,
+                 latency_target_s: Optional[float] = None,
+                 failure_threshold: int = 5,
+                 cooldown_s: float = 30.0,
+                 state_dir: Optional[str] = None) -> None:
+        self.requests = TokenBucket(requests_per_minute / 60 if requests_per_minute else None,
+                                    state_path=os.path.join(state_dir, "requests.bucket") if state_dir else None)
+        self.tokens = TokenBucket(tokens_per_minute / 60 if tokens_per_minute else None,
+                                  state_path=os.path.join(state_dir, "tokens.bucket") if state_dir else None)
+        self.completion_tokens = completion_tokens
+        self.concurrency = AdaptiveConcurrency(
+            initial=min(initial_concurrency, max_concurrency), max_limit=max_concurrency,
+            latency_target_s=latency_target_s,
+        )
+        self.breaker = CircuitBreaker(failure_threshold, cooldown_s)
+
+    @contextmanager
+    def slot(self, prompt) -> Iterator[dict]:
+        """
+        Waits for permission to send `prompt` and holds a concurrency slot for the duration of the call.
+
+        The caller reports the outcome by setting keys on the yielded dict: "overloaded" (429 or similar),
+        "failed" (server error, or False for errors that say nothing about server health) and "cancelled" (the
+        caller gave up, e.g. its deadline made the request time out: neither a failure nor a success for the
+        circuit breaker and the concurrency limit). An unclassified exception escaping the block counts as a
+        failure.
+
+        Raises:
+            CircuitOpenError: if the circuit breaker is open.
+            DeadlineExceeded: if the running node's deadline comes before the budget or a slot.
+        """
+        self.breaker.before_call()
+        outcome = {"overloaded": False, "failed": None, "cancelled": False, "waited_s": 0.0}
+        try:
+            outcome["waited_s"] += self.requests.acquire(1)
+            outcome["waited_s"] += self.tokens.acquire(estimate_tokens(prompt) + self.completion_tokens)
+            outcome["waited_s"] += self.concurrency.acquire()
+        except DeadlineExceeded:
+            self.breaker.release_probe()   # a half-open probe that was never sent
+            raise
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            if outcome["failed"] is None and not outcome["overloaded"] and not outcome["cancelled"]:
+                outcome["failed"] = True
+            raise
+        finally:
+            latency = time.monotonic() - start
+            failed = bool(outcome["failed"])
+            if outcome["cancelled"]:
+                self.concurrency.release(overloaded=False)
+                self.breaker.release_probe()
+            else:
+                self.concurrency.release(overloaded=outcome["overloaded"] or failed, latency_s=latency)
+                self.breaker.record(failed=failed)
@@ -0,0 +1,65 @@
+"""
+Measurement of prompt prefix reuse.
+
+LLM servers cache the attention state of prompt prefixes they have recently seen, so a request whose leading
+messages are byte-identical to a previous request is cheaper and faster. `PrefixReuseTracker` estimates how much of
+each prompt such a cache could serve: the longest prefix shared with any recently sent prompt.
+"""
+from collections import deque
+from typing import Dict, List, Tuple
+import threading
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    """Length of the common prefix of two strings (binary search over C-level slice comparisons)."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def shared_prefix_chars(prompt: List[Dict[str, str]], previous: List[Dict[str, str]]) -> int:
+    """Number of prompt characters (message contents, in order) that `prompt` shares as a prefix with `previous`."""
+    shared = 0
+    for msg, old in zip(prompt, previous):
+        if msg.get("role") != old.get("role"):
+            break
+        content, old_content = str(msg.get("content", "")), str(old.get("content", ""))
+        if content == old_content:
+            shared += len(content)
+            continue
+        shared += _common_prefix_len(content, old_content)
+        break
+    return shared
+
+
+class PrefixReuseTracker:
+    """
+    Remembers the last `max_prompts` prompts and reports, for each new prompt, how much of it is a prefix of one
+    of them.
+
+    Args:
+        max_prompts: number of recent prompts compared against (roughly what a server prefix cache would hold)
+    """
+
+    def __init__(self, max_prompts: int = 32) -> None:
+        self.recent = deque(maxlen=max_prompts)
+        self._lock = threading.Lock()
+
+    def observe(self, prompt: List[Dict[str, str]]) -> Tuple[int, int]:
+        """
+        Records a prompt about to be sent.
+
+        Returns:
+            (prompt characters, characters shared as a prefix with a recent prompt)
+        """
+        total = sum(len(str(m.get("content", ""))) for m in prompt)
+        snapshot = [dict(m) for m in prompt]
+        with self._lock:
+            reused = max((shared_prefix_chars(prompt, old) for old in self.recent), default=0)
+            self.recent.append(snapshot)
+        return total, reused
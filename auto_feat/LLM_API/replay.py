@@ -0,0 +1,89 @@
+"""
+Offline stand-ins for `chatbox`: a stub that replays recorded responses and a recorder that captures them.
+"""
+from typing import Callable, Dict, List, Optional, Union
+import itertools
+import json
+import random
+import threading
+import time
+
+
+# Substrings of the system prompt that identify which agent is calling
+PROMPT_KINDS = {
+    "summarize": "summarizing a scientific text",
+    "proposal": "feature engineering assistant",
+    "generation": "Python data engineer",
+}
+
+
+def prompt_kind(prompt: List[Dict[str, str]]) -> str:
+    """Returns the agent kind ("summarize", "proposal", "generation") a chat prompt belongs to."""
+    system = " ".join(m["content"] for m in prompt if m.get("role") == "system")
+    for kind, marker in PROMPT_KINDS.items():
+        if marker in system:
+            return kind
+    raise KeyError(f"Unrecognized prompt, system message starts with: {system[:80]!r}")
+
+
+class ReplayLLM:
+    """
+    LLM stub with the same call signature as `chatbox`. Responses recorded for each agent kind are replayed in
+    order (cycling when exhausted), after sleeping for a simulated latency.
+
+    Args:
+        responses: {kind: [response, ...]} for the kinds in `PROMPT_KINDS`
+        latency_s: simulated round-trip latency, either one value or {kind: seconds}
+        jitter: relative uniform jitter applied to the latency (0.1 = ±10%)
+        seed: seed of the jitter
+    """
+
+    def __init__(self,
+                 responses: Dict[str, List[str]],
+                 latency_s: Union[float, Dict[str, float]] = 0.0,
+                 jitter: float = 0.0,
+                 seed: int = 42) -> None:
+        self.responses = {kind: itertools.cycle(replies) for kind, replies in responses.items()}
+        self.latency_s = latency_s
+        self.jitter = jitter
+        self.calls: Dict[str, int] = {kind: 0 for kind in responses}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, path: str, **kwargs) -> "ReplayLLM":
+        """Loads recorded responses from a JSON file written by `RecordingLLM.save`."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def __call__(self, prompt, model: Optional[str] = None, temperature: float = 0.3, **kwargs) -> str:
+        kind = prompt_kind(prompt)
+        latency = self.latency_s.get(kind, 0.0) if isinstance(self.latency_s, dict) else self.latency_s
+        with self._lock:
+            self.calls[kind] += 1
+            reply = next(self.responses[kind])
+            if self.jitter:
+                latency *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        if latency > 0:
+            time.sleep(latency)
+        return reply
+
+
+class RecordingLLM:
+    """
+    Wraps a live LLM callable and records every response by agent kind, so that a live run can later be
+    replayed offline with `ReplayLLM`.
+    """
+
+    def __init__(self, llm: Callable) -> None:
+        self.llm = llm
+        self.responses: Dict[str, List[str]] = {kind: [] for kind in PROMPT_KINDS}
+
+    def __call__(self, prompt, **kwargs) -> str:
+        reply = self.llm(prompt, **kwargs)
+        self.responses[prompt_kind(prompt)].append(reply)
+        return reply
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.responses, f, indent=2)
@@ -0,0 +1,170 @@
+"""
+Per-node, per-call-type model routing.
+
+Every call is classified by the agent that makes it (from the system prompt, see `replay.prompt_kind`) and by its
+call type: "initial" for the first request of a conversation, "repair" once repair turns have been appended (the
+previous reply failed to parse or its code failed). Each (agent, call type) pair is routed to a model tier, so
+literature synthesis and proposals can use the large model while code generation and repairs use a faster one.
+The escalation policy moves a conversation up to the large tier after `escalate_after` failed replies, and a call
+rejected by the API on the fast tier (e.g. an unknown or unavailable model) is retried once on the large one. Other
+errors are raised as they are: the wrapped LLM has already retried transient ones. Every decision is logged with its
+latency.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import inspect
+import os
+import statistics
+import threading
+import time
+
+from openai import APIStatusError, RateLimitError
+
+from auto_feat.deadline import DeadlineExceeded
+from auto_feat.instrumentation import get_tracer
+from auto_feat.LLM_API.LLM_chat import MODEL
+from auto_feat.LLM_API.replay import prompt_kind
+
+FAST_MODEL = os.environ.get("AUTOFEAT_LLM_FAST_MODEL", "argo:gpt-5-mini")
+
+# Tier name -> model and sampling temperature
+DEFAULT_TIERS: Dict[str, Dict[str, Any]] = {
+    "large": {"model": MODEL, "temperature": 0.3},
+    "fast": {"model": FAST_MODEL, "temperature": 0.2},
+}
+
+# Agent kind -> call type -> tier
+DEFAULT_ROUTES: Dict[str, Dict[str, str]] = {
+    "summarize": {"initial": "large", "repair": "fast"},
+    "proposal": {"initial": "large", "repair": "fast"},
+    "generation": {"initial": "fast", "repair": "fast"},
+}
+
+
+def failed_replies(prompt: List[Dict[str, str]]) -> int:
+    """Number of repair turns (a failed assistant reply plus a correction) appended to the original request."""
+    return sum(1 for m in prompt if m.get("role") == "assistant")
+
+
+def accepted_options(llm: Callable) -> frozenset:
+    """Which of the `model` and `temperature` keyword arguments an LLM callable accepts."""
+    try:
+        params = inspect.signature(llm).parameters.values()
+    except (TypeError, ValueError):
+        return frozenset({"model", "temperature"})
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params):
+        return frozenset({"model", "temperature"})
+    return frozenset(p.name for p in params if p.name in ("model", "temperature"))
+
+
+def is_model_unavailable(e: Exception) -> bool:
+    """True for API errors that reject the request itself (unknown model, no access), which another model may serve."""
+    return isinstance(e, APIStatusError) and not isinstance(e, RateLimitError)
+
+
+class ModelRouter:
+    """
+    LLM callable with the signature of `chatbox` that picks the model of each call.
+
+    Args:
+        llm: underlying LLM wrapper, called as llm(prompt, model=..., temperature=...); a callable without these
+            keyword arguments is called with the prompt only, and every call then goes to its own default model
+        tiers: tier name -> {"model", "temperature"}; must contain `escalation_tier`
+        routes: agent kind -> {"initial": tier, "repair": tier}; unknown agents use `escalation_tier`
+        escalate_after: failed replies in a conversation after which it moves to `escalation_tier` (0: never)
+        escalation_tier: tier used after escalation and to retry calls the API rejected on another tier
+        verbose: print each routing decision
+    """
+
+    def __init__(self,
+                 llm: Callable,
+                 tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+                 routes: Optional[Dict[str, Dict[str, str]]] = None,
+                 escalate_after: int = 2,
+                 escalation_tier: str = "large",
+                 verbose: bool = False) -> None:
+        self.llm = llm
+        self.tiers = tiers or DEFAULT_TIERS
+        self.routes = routes or DEFAULT_ROUTES
+        self.escalate_after = escalate_after
+        self.escalation_tier = escalation_tier
+        self.verbose = verbose
+        self.options = accepted_options(llm)
+        self.decisions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def route(self, prompt: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Returns the routing decision of a prompt: {"agent", "call_type", "tier", "escalated"}."""
+        try:
+            agent = prompt_kind(prompt)
+        except KeyError:
+            agent = "unknown"
+        failures = failed_replies(prompt)
+        call_type = "repair" if failures else "initial"
+        tier = self.routes.get(agent, {}).get(call_type, self.escalation_tier)
+        escalated = bool(self.escalate_after) and failures >= self.escalate_after and tier != self.escalation_tier
+        if escalated:
+            tier = self.escalation_tier
+        return {"agent": agent, "call_type": call_type, "tier": tier, "escalated": escalated}
+
+    def _send(self, prompt, model: Optional[str], temperature: Optional[float], **kwargs) -> str:
+        """Calls the wrapped LLM with the options its signature accepts."""
+        options = {"model": model, "temperature": temperature}
+        kwargs.update({k: v for k, v in options.items() if k in self.options and v is not None})
+        return self.llm(prompt, **kwargs)
+
+    def _call(self, prompt, decision: Dict[str, Any], **kwargs) -> str:
+        tier = self.tiers[decision["tier"]]
+        model = tier["model"] if "model" in self.options else "default"
+        start = time.perf_counter()
+        ok = False
+        try:
+            reply = self._send(prompt, tier["model"], tier["temperature"], **kwargs)
+            ok = True
+            return reply
+        finally:
+            entry = {**decision, "model": model, "latency_s": time.perf_counter() - start, "ok": ok}
+            with self._lock:
+                self.decisions.append(entry)
+            if self.verbose:
+                print(f"🔀 {entry['agent']}/{entry['call_type']} → {entry['model']} ({entry['tier']}"
+                      f"{', escalated' if entry['escalated'] else ''}) {entry['latency_s']:.1f}s")
+
+    def __call__(self, prompt, model: Optional[str] = None, temperature: Optional[float] = None, **kwargs) -> str:
+        # An explicit model bypasses routing
+        if model is not None:
+            return self._send(prompt, model, 0.3 if temperature is None else temperature, **kwargs)
+        decision = self.route(prompt)
+        tracer = get_tracer()
+        if decision["tier"] != self.escalation_tier:
+            tracer.count("llm_fast_calls")
+        if decision["escalated"]:
+            tracer.count("llm_escalations")
+        try:
+            return self._call(prompt, decision, **kwargs)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if (decision["tier"] == self.escalation_tier or "model" not in self.options
+                    or not is_model_unavailable(e)):
+                raise
+            # The API rejected the fast tier (e.g. unavailable model): retry once on the large one
+            tracer.count("llm_escalations")
+            return self._call(prompt, {**decision, "tier": self.escalation_tier, "escalated": True}, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model latency of the routed calls: {model: {"calls", "failed", "median_s", "mean_s", "total_s"}}."""
+        by_model: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for entry in self.decisions:
+                by_model.setdefault(entry["model"], []).append(entry)
+        out = {}
+        for model, entries in by_model.items():
+            latencies = [e["latency_s"] for e in entries]
+            out[model] = {
+                "calls": len(entries),
+                "failed": sum(not e["ok"] for e in entries),
+                "median_s": statistics.median(latencies),
+                "mean_s": statistics.fmean(latencies),
+                "total_s": sum(latencies),
+            }
+        return out
@@ -0,0 +1,232 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests.
+
+When several callers send the same request at the same time, only one (the leader) goes upstream; the others wait
+and receive the leader's result. Only *concurrent* requests are coalesced: once a request has completed, the next
+identical request is sent again, so sequential retries of the same prompt still get fresh samples.
+
+Coalescing works across threads of one process, and across processes when a lock directory is configured: there
+the leader holds an exclusive `flock` on `<key>.lock` while it calls the server and leaves the result in
+`<key>.json`; processes that had to wait for the lock reuse that result. Results only matter to the processes that
+were waiting when they were written, so files idle for longer than `ttl_s` are swept by later leaders, and `close()`
+removes all idle files at the end of a batch. Inside a node with a deadline (see
+`auto_feat.deadline`), waiters give up with `DeadlineExceeded` when the node runs out of time.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: cross-process coalescing is disabled
+    fcntl = None
+
+from auto_feat.deadline import DeadlineExceeded, time_left
+
+
+def request_key(model: str, temperature: float, prompt) -> str:
+    """Returns a stable hash identifying an LLM request."""
+    payload = json.dumps({"model": model, "temperature": temperature, "messages": prompt}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One in-flight request and its waiters."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def _age(path: str) -> float:
+    """Seconds since `path` was last modified (infinite for a missing file)."""
+    try:
+        return time.time() - os.stat(path).st_mtime
+    except OSError:
+        return float("inf")
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _is_current(lock_file, path: str) -> bool:
+    """True if the open lock file is still the one at `path` (it was not swept meanwhile)."""
+    try:
+        return os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino
+    except OSError:
+        return False
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls.
+
+    Args:
+        lock_dir: directory for cross-process coalescing (None: in-process only)
+        ttl_s: age after which idle lock and result files in `lock_dir` are removed
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, ttl_s: float = 600.0) -> None:
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self.ttl_s = ttl_s
+        self._swept_at = 0.0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Runs fn() once for all concurrent callers that use the same key.
+
+        Returns:
+            (result, shared) where `shared` is True if the result came from another caller's request
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            left = time_left()
+            if not call.done.wait(None if left is None else max(left, 0.0)):
+                raise DeadlineExceeded("Deadline expired while waiting for an identical in-flight LLM request")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._across_processes(key, fn) if self.lock_dir else (fn(), False)
+            return call.result, shared
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _across_processes(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        lock_path = os.path.join(self.lock_dir, f"{key}.lock")
+        result_path = os.path.join(self.lock_dir, f"{key}.json")
+        requested_at = time.time()
+        lock_file, waited = self._acquire(lock_path)
+        try:
+            if waited:
+                shared = self._read_result(result_path, requested_at)
+                if shared is not None:
+                    return shared["result"], True
+                # The other process failed: run the request ourselves
+
+            result = fn()
+            tmp_path = f"{result_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"finished": time.time(), "result": result}, f)
+            os.replace(tmp_path, result_path)
+            return result, False
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            if time.time() - self._swept_at > self.ttl_s / 10:
+                self.sweep(self.ttl_s)
+
+    def _acquire(self, lock_path: str) -> Tuple[Any, bool]:
+        """
+        Opens and locks the lock file of a key. Returns (file, waited), `waited` being True if another process held
+        the lock. A lock file swept while we waited for it is opened again, so two processes never both hold the
+        lock of a key.
+        """
+        waited = False
+        while True:
+            lock_file = open(lock_path, "a+")
+            try:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another process is running the same request: wait for it to finish
+                    waited = True
+                    self._wait_for_lock(lock_file)
+            except BaseException:
+                lock_file.close()
+                raise
+            if _is_current(lock_file, lock_path):
+                return lock_file, waited
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def sweep(self, max_age_s: float) -> int:
+        """
+        Removes the lock and result files of the keys that nobody holds and that were last used more than
+        `max_age_s` seconds ago (0: all idle keys). Returns the number of keys removed.
+        """
+        if not self.lock_dir:
+            return 0
+        self._swept_at = time.time()
+        removed = 0
+        for name in os.listdir(self.lock_dir):
+            path = os.path.join(self.lock_dir, name)
+            if name.endswith(".tmp"):
+                if _age(path) > max(max_age_s, 60.0):   # left behind by a crashed writer
+                    _remove(path)
+                continue
+            if not name.endswith(".lock"):
+                continue
+            result_path = path[:-len(".lock")] + ".json"
+            if min(_age(path), _age(result_path)) <= max_age_s:
+                continue
+            try:
+                lock_file = open(path, "a+")
+            except OSError:
+                continue
+            with lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue   # in use
+                try:
+                    if _is_current(lock_file, path):
+                        _remove(result_path)
+                        _remove(path)
+                        removed += 1
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return removed
+
+    def close(self) -> None:
+        """Removes every idle lock and result file (e.g. once all the processes sharing `lock_dir` are done)."""
+        self.sweep(0)
+
+    @staticmethod
+    def _wait_for_lock(lock_file, poll_s: float = 0.05) -> None:
+        """Takes the exclusive lock, polling (rather than blocking) while the running node has a deadline."""
+        if time_left() is None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            return
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                left = time_left()
+                if left <= 0:
+                    raise DeadlineExceeded("Deadline expired while another process ran the same LLM request")
+                time.sleep(min(poll_s, left))
+
+    @staticmethod
+    def _read_result(path: str, not_before: float) -> Optional[Dict[str, Any]]:
+        """Reads a result file written by a request that finished while we were waiting."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return shared if shared.get("finished", 0) >= not_before else None
@@ -0,0 +1,170 @@
+"""
+Tolerant parsing of structured (dictionary) LLM outputs.
+
+Replies are parsed as JSON or as a Python literal. When neither works, the reply is repaired locally before
+anything is sent back to the LLM: markdown fences and surrounding prose are stripped, the outermost {...} is
+extracted (and closed if the reply was cut off), typographic quotes are straightened, trailing commas removed and
+JSON literals (true/false/null) mapped to Python. The result is validated against the node's schema; only a
+reply that cannot be repaired or does not match the schema costs an LLM retry. Code replies are handled the same
+way: a ```python block is taken from anywhere in the reply, and bare code is accepted if it compiles. Local
+repairs are counted as `format_repairs` in the node's trace record.
+"""
+from typing import Any, Dict, Optional, Tuple
+import ast
+import json
+import re
+
+from auto_feat.instrumentation import get_tracer
+
+# Schemas: required key -> expected type (`object` accepts anything)
+SUMMARY_SCHEMA: Dict[str, type] = {"manuscript_summary": str, "column_key": dict, "notes": object}
+PROPOSAL_SCHEMA: Dict[str, type] = {"new_feature_computation": dict}
+
+_FENCE = re.compile(r"```[A-Za-z0-9_-]*[ \t]*\n?(.*?)```", re.DOTALL)
+_PYTHON_FENCE = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL | re.IGNORECASE)
+_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_JSON_LITERALS = {"true": "True", "false": "False", "null": "None"}
+_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+class StructuredOutputError(ValueError):
+    """Raised when an LLM reply cannot be parsed or repaired into a dictionary matching the schema."""
+
+
+def _load(text: str) -> Optional[Any]:
+    """Parses JSON or a Python literal; None if neither works."""
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _outermost_object(text: str) -> str:
+    """Returns the first balanced {...} of the text (string-aware), closing it if the text ends first."""
+    start = text.find("{")
+    if start < 0:
+        return text
+    depth, quote, escaped = 0, None, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:] + (quote or "") + "}" * depth
+
+
+def _outside_strings(text: str, fn) -> str:
+    """Applies `fn` to the parts of the text that are not string literals."""
+    out, pos = [], 0
+    for match in _STRING.finditer(text):
+        out.append(fn(text[pos:match.start()]))
+        out.append(match.group(0))
+        pos = match.end()
+    out.append(fn(text[pos:]))
+    return "".join(out)
+
+
+def repair(text: str, straighten_quotes: bool = False) -> str:
+    """Returns the text with the local repairs applied (see module docstring)."""
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    if straighten_quotes:
+        text = text.translate(_QUOTES)
+    text = _outermost_object(text.strip())
+
+    def fix(segment: str) -> str:
+        segment = _TRAILING_COMMA.sub(r"\1", segment)
+        return re.sub(r"\b(true|false|null)\b", lambda m: _JSON_LITERALS[m.group(1)], segment)
+
+    return _outside_strings(text, fix)
+
+
+def validate(obj: Any, schema: Dict[str, type]) -> None:
+    """Raises StructuredOutputError describing the first mismatch between `obj` and `schema`."""
+    if not isinstance(obj, dict):
+        raise StructuredOutputError(f"expected a dictionary, got {type(obj).__name__}")
+    missing = [key for key in schema if key not in obj]
+    if missing:
+        raise StructuredOutputError(f"missing keys {missing}")
+    for key, expected in schema.items():
+        if not isinstance(obj[key], expected):
+            raise StructuredOutputError(f"'{key}' must be a {expected.__name__}, got {type(obj[key]).__name__}")
+
+
+def parse_structured(reply: Any, schema: Dict[str, type]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parses an LLM reply into a dictionary matching `schema`, repairing it locally if needed.
+
+    Args:
+        reply: the reply text (a dictionary is validated as is)
+        schema: required key -> expected type
+
+    Returns:
+        (parsed dictionary, whether a local repair was needed)
+
+    Raises:
+        StructuredOutputError: when the reply cannot be repaired or does not match the schema; the message is
+            suitable for a repair turn
+    """
+    if isinstance(reply, dict):
+        validate(reply, schema)
+        return reply, False
+    text = str(reply)
+    parsed = _load(text.strip())
+    repaired = parsed is None
+    if repaired:
+        # Typographic quotes are only straightened when needed: inside valid strings they are content
+        parsed = _load(repair(text))
+        if parsed is None:
+            parsed = _load(repair(text, straighten_quotes=True))
+        if parsed is None:
+            raise StructuredOutputError("the reply is not a valid JSON object or Python dictionary")
+    validate(parsed, schema)
+    if repaired:
+        get_tracer().count("format_repairs")
+    return parsed, repaired
+
+
+def extract_code_block(reply: str) -> Tuple[Optional[str], bool]:
+    """
+    Extracts Python code from a reply that should be exactly one ```python block.
+
+    Returns:
+        (code, whether a local repair was needed); code is None when the reply holds no usable code
+    """
+    text = str(reply).strip()
+    if text.startswith("```python") and text.endswith("```"):
+        return text[len("```python"):-3].strip(), False
+    fenced = _PYTHON_FENCE.search(text)
+    if fenced:
+        code = fenced.group(1).strip()
+    else:
+        code = text
+        try:
+            compile(code, "<llm reply>", "exec")
+        except (SyntaxError, ValueError):
+            return None, False
+        if "df" not in code:   # a lone word of prose also compiles
+            return None, False
+    if not code:
+        return None, False
+    get_tracer().count("format_repairs")
+    return code, True
@@ -5,6 +5,10 @@ from typing import Dict, List, Union, Optional, Any
 import pandas as pd
 import os
 
+from auto_feat.featurization_module.feature_store import FeatureStore
+from auto_feat.featurization_module.history import ProposalHistory
+from auto_feat.featurization_module.streaming import read_sample
+
 
 class AutoFeaturizer:
     """
@@ -15,44 +19,89 @@ class AutoFeaturizer:
         papers: list of paths to where papers are stored (in raw text format)
         data: path to where data is stored (CSV or parquet supported)
         target: user-specified target to be used by downstream ML models
+        feature_store_path: optional directory of a persistent feature store; generated features are saved there
+            with their provenance and re-attached by later iterations and runs instead of being regenerated
+        streaming: if True, only a sample of the data is loaded in memory; the full source is cleaned chunk by chunk
+            into Parquet shards, which the evaluator imports directly, and each accepted code block adds its columns
+            to the shards
+        chunksize: rows per chunk (and per shard) in streaming mode
+        shard_dir: directory of the augmented Parquet shards in streaming mode
+        sample_rows: rows kept in memory in streaming mode (used for prompts and code validation)
+        profile_cache_dir: optional directory where data profiles are cached by file hash and parameters (see
+            `first_pass.profiling.profiler.load_profile`); profiles are always cached in memory
+        retrieval_cache_dir: optional directory where manuscript passage indexes are cached by manuscript hash (see
+            `first_pass.retrieval.bm25.load_index`); indexes are always cached in memory
     """
 
     def __init__(self,
                  target: str,
                  manuscript_path: str = None,
                  data_path: str = None,
-                 max_iterations: int = 5) -> None:
+                 max_iterations: int = 5,
+                 feature_store_path: str = None,
+                 streaming: bool = False,
+                 chunksize: int = 100_000,
+                 shard_dir: str = None,
+                 sample_rows: int = 10_000,
+                 profile_cache_dir: str = None,
+                 retrieval_cache_dir: str = None) -> None:
         self.iterations = 0 
         self.max_iterations = max_iterations
         base_dir = os.path.join(os.path.dirname(__file__), "data")
         self.manuscript_path = manuscript_path or os.path.join(base_dir, "manuscript.txt")
         self.data_path = data_path or os.path.join(base_dir, "data.csv")
         self.target = target
-        self.data = pd.read_csv(self.data_path)
+        self.streaming = streaming
+        self.chunksize = chunksize
+        self.shard_dir = shard_dir or os.path.splitext(self.data_path)[0] + "_augmented"
+        self.data = read_sample(self.data_path, sample_rows) if streaming else pd.read_csv(self.data_path)
 
         # === Pipeline-populated attributes ===
 
         #From paper summarization
-        
+        self.profile_cache_dir = profile_cache_dir
+        self.data_profile: Optional[Dict[str, Any]] = None   # streaming per-column statistics of the raw data
+        self.retrieval_cache_dir = retrieval_cache_dir
+        self.manuscript_index = None   # BM25 index of the manuscript passages (first_pass.retrieval.bm25)
         self._literature_review: Optional[str] = None
         self._features_description: Dict[str, str] = {}   # original + engineered
         self._clean_augmented_data: pd.DataFrame = self.data.copy()
         self.cur_feature_keys = [col for col in self._clean_augmented_data.columns if col != self.target]
+        self.clean_report: Optional[Dict[str, Any]] = None   # from the DataClean node
 
 
         # From proposal
         self._construct_strategy: Dict[str, str] = {}
         self.new_feature_computation: Optional[Dict[str, str]] = None
+        self.proposal_history = ProposalHistory()   # every proposed feature and its outcome
+        # Proposal drafted during the last evaluation and the report it was made from (pipelined mode)
+        self.proposal_draft: Optional[Dict[str, Any]] = None
         
 
         # From generation
         self.error_message: Optional[str] = None
+        self.feature_store: Optional[FeatureStore] = FeatureStore(feature_store_path) if feature_store_path else None
+        self.dataset_hash: Optional[str] = None   # hash of the original columns, keys the feature store
+        self.accepted_code: List[str] = []
+        self.pruned_features: Dict[str, str] = {}   # generated features dropped as duplicates, with the reason
+        # File or directory the evaluator imports directly instead of uploading clean_augmented_data (streaming)
+        self.augmented_data_path: Optional[str] = self.data_path if streaming else None
 
         # From evaluation
         self.eval_report: Optional[Dict[str, Any]] = None
+        self.selected_features: Optional[List[str]] = None   # best subset of cur_feature_keys (greedy selection)
         self.datalog = []
         self.newfeaturelog = []
 
+        # From the export (see auto_feat.export.export_artifact): manifest of the written inference artifact
+        self.export_manifest: Optional[Dict[str, Any]] = None
+
+        # From the run deadline (see auto_feat.deadline.RunDeadline): the node that ran out of time, if any
+        self.deadline_exceeded: Optional[Dict[str, Any]] = None
+
+        # From instrumentation (see auto_feat.instrumentation.Tracer)
+        self.trace_summary: List[Dict[str, Any]] = []
+
     # === Properties ===
     @property
     def literature_review(self) -> str:
@@ -88,6 +137,7 @@ class AutoFeaturizer:
 
     @construct_strategy.setter
     def construct_strategy(self, strategy: Dict) -> None:
-        self.cur_feature_keys = list(strategy.keys())
+        # The feature pool is cumulative: new features join the original and earlier engineered ones
+        self.cur_feature_keys = self.cur_feature_keys + [k for k in strategy if k not in self.cur_feature_keys]
         self.newfeaturelog.append(strategy)
         self._construct_strategy = strategy
@@ -0,0 +1,238 @@
+"""
+Batch runner: executes many AutoFeaturizer jobs (manuscript, dataset, target, task, iterations) in a process pool.
+
+All workers attach to one shared H2O cluster instead of each starting its own JVM, and share a cross-process
+single-flight directory, which also holds the token buckets of the batch-wide LLM rate limits (drawn from by
+whichever worker needs them). Each finished job writes `<out_dir>/<job id>.json` as soon as it completes; jobs whose
+report already exists are skipped, so an interrupted batch can be resumed by re-running the same command. Failed
+jobs write `<job id>.failed.json` instead and are retried on the next run.
+
+Example:
+    python -m auto_feat.batch jobs.jsonl --out-dir reports --workers 4 --llm-rpm 120
+
+The manifest is a JSON list, JSON lines or CSV with the columns `manuscript`, `dataset`, `target` and optionally
+`task` (default "regression"), `iterations` (default 3), `budget_s` (wall-time budget of the job, default none; a
+job that runs out of time ends with its best evaluation so far instead of holding a worker) and `id`.
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import concurrent.futures
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+import traceback
+
+from auto_feat.LLM_API.singleflight import SingleFlight
+
+DEFAULT_TASK = "regression"
+DEFAULT_ITERATIONS = 3
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads a job manifest (JSON list, JSON lines or CSV) and fills in defaults and job ids.
+
+    Returns:
+        list of jobs with the keys id, manuscript, dataset, target, task, iterations and budget_s
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            text = f.read().strip()
+            rows = json.loads(text) if text.startswith("[") else [json.loads(l) for l in text.splitlines() if l.strip()]
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs, seen = [], set()
+    for i, row in enumerate(rows):
+        missing = [k for k in ("manuscript", "dataset", "target") if not row.get(k)]
+        if missing:
+            raise ValueError(f"Job {i} of {path} is missing {', '.join(missing)}")
+        job = {
+            "manuscript": os.path.join(base_dir, row["manuscript"]),   # relative paths are relative to the manifest
+            "dataset": os.path.join(base_dir, row["dataset"]),
+            "target": row["target"],
+            "task": row.get("task") or DEFAULT_TASK,
+            "iterations": int(row.get("iterations") or DEFAULT_ITERATIONS),
+            "budget_s": float(row.get("budget_s") or 0),
+        }
+        job["id"] = str(row.get("id") or job_id(job))
+        if job["id"] in seen:
+            raise ValueError(f"Duplicate job id {job['id']!r} in {path}")
+        seen.add(job["id"])
+        jobs.append(job)
+    return jobs
+
+
+def job_id(job: Dict[str, Any]) -> str:
+    """Returns a readable, stable id for a job: dataset name, target and a hash of the full job tuple."""
+    key = json.dumps([job[k] for k in ("manuscript", "dataset", "target", "task", "iterations")])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:10]
+    name = os.path.splitext(os.path.basename(job["dataset"]))[0]
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{name}_{job['target']}").strip("_")[:60]
+    return f"{slug}_{digest}"
+
+
+def report_path(out_dir: str, job: Dict[str, Any]) -> str:
+    return os.path.join(out_dir, f"{job['id']}.json")
+
+
+def pending_jobs(jobs: List[Dict[str, Any]], out_dir: str) -> List[Dict[str, Any]]:
+    """Returns the jobs whose report does not exist yet."""
+    return [job for job in jobs if not os.path.exists(report_path(out_dir, job))]
+
+
+def _write_json(path: str, payload: Dict[str, Any]) -> None:
+    """Writes JSON atomically, so a killed worker never leaves a half-written (and thus skipped) report."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, default=lambda o: o.item() if hasattr(o, "item") else str(o))
+    os.replace(tmp_path, path)
+
+
+def run_job(job: Dict[str, Any], out_dir: str, max_retries: int = 5) -> Dict[str, Any]:
+    """
+    Runs one pipeline in the current (worker) process and writes its report.
+
+    Returns:
+        {"id", "status", "elapsed_s"} and, on failure, "error"
+    """
+    start = time.perf_counter()
+    try:
+        # Imported here: importing the evaluator connects to H2O, which must happen in the worker
+        from auto_feat import AutoFeaturizer
+        from auto_feat.build_graph import build_autofeat_graph
+        from auto_feat.instrumentation import Tracer
+
+        state = AutoFeaturizer(
+            target=job["target"],
+            manuscript_path=job["manuscript"],
+            data_path=job["dataset"],
+            max_iterations=job["iterations"],
+            # Jobs over the same dataset profile it once, jobs over the same manuscript index it once
+            profile_cache_dir=os.path.join(out_dir, ".profiles"),
+            retrieval_cache_dir=os.path.join(out_dir, ".indexes"),
+        )
+        tracer = Tracer()
+        app = build_autofeat_graph(task=job["task"], max_retries=max_retries, tracer=tracer,
+                                   run_budget_s=job.get("budget_s", 0)).compile()
+        app.invoke(state)
+
+        elapsed = time.perf_counter() - start
+        _write_json(report_path(out_dir, job), {
+            "job": job,
+            "elapsed_s": elapsed,
+            "literature_review": state.literature_review,
+            "features_description": state.features_description,
+            "datalog": state.datalog,
+            "newfeaturelog": state.newfeaturelog,
+            "accepted_code": state.accepted_code,
+            "deadline_exceeded": state.deadline_exceeded,
+            "trace": tracer.to_dict(),
+        })
+        return {"id": job["id"], "status": "done", "elapsed_s": elapsed}
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        _write_json(os.path.join(out_dir, f"{job['id']}.failed.json"), {
+            "job": job,
+            "elapsed_s": elapsed,
+            "error": repr(e),
+            "traceback": traceback.format_exc(),
+        })
+        return {"id": job["id"], "status": "failed", "elapsed_s": elapsed, "error": repr(e)}
+
+
+def start_h2o_cluster(nthreads: int = -1, max_mem_size: Optional[str] = None) -> str:
+    """Starts (or attaches to) a local H2O cluster in this process and returns its URL for the workers."""
+    import h2o
+    h2o.init(nthreads=nthreads, max_mem_size=max_mem_size)
+    return h2o.connection().base_url
+
+
+def run_batch(jobs: List[Dict[str, Any]],
+              out_dir: str,
+              workers: int = 2,
+              max_retries: int = 5,
+              h2o_url: Optional[str] = None,
+              llm_rpm: Optional[float] = None,
+              llm_tpm: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Runs the jobs that have no report yet in a pool of `workers` processes.
+
+    Args:
+        jobs: jobs as returned by `load_manifest`
+        out_dir: directory of the per-job reports
+        workers: number of worker processes
+        max_retries: retries per agent, as in `build_autofeat_graph`
+        h2o_url: URL of an existing H2O cluster (None: start one here and share it)
+        llm_rpm, llm_tpm: LLM request/token rate limits for the whole batch, shared by the workers through token
+            buckets in the lock directory (see `LLM_API.limiter`)
+
+    Returns:
+        one status dict per job that was run (see `run_job`)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    todo = pending_jobs(jobs, out_dir)
+    print(f"📋 {len(jobs)} jobs, {len(jobs) - len(todo)} already done, {len(todo)} to run")
+    if not todo:
+        return []
+    workers = max(1, min(workers, len(todo)))
+
+    # Workers are spawned, so they inherit these settings through the environment
+    os.environ["AUTOFEAT_H2O_URL"] = h2o_url or start_h2o_cluster()
+    os.environ.setdefault("AUTOFEAT_LLM_SINGLEFLIGHT_DIR", os.path.join(out_dir, ".singleflight"))
+    if llm_rpm:
+        os.environ["AUTOFEAT_LLM_RPM"] = str(llm_rpm)
+    if llm_tpm:
+        os.environ["AUTOFEAT_LLM_TPM"] = str(llm_tpm)
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = [pool.submit(run_job, job, out_dir, max_retries) for job in todo]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result["status"] == "done":
+                    print(f"✅ {result['id']} finished in {result['elapsed_s']:.1f}s ({len(results)}/{len(todo)})")
+                else:
+                    print(f"❌ {result['id']} failed after {result['elapsed_s']:.1f}s: {result['error']} "
+                          f"({len(results)}/{len(todo)})")
+    finally:
+        # The workers are gone: none of the coalescing files is needed any more
+        SingleFlight(os.environ["AUTOFEAT_LLM_SINGLEFLIGHT_DIR"]).close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="job manifest (JSON, JSON lines or CSV)")
+    parser.add_argument("--out-dir", default="autofeat_reports")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--h2o-url", help="attach to this H2O cluster instead of starting one")
+    parser.add_argument("--llm-rpm", type=float, help="LLM requests per minute for the whole batch")
+    parser.add_argument("--llm-tpm", type=float, help="LLM tokens per minute for the whole batch")
+    parser.add_argument("--job-budget-s", type=float, default=0,
+                        help="wall-time budget of each job without its own budget_s (0: unlimited)")
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    for job in jobs:
+        job["budget_s"] = job["budget_s"] or args.job_budget_s
+    results = run_batch(jobs, args.out_dir, workers=args.workers,
+                        max_retries=args.max_retries, h2o_url=args.h2o_url,
+                        llm_rpm=args.llm_rpm, llm_tpm=args.llm_tpm)
+    failed = [r for r in results if r["status"] != "done"]
+    if failed:
+        print(f"\n❌ {len(failed)} job(s) failed; re-run the same command to retry them")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,76 +2,194 @@
 Builds the LangGraph pipeline for automatic featurization with feedback loop.
 """
 
+from typing import Callable, Dict, Optional, Sequence
+
 from langgraph.graph import StateGraph, END
 
 # Import agents
 from auto_feat.first_pass.summarization.summarize import summarize
+from auto_feat.first_pass.data_clean.clean import data_clean
+from auto_feat.first_pass.retrieval.bm25 import RETRIEVAL_K
 from auto_feat.featurization_module.proposal import feat_proposal
 from auto_feat.featurization_module.execution import feature_generation
+from auto_feat.featurization_module.dedup import feature_dedup
+from auto_feat.featurization_module.pipelining import ProposalPipeline
 from auto_feat.eval_module.evaluator import create_evaluation_agent_wrap
+from auto_feat.eval_module.uncertainty import MAIN_METRIC, best_report
+from auto_feat.export import export_node
 
 # Import LLM API wrapper
 from auto_feat.LLM_API.LLM_chat import chatbox
-
-
-def build_autofeat_graph(task: str = "regression", max_retries: int = 5):
+from auto_feat.LLM_API.routing import ModelRouter
+
+# Import instrumentation
+from auto_feat.instrumentation import NULL_TRACER, Tracer
+from auto_feat.deadline import RunDeadline
+
+
+def restore_best_state(state: object, task: str) -> None:
+    """Points the state at its best evaluation so far (used when a run ends early)."""
+    best = best_report(state.datalog, task)
+    if best is None:
+        return
+    metric, _ = MAIN_METRIC[task]
+    state.eval_report = best
+    state.selected_features = list(best["features"])
+    print(f"🏁 Ending with the best evaluation so far: test {metric}={best['performance']['test'][metric]:.4g} "
+          f"({best['model_id']})")
+
+
+def build_autofeat_graph(task: str = "regression",
+                         max_retries: int = 5,
+                         tracer: Optional[Tracer] = None,
+                         llm: Callable = chatbox,
+                         eval_fidelity: str = "full",
+                         dedup_threshold: float = 0.995,
+                         feature_selection: str = "none",
+                         eval_budget_s: float = 0,
+                         hparam_cache_path: Optional[str] = None,
+                         model_zoo: Sequence[str] = (),
+                         uncertainty: bool = False,
+                         model_routing: bool = False,
+                         run_budget_s: float = 0,
+                         node_budgets: Optional[Dict[str, float]] = None,
+                         pipelined: bool = False,
+                         reconcile_tol: float = 0.05,
+                         export_dir: Optional[str] = None,
+                         export_model: str = "auto",
+                         retrieval_k: int = RETRIEVAL_K):
     """
     Build the LangGraph pipeline with feedback loop.
 
     Flow:
-        - Summarizer initializes AutoFeaturizer with literature + dataset.
+        - Summarizer initializes AutoFeaturizer with literature + dataset and indexes the manuscript passages
+          (proposal and generation prompts carry the top `retrieval_k` passages rather than the whole paper).
+        - DataClean drops rows without a target, coerces numeric text and excludes metadata columns.
         - Evaluation runs on the original dataset to produce a baseline report.
         - Feedback loop:
-            Evaluation → Proposal → Generation → Evaluation
-        - Stops after max_iterations.
+            Evaluation → Proposal → Generation → Dedup → Evaluation
+        - In pipelined mode the proposal of the next iteration is drafted while Evaluation runs and reused
+          unless the fresh report changed materially.
+        - Stops after max_iterations, or when the run deadline or a node budget expires: the running node is
+          cancelled, the remaining nodes are skipped and the state points at its best evaluation so far.
+        - With `export_dir`, an Export node then writes the fused feature transform and the model of the best
+          evaluation for scoring new data (see `auto_feat.export`).
 
     Args:
         task (str): "regression" or "classification".
         max_retries (int): retries for LLM-based modules.
+        tracer (Tracer): optional instrumentation; every node run is recorded and the per-iteration summary is
+            attached to `state.trace_summary`. Nodes are left unwrapped when omitted.
+        llm (Callable): LLM wrapper used by all agents (defaults to `chatbox`; see `LLM_API.replay` for an
+            offline stub).
+        eval_fidelity (str): "full" or "successive_halving" (multi-fidelity screening of candidate feature sets
+            before the full fit, see `create_evaluation_agent_wrap`).
+        dedup_threshold (float): generated features whose |correlation| with an existing column exceeds this are
+            dropped before evaluation (see `feature_dedup`).
+        feature_selection (str): "greedy" evaluates the best subset of the cumulative feature pool found by
+            forward/backward selection (extra model fits every evaluation; not combinable with successive
+            halving), "none" the whole pool (see `create_evaluation_agent_wrap`).
+        eval_budget_s (float): training time budget of each evaluation in seconds (0: unlimited).
+        hparam_cache_path (str): JSON file caching the tuned GBM hyperparameters per dataset/target across runs
+            (default: tuned once per pipeline run).
+        model_zoo (list of str): scikit-learn model families evaluated next to the H2O GBM, e.g.
+            ["gbm", "linear", "random_forest", "kernel", "mlp"] (see `model_zoo.run_model_zoo`).
+        uncertainty (bool): adds bootstrap confidence intervals of metrics and importances to each report, and
+            judges changes between iterations by overlapping intervals (see `eval_module.uncertainty`).
+        model_routing (bool): routes each call to a model tier by agent and call type, with repairs and code
+            generation on the fast tier and escalation to the large model after failures (off by default; see
+            `LLM_API.routing.ModelRouter`, and pass a configured `ModelRouter` as `llm` to change the routes).
+        run_budget_s (float): wall-time budget of the whole run in seconds (0: unlimited). It becomes LLM request
+            timeouts, a time limit on generated code and H2O `max_runtime_secs` (see `auto_feat.deadline`).
+        node_budgets (dict): {node name: seconds} budget of each run of a node, e.g. {"Evaluation": 600}.
+        pipelined (bool): drafts the next proposal from the previous report while the current feature set is
+            evaluated, overlapping LLM latency with training (see `featurization_module.pipelining`).
+        reconcile_tol (float): relative change of the main test metric above which a draft is discarded and the
+            proposal made again from the fresh report (a change of the two top features also discards it); the
+            5% default stays above the split noise between iterations. The draft hit rate is in the trace.
+        export_dir (str): directory of the inference artifact written at the end of the run (default: no export).
+        export_model (str): "mojo", "sklearn" or "auto" (see `export.export_artifact`).
+        retrieval_k (int): manuscript passages retrieved from the BM25 index of the manuscript for each proposal
+            (target and top features) and generation (feature specifications) prompt; 0 disables retrieval. The
+            literature context of a prompt (summary plus passages) is capped at `bm25.LITERATURE_CHARS`.
     Returns:
         workflow (StateGraph)
     """
 
     workflow = StateGraph(dict)
+    tracer = tracer or NULL_TRACER
+    deadline = RunDeadline(run_budget_s, node_budgets)
+
+    def add_node(name: str, node: Callable, starts_run: bool = False) -> None:
+        # The deadline wrapper runs inside the tracer, so cancellations are recorded on the node's trace
+        workflow.add_node(name, tracer.wrap(name, deadline.wrap(name, node, starts_run=starts_run)))
+    if model_routing and not isinstance(llm, ModelRouter):
+        llm = ModelRouter(llm)
 
     # --- Summarization (initialization only) ---
-    summarizer = summarize(chatbox, max_retries=max_retries)
-    workflow.add_node("Summarizer", summarizer)
+    summarizer = summarize(llm, max_retries=max_retries)
+    add_node("Summarizer", summarizer, starts_run=True)   # the run clock starts with every invocation
 
-    # --- Proposal agent ---
-    proposal_agent = feat_proposal(chatbox, max_retries=max_retries)
-    workflow.add_node("FeatProposal", proposal_agent)
+    # --- Data clean-up (initialization only) ---
+    cleaner = data_clean()
+    add_node("DataClean", cleaner)
+
+    # --- Proposal agent (drafted during evaluation in pipelined mode) ---
+    pipeline = ProposalPipeline(llm, task=task, max_retries=max_retries, tracer=tracer,
+                                tol=reconcile_tol, retrieval_k=retrieval_k) if pipelined else None
+    proposal_agent = feat_proposal(llm, max_retries=max_retries, pipeline=pipeline, retrieval_k=retrieval_k)
+    add_node("FeatProposal", proposal_agent)
 
     # --- Feature Generation agent ---
-    generation_agent = feature_generation(chatbox, max_retries=max_retries)
-    workflow.add_node("FeatGeneration", generation_agent)
+    generation_agent = feature_generation(llm, max_retries=max_retries, retrieval_k=retrieval_k)
+    add_node("FeatGeneration", generation_agent)
+
+    # --- Deduplication of generated features ---
+    dedup_node = feature_dedup(threshold=dedup_threshold)
+    add_node("FeatDedup", dedup_node)
 
     # --- Evaluation agent ---
-    eval_agent = create_evaluation_agent_wrap(max_retries=max_retries, task=task)
-    workflow.add_node("Evaluation", eval_agent)
+    eval_agent = create_evaluation_agent_wrap(max_retries=max_retries, task=task, fidelity=eval_fidelity,
+                                              selection=feature_selection, train_budget_s=eval_budget_s,
+                                              hparam_cache=hparam_cache_path, model_zoo=model_zoo,
+                                              uncertainty=uncertainty)
+    if pipeline is not None:
+        eval_agent = pipeline.wrap_evaluation(eval_agent)
+    add_node("Evaluation", eval_agent)
 
     # --- Workflow wiring ---
-    # Entry: Summarizer → Evaluation (baseline)
+    # Entry: Summarizer → DataClean → Evaluation (baseline)
     workflow.set_entry_point("Summarizer")
-    workflow.add_edge("Summarizer", "Evaluation")
+    workflow.add_edge("Summarizer", "DataClean")
+    workflow.add_edge("DataClean", "Evaluation")
 
     # --- Conditional feedback loop ---
     def should_continue(state: dict) -> bool:
         """Check iteration count to decide loop continuation."""
+        if getattr(state, "deadline_exceeded", None):
+            restore_best_state(state, task)
+            return False
         iteration = state.iterations
         max_iter = state.max_iterations
         # Increment iteration in state
         state.iterations = iteration + 1
         return state.iterations <= max_iter
 
+    # --- Export of the inference artifact (after the loop) ---
+    if export_dir:
+        # Not under the deadline: a run that ran out of time still exports its best evaluation
+        workflow.add_node("Export", tracer.wrap("Export", export_node(export_dir, task=task, model=export_model)))
+        workflow.add_edge("Export", END)
+
     workflow.add_conditional_edges(
         "Evaluation",
         should_continue,
-        {True: "FeatProposal", False: END}
+        {True: "FeatProposal", False: "Export" if export_dir else END}
     )
 
-    # Loop body: Proposal → Generation → Evaluation
+    # Loop body: Proposal → Generation → Dedup → Evaluation
     workflow.add_edge("FeatProposal", "FeatGeneration")
-    workflow.add_edge("FeatGeneration", "Evaluation")
+    workflow.add_edge("FeatGeneration", "FeatDedup")
+    workflow.add_edge("FeatDedup", "Evaluation")
 
     return workflow
@@ -0,0 +1,168 @@
+"""
+Run-level deadline and per-node time budgets for the LangGraph pipeline.
+
+Graph nodes are wrapped with `RunDeadline.wrap`, which sets the expiry of the running node: the earlier of the run
+deadline and the node's own budget. Code running inside the node reads it through `time_left()` (like
+`get_tracer()`, without passing it around) and turns it into LLM request timeouts, a time limit on generated code,
+H2O `max_runtime_secs` and timeouts of the waits for rate limits, concurrency slots and coalesced requests. Nothing
+is interrupted from outside: work stops at its own `check_deadline()` calls and library timeouts. When the time is
+up, `DeadlineExceeded` cancels the node; the wrapper records the cancellation on the state, the remaining nodes are
+skipped and the graph ends with the best state so far.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+import concurrent.futures
+import contextvars
+import sys
+import threading
+import time
+
+from auto_feat.instrumentation import get_tracer
+
+_active_expiry: ContextVar = ContextVar("autofeat_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the run deadline or the budget of the running node has expired."""
+
+
+def time_left() -> Optional[float]:
+    """Seconds left for the running node, or None when it has no deadline."""
+    expiry = _active_expiry.get()
+    return None if expiry is None else expiry - time.monotonic()
+
+
+def check_deadline(what: str = "node") -> None:
+    """Raises DeadlineExceeded if the running node is out of time."""
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline expired before {what}")
+
+
+def call_with_deadline(fn: Callable, *args: Any, grace_s: float = 1.0, **kwargs: Any) -> Any:
+    """
+    Calls `fn` and returns its result, raising DeadlineExceeded if the node runs out of time first.
+
+    Without a deadline `fn` runs inline. Otherwise it runs in a daemon thread that checks the deadline itself at
+    every line of code compiled from a string (generated code run with `exec`), through a trace function of that
+    thread only, so Python-level loops of generated code stop on time. Library code (pandas, NumPy, C calls) is not
+    interrupted: a call still running `grace_s` after the expiry is reported as abandoned, left to finish on its own
+    data, and its result is discarded.
+    """
+    left = time_left()
+    name = getattr(fn, "__name__", "call")
+    if left is None:
+        return fn(*args, **kwargs)
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline expired before calling {name}")
+    expiry = time.monotonic() + left
+    outcome: Dict[str, Any] = {}
+
+    def check_line(frame, event, arg):
+        if event == "line" and time.monotonic() >= expiry:
+            raise DeadlineExceeded(f"{name} did not finish within {left:.1f}s")
+        return check_line
+
+    def trace(frame, event, arg):
+        return check_line if frame.f_code.co_filename.startswith("<") else None
+
+    def target():
+        sys.settrace(trace)
+        try:
+            outcome["result"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            sys.settrace(None)
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(target,), daemon=True)
+    thread.start()
+    thread.join(left + grace_s)
+    if thread.is_alive():
+        get_tracer().count("abandoned_calls")
+        raise DeadlineExceeded(f"{name} did not finish within {left:.1f}s; it is still running in library code "
+                               "that cannot be interrupted and its result will be discarded")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def result_within_deadline(future: concurrent.futures.Future, what: str = "a parallel task") -> Any:
+    """
+    `future.result()`, waiting no longer than the running node has left. On expiry the task is abandoned (it
+    stops at its own `check_deadline()` if it has one, its result is discarded) and DeadlineExceeded is raised.
+    """
+    left = time_left()
+    try:
+        return future.result(None if left is None else max(left, 0.0))
+    except DeadlineExceeded:
+        raise
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        get_tracer().count("abandoned_calls")
+        raise DeadlineExceeded(f"Deadline expired while waiting for {what}")
+
+
+class RunDeadline:
+    """
+    Deadline of one pipeline run plus optional budgets per graph node.
+
+    Args:
+        run_budget_s: wall-time budget of the whole run, counted from the entry node of each invocation (or the
+            first wrapped node when no node is marked as the entry; 0: unlimited)
+        node_budgets: {node name: seconds} budget of each run of a node (missing nodes: only the run deadline)
+        state_attr: name of the state attribute recording the cancellation
+    """
+
+    def __init__(self,
+                 run_budget_s: float = 0,
+                 node_budgets: Optional[Dict[str, float]] = None,
+                 state_attr: str = "deadline_exceeded") -> None:
+        self.run_budget_s = run_budget_s
+        self.node_budgets = dict(node_budgets or {})
+        self.state_attr = state_attr
+        self.expires_at: Optional[float] = None
+        self._started = False
+
+    def start(self) -> None:
+        """Starts the run clock (done by the entry node, or the first wrapped node, if not called explicitly)."""
+        self._started = True
+        self.expires_at = time.monotonic() + self.run_budget_s if self.run_budget_s else None
+
+    def node_expiry(self, name: str) -> Optional[float]:
+        """Expiry of a run of `name` starting now."""
+        budget = self.node_budgets.get(name)
+        candidates = [t for t in (self.expires_at, time.monotonic() + budget if budget else None) if t is not None]
+        return min(candidates) if candidates else None
+
+    def wrap(self, name: str, fn: Callable, starts_run: bool = False) -> Callable:
+        """
+        Wraps a graph node so that it runs under its deadline and is skipped once the run was cancelled.
+
+        Args:
+            starts_run: the node is the graph's entry point; each of its runs restarts the clock and clears an
+                earlier cancellation, so that invoking a compiled graph again gets a fresh budget
+        """
+        def node_with_deadline(state):
+            if starts_run:
+                self.start()
+                setattr(state, self.state_attr, None)
+            elif not self._started:
+                self.start()
+            if getattr(state, self.state_attr, None):
+                return None   # an earlier node ran out of time: let the graph reach its end
+            expiry = self.node_expiry(name)
+            token = _active_expiry.set(expiry)
+            try:
+                check_deadline(name)
+                return fn(state)
+            except DeadlineExceeded as e:
+                get_tracer().count("cancelled")
+                print(f"⏰ {name} cancelled: {e}")
+                setattr(state, self.state_attr, {
+                    "node": name, "iteration": getattr(state, "iterations", None), "reason": str(e),
+                })
+                return None
+            finally:
+                _active_expiry.reset(token)
+        return node_with_deadline
@@ -1,25 +1,112 @@
 import h2o
 from h2o.estimators import H2OGradientBoostingEstimator
 import numpy as np
+import os
+from typing import Sequence
 import uuid
 import time
+
+from auto_feat.deadline import DeadlineExceeded, check_deadline, time_left
+from auto_feat.instrumentation import get_tracer
+from auto_feat.eval_module.multifidelity import candidate_feature_sets, successive_halving
+from auto_feat.eval_module.selection import greedy_selection
+from auto_feat.eval_module.model_zoo import prepare_matrix, run_model_zoo
+from auto_feat.eval_module.uncertainty import (
+    MAIN_METRIC, bootstrap_metric_ci, compare_intervals, ensemble_importance_ci,
+)
+from auto_feat.eval_module.hparams import DEFAULT_GRID, EARLY_STOPPING, HyperparamCache, tune_gbm
+from auto_feat.featurization_module.execution import dataset_hash
  
  
-h2o.init()
-h2o.no_progress()
+# Environment variable holding the URL of a shared H2O cluster (set by the batch runner for its workers)
+H2O_URL_ENV = "AUTOFEAT_H2O_URL"
+
+
+def connect_h2o() -> None:
+    """Attaches to the shared H2O cluster named by AUTOFEAT_H2O_URL, or starts/attaches to a local one."""
+    url = os.environ.get(H2O_URL_ENV)
+    if url:
+        h2o.connect(url=url, verbose=False)
+    else:
+        h2o.init()
+    h2o.no_progress()
+
+
+connect_h2o()
 
 # Suppress Python warnings
 import warnings
 warnings.filterwarnings("ignore")
  
-def create_evaluation_agent_wrap(max_retries: int = 3, task: str = "regression"):
+def build_gbm(task: str, ntrees: int = 200, **params) -> H2OGradientBoostingEstimator:
+    """Returns the H2O GBM used for evaluation."""
+    if task == "regression":
+        return H2OGradientBoostingEstimator(ntrees=ntrees, seed=42, **params)
+    return H2OGradientBoostingEstimator(ntrees=ntrees, seed=42, distribution="multinomial", **params)
+
+
+def create_evaluation_agent_wrap(max_retries: int = 3,
+                                 task: str = "regression",
+                                 fidelity: str = "full",
+                                 min_fraction: float = 0.1,
+                                 min_trees: int = 20,
+                                 eta: int = 3,
+                                 selection: str = "none",
+                                 selection_trees: int = 50,
+                                 selection_workers: int = 4,
+                                 max_trees: int = 200,
+                                 train_budget_s: float = 0,
+                                 hparam_cache=None,
+                                 model_zoo: Sequence[str] = (),
+                                 zoo_workers: int = 4,
+                                 uncertainty: bool = False,
+                                 n_bootstrap: int = 1000,
+                                 n_ensemble: int = 20):
     """
     Wraps the Evaluation Module using H2O models.
  
     Args:
         max_retries (int): Number of retries if training/evaluation fails.
         task (str): "regression" or "classification".
+        fidelity (str): "full" trains one full model on the current features. "successive_halving" first scores
+            candidate feature sets (the full set and each leave-one-new-feature-out set, or
+            `state.candidate_feature_sets` when given) on row subsamples with few trees, promotes the best 1/eta
+            to larger budgets, and only fully trains and reports the winner. Cannot be combined with greedy
+            selection, which already scores candidate subsets.
+        min_fraction (float): training-row fraction of the first successive-halving rung.
+        min_trees (int): number of trees of the first successive-halving rung.
+        eta (int): successive-halving reduction factor.
+        selection (str): "greedy" runs forward/backward selection over the cumulative feature pool (original plus
+            all accepted engineered features), starting from the best subset of the previous evaluation; the
+            selected subset is what gets trained and reported. "none" trains on the whole pool (or on the
+            successive-halving winner; the default). Pool features left out of the selected subset are recorded
+            as rejected by selection in the proposal history.
+        selection_trees (int): number of trees of the models scoring candidate subsets.
+        selection_workers (int): candidate subsets scored in parallel on the H2O cluster.
+        max_trees (int): tree budget of the GBM. On the first evaluation of a dataset/target, depth and learning
+            rate are tuned on a small grid with validation-based early stopping, which also picks the number of
+            trees; later evaluations reuse the cached result and train a single model.
+        train_budget_s (float): wall-time budget (seconds) of the tuning and final models of one evaluation,
+            enforced through H2O's `max_runtime_secs` (0: unlimited). Inside a node with a deadline (see
+            `auto_feat.deadline`) the deadline caps it too: tuning and greedy selection stop early to leave a
+            quarter of the time for the final model, and the node is cancelled if none is left.
+        hparam_cache (str | HyperparamCache): cache of tuned hyperparameters; a path makes it persist across runs
+            (default: in memory, for the iterations of this pipeline).
+        model_zoo (list of str): scikit-learn model families ("gbm", "linear", "random_forest", "kernel", "mlp")
+            trained concurrently on one shared encoded matrix of the evaluated features, next to the H2O model;
+            their metrics and a consensus importance across learners are added to the report (empty: skipped).
+            In streaming mode they are trained on the in-memory sample.
+        zoo_workers (int): model families (and bootstrap ensemble members) trained in parallel.
+        uncertainty (bool): adds bootstrap confidence intervals of the test metrics (resampled H2O test
+            predictions), feature-importance intervals from an ensemble of models fitted on bootstrap resamples of
+            the training rows, and an overlapping-CI verdict against the previous evaluation to the report.
+        n_bootstrap (int): bootstrap replicates of the test metrics.
+        n_ensemble (int): bootstrap models of the importance intervals.
     """
+    if fidelity == "successive_halving" and selection == "greedy":
+        raise ValueError('fidelity="successive_halving" and selection="greedy" both choose the evaluated features; '
+                         'use one of them')
+    cache = hparam_cache if isinstance(hparam_cache, HyperparamCache) else HyperparamCache(hparam_cache)
  
     def agent_node(state: object):
         """
@@ -27,41 +114,127 @@ def create_evaluation_agent_wrap(max_retries: int = 3, task: str = "regression")
           - state.clean_augmented_data: pandas.DataFrame (dataset with features + target)
           - state.cur_feature_keys: list of feature names
           - state.target: str, target column name
+          - state.augmented_data_path (optional): CSV/Parquet file or shard directory imported instead of the frame
  
         state will be updated with:
           - state.eval_report: dict (feedback report with metrics, feature importance, narrative)
+          - state.selected_features: list of the features selected from the pool (greedy selection)
         """
         df = state.clean_augmented_data
         feature_keys = state.cur_feature_keys
         target_key = state.target
+        tracer = get_tracer()
  
         for attempt in range(max_retries):
             try:
                 # Convert pandas DataFrame → H2O Frame
-                hf = h2o.H2OFrame(df)
+                with tracer.timer("h2o_upload_s"):
+                    if getattr(state, "augmented_data_path", None):
+                        # Streaming mode: import the source/shards straight into H2O, bypassing pandas
+                        hf = h2o.import_file(state.augmented_data_path)
+                    else:
+                        hf = h2o.H2OFrame(df)
  
                 # Train/test split
                 train, test = hf.split_frame(ratios=[0.8], seed=42)
  
-                # Choose model
-                if task == "regression":
-                    model = H2OGradientBoostingEstimator(
-                        ntrees=200,
-                        seed=42
+                # Validation split of the training rows, for early stopping, tuning and selection (test stays unseen)
+                fit_train, fit_valid = train.split_frame(ratios=[0.75], seed=42)
+                now = time.monotonic()
+                node_left = time_left()
+                deadlines = [d for d in (now + train_budget_s if train_budget_s else None,
+                                         now + node_left if node_left is not None else None) if d is not None]
+                deadline = min(deadlines) if deadlines else None
+                reserve_s = 0.25 * (deadline - now) if deadline else 0   # kept for the final model
+
+                def runtime_left(n_models: int = 1) -> float:
+                    """Per-model `max_runtime_secs` for the next n models (0: unlimited)."""
+                    check_deadline("training")
+                    return max(1.0, (deadline - time.monotonic()) / n_models) if deadline else 0
+
+                def out_of_time() -> bool:
+                    """True once tuning/selection must stop to leave time for the final model."""
+                    return deadline is not None and deadline - time.monotonic() < reserve_s
+
+                def valid_loss(m) -> float:
+                    perf = m.model_performance(fit_valid)
+                    return perf.rmse() if task == "regression" else perf.logloss()
+
+                # Tuned hyperparameters: cached per dataset/target, so only the first evaluation tunes
+                cache_key = HyperparamCache.key(dataset_hash(state), target_key, task)
+                params = cache.get(cache_key)
+                tuned = params is None
+                if tuned:
+                    with tracer.timer("h2o_train_s"):
+                        best = tune_gbm(
+                            lambda ntrees, **p: build_gbm(task, ntrees, **p),
+                            valid_loss,
+                            lambda m: m.train(x=feature_keys, y=target_key,
+                                              training_frame=fit_train, validation_frame=fit_valid),
+                            max_trees=max_trees,
+                            max_runtime_secs=runtime_left(len(DEFAULT_GRID) + 1),
+                            should_stop=out_of_time,
+                        )
+                    params = {k: v for k, v in best.items() if k != "valid_loss"}
+                    cache.put(cache_key, params, best["valid_loss"])
+                tree_params = {k: v for k, v in params.items() if k != "ntrees"}
+
+                # Greedy selection: best subset of the pool, scored with early-stopped models on the validation split
+                selected = None
+                if selection == "greedy":
+                    def subset_loss(keys):
+                        subset_model = build_gbm(task, min(selection_trees, params["ntrees"]),
+                                                 max_runtime_secs=runtime_left(selection_workers),
+                                                 **tree_params, **EARLY_STOPPING)
+                        with tracer.timer("h2o_train_s"):
+                            subset_model.train(x=keys, y=target_key, training_frame=fit_train,
+                                               validation_frame=fit_valid)
+                        return valid_loss(subset_model)
+
+                    feature_keys, loss, steps = greedy_selection(
+                        feature_keys, subset_loss, initial=getattr(state, "selected_features", None),
+                        max_workers=selection_workers, should_stop=out_of_time,
                     )
-                else:
-                    model = H2OGradientBoostingEstimator(
-                        ntrees=200,
-                        seed=42,
-                        distribution="multinomial"
+                    selected = {"pool": list(state.cur_feature_keys), "valid_loss": loss, "steps": steps}
+
+                # Multi-fidelity: pick the most promising candidate feature set before the full fit
+                multifidelity = None
+                if fidelity == "successive_halving":
+                    candidates = getattr(state, "candidate_feature_sets", None) or candidate_feature_sets(
+                        feature_keys, list(getattr(state, "construct_strategy", {}) or {})
                     )
+                    if len(candidates) > 1:
+                        # Rungs are scored on the validation split of the training rows; the test split stays
+                        # unseen. They use the tuned depth/learning rate, and their tree budgets grow to the tuned
+                        # number of trees, so the candidate is picked with the model of the full fit that follows
+                        def score_fn(keys, fraction, ntrees):
+                            subsample = (fit_train if fraction >= 1
+                                         else fit_train.split_frame(ratios=[fraction], seed=42)[0])
+                            rung_model = build_gbm(task, ntrees, max_runtime_secs=runtime_left(), **tree_params)
+                            with tracer.timer("h2o_train_s"):
+                                rung_model.train(x=keys, y=target_key, training_frame=subsample)
+                            return valid_loss(rung_model)
+
+                        feature_keys, rungs = successive_halving(
+                            candidates, score_fn, min_fraction=min_fraction, min_trees=min_trees,
+                            max_trees=params["ntrees"], eta=eta
+                        )
+                        multifidelity = {"candidates": candidates, "rungs": rungs}
+ 
+                # Choose model: tuned depth/learning rate, with the number of trees found by early stopping.
+                # The H2O model key is the report's model_id, so the model can be exported later (see auto_feat.export)
+                model_id = f"H2O_GBM_{uuid.uuid4().hex[:8]}_{int(time.time())}"
+                model = build_gbm(task, ntrees=params["ntrees"], max_runtime_secs=runtime_left(), model_id=model_id,
+                                  **tree_params)
  
                 # Train
-                model.train(x=feature_keys, y=target_key, training_frame=train)
+                with tracer.timer("h2o_train_s"):
+                    model.train(x=feature_keys, y=target_key, training_frame=train)
  
-                # Predictions
-                train_pred = model.predict(train).as_data_frame().values.flatten()
-                test_pred = model.predict(test).as_data_frame().values.flatten()
+                # Predictions (predicted values or labels; class probabilities are not needed)
+                with tracer.timer("h2o_predict_s"):
+                    train_pred = model.predict(train)["predict"].as_data_frame().values.flatten()
+                    test_pred = model.predict(test)["predict"].as_data_frame().values.flatten()
  
                 # Actual values
                 y_train = train[target_key].as_data_frame().values.flatten()
@@ -69,11 +242,23 @@ def create_evaluation_agent_wrap(max_retries: int = 3, task: str = "regression")
  
                 # Report dictionary
                 report = {
-                    "model_id": f"H2O_GBM_{uuid.uuid4().hex[:8]}_{int(time.time())}",
+                    "model_id": model_id,
                     "model_type": f"H2O_GBM_{task}",
                     "performance": {"train": {}, "test": {}},
                     "feature_importance": [],
+                    "features": list(feature_keys),
                 }
+                if multifidelity is not None:
+                    report["multifidelity"] = multifidelity
+                report["hyperparameters"] = {**params, "tuned": tuned}
+
+                # Model zoo: other learners on a shared matrix, to tell broadly useful features from GBM-only ones
+                zoo_data = None
+                if model_zoo:
+                    zoo_data = prepare_matrix(df, feature_keys, target_key, task)
+                    report["model_zoo"] = run_model_zoo(zoo_data, task, families=model_zoo, max_workers=zoo_workers)
+                if selected is not None:
+                    report["selection"] = selected
  
                 # Collect performance
                 perf_train = model.model_performance(train)
@@ -133,13 +318,65 @@ def create_evaluation_agent_wrap(max_retries: int = 3, task: str = "regression")
                         f"Top feature: {top_feature}."
                     )
  
+                # Uncertainty: CIs of the test metrics and of the importances; a change only counts as an
+                # improvement when the intervals of this and the previous evaluation do not overlap
+                if uncertainty:
+                    metric, lower_is_better = MAIN_METRIC[task]
+                    metric_ci = bootstrap_metric_ci(y_test, test_pred, task, n_boot=n_bootstrap)
+                    if zoo_data is None:
+                        zoo_data = prepare_matrix(df, feature_keys, target_key, task)
+                    previous = state.datalog[-1].get("uncertainty") if state.datalog else None
+                    verdict = compare_intervals(metric_ci.get(metric),
+                                                previous["test"].get(metric) if previous else None,
+                                                lower_is_better)
+                    report["uncertainty"] = {
+                        "test": metric_ci,
+                        "feature_importance": ensemble_importance_ci(
+                            zoo_data, task, n_models=n_ensemble, max_workers=zoo_workers
+                        )["feature_importance"],
+                        "vs_previous": {"metric": metric, "verdict": verdict},
+                    }
+                    if metric in metric_ci:
+                        ci = metric_ci[metric]
+                        report["narrative"] += (
+                            f" Test {metric} 95% CI [{ci['low']:.3f}, {ci['high']:.3f}]; "
+                            f"change vs previous evaluation: {verdict}."
+                        )
+
+                # Attach scores to the provenance of stored features
+                store = getattr(state, "feature_store", None)
+                if store is not None and getattr(state, "dataset_hash", None):
+                    store.record_scores(
+                        {
+                            feat["variable"]: {
+                                "model_id": report["model_id"],
+                                "iteration": getattr(state, "iterations", None),
+                                "test": report["performance"]["test"],
+                                "percentage": feat["percentage"],
+                            }
+                            for feat in report["feature_importance"]
+                        },
+                        state.dataset_hash,
+                    )
+
+                # Attach importances and the metric change to the proposals they came from
+                history = getattr(state, "proposal_history", None)
+                if history is not None:
+                    history.record_evaluation(report, state.datalog[-1] if state.datalog else None, task)
+
                 # Update state
+                if selected is not None:
+                    state.selected_features = list(feature_keys)
                 state.datalog.append(report)
                 state.eval_report = report
                 return
  
+            except DeadlineExceeded:
+                raise
+
             except Exception as e:
                 print(f"❌ Evaluation attempt {attempt+1} failed: {e}")
+                tracer.count("retries")
                 if attempt == max_retries - 1:
                     raise RuntimeError(
                         f"Evaluation failed after {max_retries} attempts. Last error: {e}"
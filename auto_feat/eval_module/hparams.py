@@ -0,0 +1,92 @@
+"""
+Tuned GBM hyperparameters, cached per dataset/target so that only the first evaluation pays for tuning.
+
+Tuning is a small grid over tree depth and learning rate. Every grid model is trained with validation-based early
+stopping, which also picks the number of trees; later iterations (and later runs, when the cache has a path)
+reuse the winner and train one model with that many trees.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import threading
+import time
+
+# Early stopping of every GBM trained against a validation frame
+EARLY_STOPPING = {"stopping_rounds": 5, "stopping_tolerance": 1e-3, "score_tree_interval": 5}
+
+# Grid searched on a cache miss
+DEFAULT_GRID: List[Dict[str, Any]] = [
+    {"max_depth": depth, "learn_rate": rate} for depth in (3, 5, 7) for rate in (0.05, 0.1)
+]
+
+
+class HyperparamCache:
+    """
+    {key: hyperparameters} kept in memory and, if `path` is given, in a JSON file shared across runs.
+
+    Args:
+        path: JSON file of the cache (None: in-memory only)
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(dataset_hash: str, target: str, task: str) -> str:
+        return f"{dataset_hash}:{target}:{task}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        return dict(entry["params"]) if entry else None
+
+    def put(self, key: str, params: Dict[str, Any], valid_loss: float) -> None:
+        with self._lock:
+            self.entries[key] = {"params": dict(params), "valid_loss": valid_loss, "tuned_at": time.time()}
+            if self.path:
+                # Atomic rewrite, as for the feature store manifest
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f, indent=2)
+                os.replace(tmp_path, self.path)
+
+
+def tune_gbm(build: Callable[..., Any],
+             score: Callable[[Any], float],
+             train_fn: Callable[[Any], None],
+             grid: List[Dict[str, Any]] = DEFAULT_GRID,
+             max_trees: int = 200,
+             max_runtime_secs: float = 0,
+             should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """
+    Trains one early-stopped model per grid point and returns the best hyperparameters.
+
+    Args:
+        build: build(ntrees, **params) -> untrained estimator
+        score: score(model) -> validation loss (lower is better)
+        train_fn: train_fn(model) trains the model with early stopping against the validation frame
+        grid: hyperparameter combinations to try
+        max_trees: tree budget of each model (early stopping usually ends training well before)
+        max_runtime_secs: H2O time cap per model (0: none)
+        should_stop: checked after each grid point; when it returns True the best point so far is returned
+
+    Returns:
+        the winning grid point plus "ntrees" (trees actually built) and "valid_loss"
+    """
+    best = None
+    for point in grid:
+        model = build(max_trees, max_runtime_secs=max_runtime_secs, **EARLY_STOPPING, **point)
+        train_fn(model)
+        loss = score(model)
+        if loss != loss:   # NaN
+            loss = float("inf")
+        if best is None or loss < best["valid_loss"]:
+            best = {**point, "ntrees": int(model.summary()["number_of_trees"][0]), "valid_loss": loss}
+        if should_stop is not None and should_stop():
+            break
+    return best
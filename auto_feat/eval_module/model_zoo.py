@@ -0,0 +1,232 @@
+"""
+Model-zoo evaluation: several scikit-learn model families trained concurrently on one shared matrix.
+
+The feature frame is encoded once (median imputation, standardization, one-hot encoding of low-cardinality text
+columns) into a NumPy train/test split that every model reads; the models run in a thread pool, so the matrix is
+shared rather than copied. Each model reports its metrics and a permutation importance per original feature, and
+the importances are combined into a consensus that shows which features help all learners and which only one.
+"""
+from typing import Any, Callable, Dict, List, Sequence
+import concurrent.futures
+import contextvars
+import time
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.deadline import DeadlineExceeded, check_deadline, result_within_deadline
+from auto_feat.instrumentation import get_tracer
+
+
+def build_estimator(family: str, task: str, n_rows: int, seed: int):
+    """Returns an untrained estimator of the given family."""
+    from sklearn import ensemble, gaussian_process, kernel_approximation, linear_model, neural_network, pipeline
+
+    regression = task == "regression"
+    if family == "gbm":
+        cls = ensemble.HistGradientBoostingRegressor if regression else ensemble.HistGradientBoostingClassifier
+        return cls(max_iter=200, early_stopping=True, random_state=seed)
+    if family == "linear":
+        if regression:
+            return linear_model.RidgeCV(alphas=np.logspace(-3, 3, 13))
+        return linear_model.LogisticRegressionCV(Cs=7, max_iter=2000)
+    if family == "random_forest":
+        cls = ensemble.RandomForestRegressor if regression else ensemble.RandomForestClassifier
+        return cls(n_estimators=200, min_samples_leaf=2, n_jobs=1, random_state=seed)
+    if family == "kernel":
+        # Exact GP on small data, a Nystroem kernel approximation with a linear head on larger data
+        if n_rows <= 2000:
+            kernel = gaussian_process.kernels.RBF() + gaussian_process.kernels.WhiteKernel()
+            if regression:
+                return gaussian_process.GaussianProcessRegressor(kernel=kernel, normalize_y=True, random_state=seed)
+            return gaussian_process.GaussianProcessClassifier(random_state=seed)
+        head = linear_model.RidgeCV(alphas=np.logspace(-3, 3, 13)) if regression else \
+            linear_model.LogisticRegression(max_iter=2000)
+        return pipeline.make_pipeline(kernel_approximation.Nystroem(n_components=300, random_state=seed), head)
+    if family == "mlp":
+        cls = neural_network.MLPRegressor if regression else neural_network.MLPClassifier
+        return cls(hidden_layer_sizes=(64, 32), early_stopping=True, max_iter=500, random_state=seed)
+    raise ValueError(f"Unknown model family: {family!r}")
+
+
+MODEL_FAMILIES = ("gbm", "linear", "random_forest", "kernel", "mlp")
+
+
+def prepare_matrix(df: pd.DataFrame,
+                   feature_keys: Sequence[str],
+                   target: str,
+                   task: str = "regression",
+                   test_size: float = 0.2,
+                   max_categories: int = 20,
+                   seed: int = 42) -> Dict[str, Any]:
+    """
+    Encodes the features once into a float matrix and splits it into train/test rows.
+
+    Numeric columns are imputed with the training median and standardized with training statistics; text columns
+    with at most `max_categories` distinct values are one-hot encoded (others are dropped). Rows without a target
+    are removed.
+
+    Returns:
+        {"X_train", "X_test", "y_train", "y_test", "columns", "groups", "classes"} where `groups` maps each
+        original feature to its column indices in the matrix
+    """
+    data = df[df[target].notna()]
+    rng = np.random.default_rng(seed)
+    is_test = np.zeros(len(data), dtype=bool)
+    is_test[rng.choice(len(data), size=max(1, int(round(test_size * len(data)))), replace=False)] = True
+
+    blocks, columns, groups = [], [], {}
+    for feat in feature_keys:
+        values = data[feat]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            x = values.to_numpy(dtype=float)
+            x[~np.isfinite(x)] = np.nan
+            train_x = x[~is_test]
+            if np.all(np.isnan(train_x)):
+                continue
+            median = np.nanmedian(train_x)
+            x = np.where(np.isnan(x), median, x)
+            std = x[~is_test].std()
+            block = ((x - x[~is_test].mean()) / (std if std > 0 else 1.0))[:, None]
+            names = [feat]
+        else:
+            values = values.astype("string")
+            categories = values[~is_test].dropna().unique()
+            if len(categories) == 0 or len(categories) > max_categories:
+                continue
+            block = np.stack([(values == c).fillna(False).to_numpy(dtype=float) for c in categories], axis=1)
+            names = [f"{feat}={c}" for c in categories]
+        groups[feat] = list(range(len(columns), len(columns) + len(names)))
+        blocks.append(block)
+        columns.extend(names)
+
+    X = np.hstack(blocks) if blocks else np.empty((len(data), 0))
+    y = data[target].to_numpy()
+    classes = None
+    if task != "regression":
+        classes, y = np.unique(y.astype(str), return_inverse=True)
+    else:
+        y = y.astype(float)
+    return {
+        "X_train": np.ascontiguousarray(X[~is_test]), "X_test": np.ascontiguousarray(X[is_test]),
+        "y_train": y[~is_test], "y_test": y[is_test],
+        "columns": columns, "groups": groups, "classes": classes,
+    }
+
+
+def score(task: str, y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    """Test metrics in the naming of the H2O report."""
+    if task == "regression":
+        mse = float(np.mean((y_true - y_pred) ** 2))
+        var = float(np.var(y_true))
+        return {"MSE": mse, "RMSE": mse ** 0.5, "R2": 1 - mse / var if var > 0 else float("nan"),
+                "N Obs": int(len(y_true))}
+    return {"Accuracy": float(np.mean(y_true == y_pred)), "N Obs": int(len(y_true))}
+
+
+def grouped_permutation_importance(predict: Callable[[np.ndarray], np.ndarray],
+                                   X: np.ndarray,
+                                   y: np.ndarray,
+                                   groups: Dict[str, List[int]],
+                                   task: str,
+                                   n_repeats: int = 3,
+                                   seed: int = 42) -> Dict[str, float]:
+    """
+    Drop in test performance when all matrix columns of an original feature are shuffled together (so a one-hot
+    encoded feature is permuted as one variable). Loss is MSE for regression and error rate for classification.
+    """
+    def loss(pred):
+        return float(np.mean((y - pred) ** 2)) if task == "regression" else float(np.mean(y != pred))
+
+    rng = np.random.default_rng(seed)
+    base = loss(predict(X))
+    shuffled = X.copy()   # one scratch copy; only the permuted columns are rewritten and then restored
+    importance = {}
+    for feat, cols in groups.items():
+        drops = []
+        for _ in range(n_repeats):
+            shuffled[:, cols] = X[rng.permutation(len(X))][:, cols]
+            drops.append(loss(predict(shuffled)) - base)
+        shuffled[:, cols] = X[:, cols]
+        importance[feat] = float(np.mean(drops))
+    return importance
+
+
+def consensus_importance(importances: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+    """
+    Combines per-model importances into one ranking.
+
+    Each model's importances are clipped at zero and normalized to shares; a feature "supports" a model when its
+    share is above the uniform share 1/n_features. Features that help a single learner only are flagged.
+
+    Returns:
+        [{"variable", "mean_share", "min_share", "max_share", "models_supporting", "single_learner"}] sorted by
+        mean share
+    """
+    if not importances:
+        return []
+    features = sorted({f for imp in importances.values() for f in imp})
+    shares = np.zeros((len(importances), len(features)))
+    for i, imp in enumerate(importances.values()):
+        row = np.clip([imp.get(f, 0.0) for f in features], 0.0, None)
+        shares[i] = row / row.sum() if row.sum() > 0 else 0.0
+    supporting = shares > 1.0 / len(features)
+    models = list(importances)
+    consensus = []
+    for j, feat in enumerate(features):
+        support = [models[i] for i in np.flatnonzero(supporting[:, j])]
+        consensus.append({
+            "variable": feat,
+            "mean_share": float(shares[:, j].mean()),
+            "min_share": float(shares[:, j].min()),
+            "max_share": float(shares[:, j].max()),
+            "models_supporting": support,
+            "single_learner": len(support) == 1 and len(models) > 1,
+        })
+    return sorted(consensus, key=lambda row: -row["mean_share"])
+
+
+def run_model_zoo(data: Dict[str, Any],
+                  task: str = "regression",
+                  families: Sequence[str] = MODEL_FAMILIES,
+                  max_workers: int = 4,
+                  seed: int = 42) -> Dict[str, Any]:
+    """
+    Trains the model families concurrently on the shared matrix from `prepare_matrix`. Inside a node with a
+    deadline, no fit starts after it and the results are not waited for past it (DeadlineExceeded).
+
+    Returns:
+        {"models": {family: {"test", "train_s", "importance"} or {"error"}}, "consensus_importance": [...]}
+    """
+    def fit(family):
+        check_deadline(f"fitting the {family} model")
+        start = time.perf_counter()
+        model = build_estimator(family, task, len(data["X_train"]), seed)
+        model.fit(data["X_train"], data["y_train"])
+        train_s = time.perf_counter() - start
+        get_tracer().count("zoo_train_s", train_s)
+        pred = model.predict(data["X_test"])
+        return {
+            "test": score(task, data["y_test"], pred),
+            "train_s": train_s,
+            "importance": grouped_permutation_importance(
+                model.predict, data["X_test"], data["y_test"], data["groups"], task, seed=seed
+            ),
+        }
+
+    results: Dict[str, Any] = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {family: executor.submit(contextvars.copy_context().run, fit, family) for family in families}
+        for family, future in futures.items():
+            try:
+                results[family] = result_within_deadline(future, f"the {family} model")
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                results[family] = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    importances = {f: r["importance"] for f, r in results.items() if "importance" in r}
+    return {"models": results, "consensus_importance": consensus_importance(importances)}
@@ -0,0 +1,73 @@
+"""
+Successive-halving schedule for multi-fidelity evaluation of candidate feature sets.
+"""
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import math
+
+
+def rung_budgets(min_fraction: float = 0.1,
+                 min_trees: int = 20,
+                 max_trees: int = 200,
+                 eta: int = 3) -> List[Tuple[float, int]]:
+    """
+    Returns the (row fraction, number of trees) budget of each rung. Budgets grow by a factor `eta` per rung, as in
+    Hyperband, until the full budget (all rows, `max_trees`) is reached; the last rung is always the full budget.
+    """
+    n_rungs = 1 + max(
+        math.ceil(math.log(1.0 / min_fraction, eta) - 1e-9) if min_fraction < 1 else 0,
+        math.ceil(math.log(max_trees / min_trees, eta) - 1e-9) if min_trees < max_trees else 0,
+    )
+    budgets = []
+    for r in range(n_rungs):
+        scale = eta ** r
+        budgets.append((min(1.0, min_fraction * scale), min(max_trees, int(min_trees * scale))))
+    budgets[-1] = (1.0, max_trees)
+    return budgets
+
+
+def successive_halving(candidates: Sequence[Any],
+                       score_fn: Callable[[Any, float, int], float],
+                       min_fraction: float = 0.1,
+                       min_trees: int = 20,
+                       max_trees: int = 200,
+                       eta: int = 3) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Scores candidates on cheap budgets and promotes only the best 1/eta of them to the next, larger budget.
+
+    The full-budget rung is not run here: the single survivor is returned so that the caller can do the full fit
+    (and report it) itself.
+
+    Args:
+        candidates: candidate feature sets
+        score_fn: score_fn(candidate, row_fraction, ntrees) -> loss (lower is better)
+        min_fraction, min_trees: budget of the first rung
+        max_trees: full-budget number of trees
+        eta: reduction factor between rungs
+
+    Returns:
+        (winning candidate, rung history) where each rung is {"fraction", "ntrees", "scores", "promoted"} with
+        scores and promoted candidates given by their index in `candidates`
+    """
+    alive = list(range(len(candidates)))
+    history = []
+    for fraction, ntrees in rung_budgets(min_fraction, min_trees, max_trees, eta)[:-1]:
+        if len(alive) <= 1:
+            break
+        scores = {i: score_fn(candidates[i], fraction, ntrees) for i in alive}
+        ranked = sorted(alive, key=lambda i: (math.isnan(scores[i]), scores[i]))
+        alive = ranked[:max(1, len(alive) // eta)]
+        history.append({"fraction": fraction, "ntrees": ntrees, "scores": scores, "promoted": list(alive)})
+    return candidates[alive[0]], history
+
+
+def candidate_feature_sets(feature_keys: Sequence[str], new_features: Sequence[str]) -> List[List[str]]:
+    """
+    Returns the candidate feature sets of one evaluation: the full set, plus the full set without each newly
+    proposed feature (leave-one-out), so that harmful or useless new features can be dropped.
+    """
+    candidates = [list(feature_keys)]
+    if len(feature_keys) > 1:
+        for feat in new_features:
+            if feat in feature_keys:
+                candidates.append([k for k in feature_keys if k != feat])
+    return candidates
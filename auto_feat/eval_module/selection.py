@@ -0,0 +1,88 @@
+"""
+Greedy forward/backward feature selection over the cumulative feature pool.
+
+Starting from the best subset found so far, each forward step scores every single-feature addition in parallel
+and keeps the best one if it improves the validation loss; each backward step does the same for single-feature
+removals. Steps alternate until neither improves (sequential floating selection), so features from earlier
+iterations stay available and a new feature only enters the model if it actually helps.
+"""
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+import concurrent.futures
+import contextvars
+import math
+
+
+def _best(scores: Dict[str, float]) -> Tuple[Optional[str], float]:
+    """Returns the (feature, loss) with the lowest finite loss, or (None, inf)."""
+    finite = {k: v for k, v in scores.items() if not math.isnan(v)}
+    if not finite:
+        return None, math.inf
+    feat = min(finite, key=finite.get)
+    return feat, finite[feat]
+
+
+def greedy_selection(pool: Sequence[str],
+                     score_fn: Callable[[List[str]], float],
+                     initial: Optional[Sequence[str]] = None,
+                     max_workers: int = 4,
+                     max_steps: int = 20,
+                     tol: float = 0.0,
+                     should_stop: Optional[Callable[[], bool]] = None) -> Tuple[List[str], float, List[Dict[str, Any]]]:
+    """
+    Runs floating greedy selection.
+
+    Args:
+        pool: every feature that may be selected
+        score_fn: score_fn(features) -> validation loss (lower is better)
+        initial: starting subset (defaults to the whole pool); features no longer in the pool are dropped
+        max_workers: candidate subsets scored concurrently
+        max_steps: maximum number of accepted additions/removals
+        tol: minimum loss improvement for a step to be accepted
+        should_stop: checked before each step; when it returns True the best subset so far is returned
+
+    Returns:
+        (selected features in pool order, their loss, steps) where each step is
+        {"action": "add"/"remove", "feature", "loss", "candidates"}
+    """
+    pool = list(dict.fromkeys(pool))
+    selected = [f for f in (initial if initial is not None else pool) if f in pool] or list(pool)
+    cache: Dict[FrozenSet[str], float] = {}
+
+    def score_all(subsets: Dict[str, List[str]]) -> Dict[str, float]:
+        todo = {k: s for k, s in subsets.items() if frozenset(s) not in cache}
+        if todo:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Each task runs in a copy of the caller's context so instrumentation keeps reporting
+                futures = {k: executor.submit(contextvars.copy_context().run, score_fn, s) for k, s in todo.items()}
+                for k, future in futures.items():
+                    cache[frozenset(todo[k])] = future.result()
+        return {k: cache[frozenset(s)] for k, s in subsets.items()}
+
+    ordered = lambda feats: [f for f in pool if f in feats]
+    current = score_all({"": selected})[""]
+    if math.isnan(current):
+        current = math.inf
+    steps: List[Dict[str, Any]] = []
+
+    while len(steps) < max_steps:
+        improved = False
+        for action in ("add", "remove"):
+            if should_stop is not None and should_stop():
+                break
+            if action == "add":
+                subsets = {f: ordered(selected + [f]) for f in pool if f not in selected}
+            else:
+                subsets = {f: [g for g in selected if g != f] for f in selected} if len(selected) > 1 else {}
+            if not subsets:
+                continue
+            feat, loss = _best(score_all(subsets))
+            if feat is not None and loss < current - tol:
+                selected, current = subsets[feat], loss
+                steps.append({"action": action, "feature": feat, "loss": loss, "candidates": len(subsets)})
+                improved = True
+                if len(steps) >= max_steps:
+                    break
+        if not improved:
+            break
+
+    return ordered(selected), current, steps
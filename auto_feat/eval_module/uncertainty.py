@@ -0,0 +1,160 @@
+"""
+Bootstrap uncertainty of evaluation results.
+
+Metric confidence intervals come from resampling the test predictions: all bootstrap replicates are drawn as one
+index matrix and their metrics computed with vectorized NumPy (in blocks, to bound memory). Feature-importance
+intervals come from an ensemble of models fitted in parallel on bootstrap resamples of the training rows of the
+shared matrix (see `model_zoo.prepare_matrix`). Comparisons between iterations only call a change an improvement
+when the confidence intervals do not overlap.
+"""
+from typing import Any, Dict, List, Optional
+import concurrent.futures
+import contextvars
+
+import numpy as np
+
+from auto_feat.deadline import check_deadline, result_within_deadline
+from auto_feat.eval_module.model_zoo import build_estimator, grouped_permutation_importance
+
+# Main metric of each task and whether lower is better
+MAIN_METRIC = {"regression": ("RMSE", True), "classification": ("Accuracy", False)}
+
+
+def best_report(datalog: List[Dict[str, Any]], task: str) -> Optional[Dict[str, Any]]:
+    """
+    Report with the best test value of the task's main metric, or None if no report has one.
+
+    When both reports carry confidence intervals of the metric (uncertainty mode), a later report only replaces the
+    best one if its interval does not overlap (see `compare_intervals`); otherwise the point values decide.
+    """
+    metric, lower_is_better = MAIN_METRIC[task]
+    best = None
+    for report in datalog:
+        value = report["performance"]["test"].get(metric)
+        if value is None:
+            continue
+        if best is None:
+            best = report
+            continue
+        current_ci = (report.get("uncertainty") or {}).get("test", {}).get(metric)
+        best_ci = (best.get("uncertainty") or {}).get("test", {}).get(metric)
+        if current_ci and best_ci:
+            better = compare_intervals(current_ci, best_ci, lower_is_better) == "improved"
+        else:
+            best_value = best["performance"]["test"][metric]
+            better = value < best_value if lower_is_better else value > best_value
+        if better:
+            best = report
+    return best
+
+
+def _interval(samples: np.ndarray, alpha: float) -> Dict[str, float]:
+    low, high = np.nanpercentile(samples, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=-1)
+    return {"mean": float(np.nanmean(samples)), "low": float(low), "high": float(high)}
+
+
+def bootstrap_metric_ci(y_true: np.ndarray,
+                        y_pred: np.ndarray,
+                        task: str = "regression",
+                        n_boot: int = 1000,
+                        alpha: float = 0.05,
+                        seed: int = 42,
+                        max_cells: int = 5_000_000) -> Dict[str, Dict[str, float]]:
+    """
+    Percentile bootstrap confidence intervals of the test metrics.
+
+    Args:
+        y_true, y_pred: test targets and predictions (rows with a missing target are ignored)
+        task: "regression" (MSE, RMSE, R2) or "classification" (Accuracy)
+        n_boot: bootstrap replicates
+        alpha: 1 - confidence level
+        seed: seed of the resampling
+        max_cells: replicates are processed in blocks of at most this many resampled values
+
+    Returns:
+        {metric: {"mean", "low", "high"}}
+    """
+    y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+    if task == "regression":
+        y_true, y_pred = y_true.astype(float), y_pred.astype(float)
+        keep = np.isfinite(y_true) & np.isfinite(y_pred)
+    else:
+        y_true, y_pred = y_true.astype(str), y_pred.astype(str)
+        keep = y_true != "nan"
+    y_true, y_pred = y_true[keep], y_pred[keep]
+    n = len(y_true)
+    if n == 0:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    metrics: Dict[str, List[np.ndarray]] = {}
+    block = max(1, max_cells // n)
+    for start in range(0, n_boot, block):
+        idx = rng.integers(0, n, size=(min(block, n_boot - start), n))
+        y, p = y_true[idx], y_pred[idx]
+        if task == "regression":
+            sse = np.sum((y - p) ** 2, axis=1)
+            sst = np.sum((y - y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+            metrics.setdefault("MSE", []).append(sse / n)
+            metrics.setdefault("RMSE", []).append(np.sqrt(sse / n))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                metrics.setdefault("R2", []).append(np.where(sst > 0, 1 - sse / sst, np.nan))
+        else:
+            metrics.setdefault("Accuracy", []).append(np.mean(y == p, axis=1))
+    return {name: _interval(np.concatenate(blocks), alpha) for name, blocks in metrics.items()}
+
+
+def ensemble_importance_ci(data: Dict[str, Any],
+                           task: str = "regression",
+                           n_models: int = 20,
+                           max_workers: int = 4,
+                           alpha: float = 0.05,
+                           seed: int = 42) -> Dict[str, Any]:
+    """
+    Fits `n_models` gradient-boosting models on bootstrap resamples of the training rows, in parallel, and returns
+    the interval of each feature's permutation importance across them. Inside a node with a deadline, no fit
+    starts after it and the ensemble is not waited for past it (DeadlineExceeded).
+
+    Args:
+        data: shared matrix from `model_zoo.prepare_matrix`
+
+    Returns:
+        {"feature_importance": [{"variable", "mean", "low", "high"}] sorted by mean, "n_models"}
+    """
+    n_train = len(data["X_train"])
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(0, n_train, size=(n_models, n_train))
+
+    def fit(b):
+        check_deadline("fitting a bootstrap model")
+        model = build_estimator("gbm", task, n_train, seed + b)
+        model.fit(data["X_train"][samples[b]], data["y_train"][samples[b]])
+        return grouped_permutation_importance(model.predict, data["X_test"], data["y_test"], data["groups"], task,
+                                              n_repeats=1, seed=seed + b)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(contextvars.copy_context().run, fit, b) for b in range(n_models)]
+        importances = [result_within_deadline(future, "the bootstrap ensemble") for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    features = list(data["groups"])
+    matrix = np.array([[imp[f] for f in features] for imp in importances]).T   # features x models
+    rows = [{"variable": f, **_interval(matrix[i], alpha)} for i, f in enumerate(features)]
+    return {"feature_importance": sorted(rows, key=lambda r: -r["mean"]), "n_models": n_models}
+
+
+def compare_intervals(current: Optional[Dict[str, float]],
+                      previous: Optional[Dict[str, float]],
+                      lower_is_better: bool) -> str:
+    """
+    Returns "improved", "worse" or "inconclusive" (overlapping intervals, or nothing to compare with).
+    """
+    if not current or not previous:
+        return "inconclusive"
+    if current["high"] < previous["low"]:
+        return "improved" if lower_is_better else "worse"
+    if current["low"] > previous["high"]:
+        return "worse" if lower_is_better else "improved"
+    return "inconclusive"
@@ -0,0 +1,427 @@
+"""
+Exportable inference artifact of a pipeline run: fused feature transform plus a scorer.
+
+`export_artifact` writes a directory that scores new data without the LLM or an H2O cluster:
+  - transform.py: one standalone module (numpy and pandas only) whose `transform(df)` replays the run's clean-up
+    (`clean.apply_clean`, as for streamed shards: placeholder strings to NaN, the columns coerced to numbers) and
+    then all accepted feature code, fused in order, with the primitives it calls. Global statistics of the code
+    (means, stds, ... over all rows) are frozen at their training values (see `streaming.collect_aggregates`), so
+    the transform is row-wise and gives the same features on any chunk of new data as it did on the training data.
+  - the model of the best evaluation: the H2O GBM as a MOJO (scored by the MOJO runtime `h2o-genmodel.jar`,
+    which needs Java but no cluster), or a pickled scikit-learn pipeline trained in-process on the same features.
+  - manifest.json: target, task, model features and the evaluation the model comes from.
+
+`score_file` (also `python -m auto_feat.export ARTIFACT_DIR INPUT OUTPUT`) streams a CSV/Parquet file through the
+transform and the model chunk by chunk.
+
+Example:
+    python -m auto_feat.export artifacts/run1 new_alloys.csv predictions.csv --chunksize 50000
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import re
+import textwrap
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.eval_module.model_zoo import build_estimator
+from auto_feat.eval_module.uncertainty import best_report
+from auto_feat.featurization_module import primitives
+from auto_feat.featurization_module.streaming import (
+    AGG_HOOK, StreamingUnsupportedError, collect_aggregates, iter_chunks,
+)
+from auto_feat.first_pass.data_clean import clean
+
+TRANSFORM_FILE = "transform.py"
+MANIFEST_FILE = "manifest.json"
+SKLEARN_FILE = "model.pkl"
+MODEL_FORMATS = ("auto", "mojo", "sklearn")
+
+
+def _float_literal(value: Any) -> str:
+    value = float(value)
+    if np.isnan(value):
+        return "float('nan')"
+    if np.isinf(value):
+        return "float('inf')" if value > 0 else "-float('inf')"
+    return repr(value)
+
+
+def _literal(value: Any) -> str:
+    """Python source of an aggregate value (a number, or a Series of numbers for frame-wide aggregates)."""
+    if isinstance(value, pd.Series):
+        items = ", ".join(f"{k!r}: {_float_literal(v)}" for k, v in value.items())
+        return f"pd.Series({{{items}}})"
+    return _float_literal(value)
+
+
+def _clean_source(coerced_columns: Sequence[str]) -> str:
+    """Source of the clean-up replay: `clean.apply_clean` and its helpers, with the columns coerced to numbers."""
+    return "\n".join([
+        "# ==== Clean-up (as in the run's DataClean node) ====",
+        f"PLACEHOLDERS = {clean.PLACEHOLDERS!r}",
+        f"NUMBER_PATTERN = {clean.NUMBER_PATTERN!r}",
+        f"COERCED_COLUMNS = {list(coerced_columns)!r}",
+        "",
+        "",
+        inspect.getsource(clean.normalize_missing),
+        "",
+        inspect.getsource(clean.parse_numbers),
+        "",
+        inspect.getsource(clean.apply_clean),
+        "",
+        "def clean(df):",
+        '    """Placeholder strings and infinities to NaN, numbers written as text to floats."""',
+        "    return apply_clean(df, COERCED_COLUMNS)",
+    ])
+
+
+def _function_source(fn: Callable) -> str:
+    """Source of a module-level function without its decorators."""
+    lines = inspect.getsource(fn).splitlines()
+    while lines[0].startswith("@"):
+        lines.pop(0)
+    return "\n".join(lines) + "\n"
+
+
+def _primitives_source(code: str) -> str:
+    """Source of the primitives the feature code calls (and of those they call), bound to `prim`."""
+    used = set(re.findall(rf"\b{primitives.PRIM_NAME}\.(\w+)", code)) & set(primitives.PRIMITIVES)
+    pending = list(used)
+    while pending:
+        body = _function_source(primitives.PRIMITIVES[pending.pop()])
+        for name in primitives.PRIMITIVES:
+            if name not in used and re.search(rf"\b{name}\(", body):
+                used.add(name)
+                pending.append(name)
+    if not used:
+        return ""
+    names = [name for name in primitives.PRIMITIVES if name in used]
+    bodies = [_function_source(primitives.PRIMITIVES[name]) for name in names]
+    parts = ["# ==== Feature primitives ===="]
+    if any("GROUP_AGGREGATES" in body for body in bodies):
+        parts.append(f"GROUP_AGGREGATES = {primitives.GROUP_AGGREGATES!r}")
+    parts += ["", "", inspect.getsource(primitives._numeric)]
+    for body in bodies:
+        parts += ["", body]
+    parts += ["", f"{primitives.PRIM_NAME} = SimpleNamespace({', '.join(f'{n}={n}' for n in names)})", ""]
+    return "\n".join(parts)
+
+
+def fuse_feature_code(code_blocks: Sequence[str],
+                      chunks: Callable[[], Iterable[pd.DataFrame]],
+                      coerced_columns: Sequence[str] = (),
+                      target: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Compiles all accepted feature code into one standalone transform module.
+
+    Args:
+        code_blocks: accepted feature code, in the order it was applied
+        chunks: returns a fresh iterator over the raw training data (the global statistics are computed over it,
+            after the same clean-up as during the run)
+        coerced_columns: columns DataClean converted from text to numbers
+        target: target column; training rows without it are left out of the global statistics, as in the run
+
+    Returns:
+        (module source, {"row_wise", "aggregates"}); `row_wise` is False when the code uses statistics that cannot
+        be frozen (median, groupby, prim.group_agg, ...), in which case the transform must see all rows at once
+    """
+    header = '\n'.join([
+        '"""',
+        "Feature transform exported by auto_feat.export (generated, do not edit).",
+        "",
+        "transform(df) cleans a raw frame like the pipeline's DataClean node and adds the engineered features.",
+        '"""',
+        "from types import SimpleNamespace",
+        "from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union",
+        "import warnings",
+        "",
+        "import numpy as np",
+        "import pandas as pd",
+        "",
+        "warnings.filterwarnings('ignore')",
+        "",
+    ])
+    clean_part = _clean_source(coerced_columns)
+
+    # Statistics over the training rows, cleaned exactly as during the run (see `streaming.stream_features`)
+    def training_chunks():
+        return (clean.apply_clean(chunk, coerced_columns, target) for chunk in chunks())
+
+    try:
+        code, aggregates = collect_aggregates(list(code_blocks), training_chunks)
+        row_wise = True
+    except StreamingUnsupportedError as e:
+        print(f"⚠️ Global statistics cannot be frozen ({e}); the exported transform needs all rows at once")
+        code, aggregates, row_wise = "\n".join(code_blocks), [], False
+
+    parts = [header, clean_part, ""]
+    prim_part = _primitives_source(code)
+    if prim_part:
+        parts += ["", prim_part]
+    parts += [
+        "",
+        "# ==== Global statistics of the training data ====",
+        f"ROW_WISE = {row_wise!r}",
+        "AGGREGATES = [",
+        *[f"    {_literal(agg['value'])},   # {agg['source']}" for agg in aggregates],
+        "]",
+        "",
+        "",
+        f"def {AGG_HOOK}(index, values):",
+        "    return AGGREGATES[index]",
+        "",
+        "",
+        "def transform(df):",
+        '    """Returns the cleaned frame with the engineered features added."""',
+        "    df = clean(df)",
+        textwrap.indent(code, "    ") if code.strip() else "",
+        "    return df",
+        "",
+    ]
+    return "\n".join(parts), {"row_wise": row_wise, "aggregates": len(aggregates)}
+
+
+def model_input(df: pd.DataFrame, features: Sequence[str], text_features: Sequence[str],
+                missing_text: Optional[str] = "") -> pd.DataFrame:
+    """Model features of a transformed frame: text features as strings (missing: `missing_text`), others as floats."""
+    out = {}
+    for feat in features:
+        values = df[feat] if feat in df.columns else pd.Series(np.nan, index=df.index)
+        if feat in text_features:
+            values = values.astype("string").astype(object)
+            out[feat] = values.where(values.notna(), missing_text)
+        else:
+            out[feat] = pd.to_numeric(values, errors="coerce").astype(float)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _text_features(df: pd.DataFrame, features: Sequence[str]) -> List[str]:
+    return [f for f in features
+            if not pd.api.types.is_numeric_dtype(df[f]) or pd.api.types.is_bool_dtype(df[f])]
+
+
+def _export_mojo(model_id: str, out_dir: str) -> Dict[str, Any]:
+    import h2o
+
+    model = h2o.get_model(model_id)
+    path = model.download_mojo(path=out_dir, get_genmodel_jar=True)
+    return {"format": "mojo", "file": os.path.basename(path), "genmodel_jar": "h2o-genmodel.jar", "model_id": model_id}
+
+
+def _export_sklearn(df: pd.DataFrame, features: Sequence[str], text_features: Sequence[str], target: str,
+                    task: str, out_dir: str, seed: int = 42) -> Dict[str, Any]:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    data = df[df[target].notna()]
+    encoder = ColumnTransformer(
+        [("text", OneHotEncoder(handle_unknown="ignore", max_categories=20, sparse_output=False),
+          list(text_features))],
+        remainder="passthrough",
+    )
+    pipeline = make_pipeline(encoder, build_estimator("gbm", task, len(data), seed))
+    y = data[target].astype(float) if task == "regression" else data[target].astype(str)
+    pipeline.fit(model_input(data, features, text_features), y)
+    with open(os.path.join(out_dir, SKLEARN_FILE), "wb") as f:
+        pickle.dump(pipeline, f)
+    return {"format": "sklearn", "file": SKLEARN_FILE, "estimator": type(pipeline[-1]).__name__}
+
+
+def export_artifact(state: object, out_dir: str, task: str = "regression", model: str = "auto") -> Dict[str, Any]:
+    """
+    Writes the transform module, the model of the best evaluation and the manifest of a finished run.
+
+    Args:
+        state: AutoFeaturizer state after the run
+        out_dir: artifact directory (created if needed)
+        task: "regression" or "classification"
+        model: "mojo" (the evaluated H2O model; needs the run's H2O cluster to still be up), "sklearn" (a
+            scikit-learn gradient boosting pipeline trained in-process on the same features; on the in-memory
+            sample in streaming mode) or "auto" (MOJO when the H2O model is reachable, else sklearn)
+
+    Returns:
+        the manifest
+    """
+    if model not in MODEL_FORMATS:
+        raise ValueError(f"model must be one of {MODEL_FORMATS}, got {model!r}")
+    report = best_report(state.datalog, task)
+    if report is None:
+        raise ValueError("The run has no evaluation to export")
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Global statistics come from the same rows the features were computed on during the run: the cleaned source
+    # in streaming mode (as in the shards), the cleaned frame otherwise
+    def chunks():
+        if getattr(state, "streaming", False):
+            return iter_chunks(state.data_path, state.chunksize)
+        base = state.clean_augmented_data
+        return [base[[c for c in base.columns if c in state.data.columns]].copy()]
+
+    coerced = list(((getattr(state, "clean_report", None) or {}).get("coerced_to_numeric") or {}))
+    source, info = fuse_feature_code(state.accepted_code, chunks, coerced, target=state.target)
+    with open(os.path.join(out_dir, TRANSFORM_FILE), "w", encoding="utf-8") as f:
+        f.write(source)
+
+    features = list(report["features"])
+    df = state.clean_augmented_data
+    text_features = _text_features(df, features)
+    model_info = None
+    if model in ("auto", "mojo"):
+        try:
+            model_info = _export_mojo(report["model_id"], out_dir)
+        except Exception as e:
+            if model == "mojo":
+                raise
+            print(f"⚠️ H2O model {report['model_id']} not available ({e}); exporting a scikit-learn model")
+    if model_info is None:
+        model_info = _export_sklearn(df, features, text_features, state.target, task, out_dir)
+
+    manifest = {
+        "target": state.target,
+        "task": task,
+        "features": features,
+        "text_features": text_features,
+        "transform": TRANSFORM_FILE,
+        "row_wise": info["row_wise"],
+        "aggregates": info["aggregates"],
+        "code_blocks": len(state.accepted_code),
+        "model": model_info,
+        "evaluation": {"model_id": report["model_id"], "test": report["performance"]["test"]},
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    print(f"📦 Exported transform ({len(state.accepted_code)} code blocks) and {model_info['format']} model "
+          f"to {out_dir}")
+    return manifest
+
+
+def export_node(out_dir: str, task: str = "regression", model: str = "auto"):
+    """
+    Graph node exporting the artifact at the end of a run (see `export_artifact`). A run without any evaluation
+    (e.g. cancelled by its deadline before the first one) ends without an artifact.
+    """
+    def exporter(state):
+        """
+        state will be updated with:
+          - state.export_manifest: manifest of the written artifact (None when there was nothing to export)
+        """
+        if best_report(state.datalog, task) is None:
+            print("⚠️ No evaluation to export: skipping the export")
+            return
+        state.export_manifest = export_artifact(state, out_dir, task=task, model=model)
+
+    return exporter
+
+
+class ScoringArtifact:
+    """
+    An exported artifact loaded for scoring.
+
+    Args:
+        path: artifact directory written by `export_artifact`
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        spec = importlib.util.spec_from_file_location("autofeat_transform", os.path.join(path, TRANSFORM_FILE))
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        self.model = None
+        if self.manifest["model"]["format"] == "sklearn":
+            with open(os.path.join(path, self.manifest["model"]["file"]), "rb") as f:
+                self.model = pickle.load(f)
+
+    @property
+    def row_wise(self) -> bool:
+        return self.manifest["row_wise"]
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.module.transform(df)
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Predictions for a raw frame: "predict" plus one probability column per class for classification."""
+        info = self.manifest["model"]
+        # H2O saw missing text as NA, the scikit-learn encoder as ""
+        X = model_input(self.transform(df), self.manifest["features"], self.manifest["text_features"],
+                        missing_text=None if info["format"] == "mojo" else "")
+        if info["format"] == "mojo":
+            import h2o
+
+            out = h2o.mojo_predict_pandas(X.reset_index(drop=True), os.path.join(self.path, info["file"]),
+                                          genmodel_jar_path=os.path.join(self.path, info["genmodel_jar"]))
+            out.index = df.index
+            return out
+        out = pd.DataFrame({"predict": self.model.predict(X)}, index=df.index)
+        if self.manifest["task"] != "regression":
+            proba = self.model.predict_proba(X)
+            for j, label in enumerate(self.model.classes_):
+                out[str(label)] = proba[:, j]
+        return out
+
+
+def score_file(artifact_dir: str, input_path: str, output_path: str, chunksize: int = 100_000) -> Dict[str, Any]:
+    """
+    Scores a CSV/Parquet file chunk by chunk and writes its rows with the prediction columns appended.
+
+    Args:
+        artifact_dir: directory written by `export_artifact`
+        input_path: raw data (same columns as the training data, the target may be missing)
+        output_path: .csv or .parquet output
+        chunksize: rows per chunk (ignored, with a warning, when the transform is not row-wise)
+
+    Returns:
+        {"rows", "chunks"}
+    """
+    artifact = ScoringArtifact(artifact_dir)
+    chunks = iter_chunks(input_path, chunksize)
+    if not artifact.row_wise:
+        print("⚠️ The transform uses statistics over all rows: scoring the input in one chunk")
+        chunks = [pd.concat(list(chunks), ignore_index=True)]
+    parquet = output_path.endswith((".parquet", ".pq"))
+    writer = None
+    rows = n_chunks = 0
+    try:
+        for chunk in chunks:
+            scored = pd.concat([chunk, artifact.predict(chunk)], axis=1)
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                scored.to_csv(output_path, mode="w" if n_chunks == 0 else "a", header=n_chunks == 0, index=False)
+            rows += len(chunk)
+            n_chunks += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    return {"rows": rows, "chunks": n_chunks}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file with an exported AutoFeaturizer artifact.")
+    parser.add_argument("artifact", help="artifact directory written by export_artifact")
+    parser.add_argument("input", help="CSV or Parquet file to score")
+    parser.add_argument("output", help="output file (.csv or .parquet)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk")
+    args = parser.parse_args()
+
+    stats = score_file(args.artifact, args.input, args.output, args.chunksize)
+    print(f"🧮 Scored {stats['rows']} rows in {stats['chunks']} chunks → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
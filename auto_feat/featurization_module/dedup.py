@@ -0,0 +1,148 @@
+"""
+Numeric deduplication of newly generated features.
+
+Proposals often reproduce an existing column, or a linear rescaling of one (unit conversions, sums with a constant,
+...). Such features add nothing for the model but still cost a generation and a GBM fit, so they are dropped after
+generation: exact copies are found by hashing column values, near-copies by the correlation of each new feature
+with every current column, computed in one vectorized pass over a row sample.
+"""
+from typing import Dict, List, Optional
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+def column_hash(values: pd.Series) -> str:
+    """Content hash of a column's values (index and name excluded)."""
+    return hashlib.sha256(pd.util.hash_pandas_object(values, index=False).values.tobytes()).hexdigest()
+
+
+def correlation_sketch(new: np.ndarray, existing: np.ndarray, min_overlap: int = 10) -> np.ndarray:
+    """
+    Pairwise-complete Pearson correlations between the columns of `new` (n x k) and `existing` (n x m), ignoring
+    NaNs, computed with a handful of matrix products instead of one pass per pair.
+
+    Returns:
+        (k x m) array of correlations; NaN where fewer than `min_overlap` rows are shared or a column is constant
+    """
+    def centered(a):
+        a = np.where(np.isfinite(a), a, np.nan)
+        mask = ~np.isnan(a)
+        with np.errstate(all="ignore"):
+            a = a - np.nanmean(a, axis=0)    # centering keeps the sums below numerically stable
+        return np.where(mask, a, 0.0), mask.astype(float)
+
+    x, mx = centered(new)
+    y, my = centered(existing)
+    n = mx.T @ my
+    sx, sy = x.T @ my, mx.T @ y
+    sxx, syy = (x * x).T @ my, mx.T @ (y * y)
+    sxy = x.T @ y
+    with np.errstate(all="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        rho = cov / np.sqrt(var_x * var_y)
+    rho[(n < min_overlap) | ~np.isfinite(rho)] = np.nan
+    return np.clip(rho, -1.0, 1.0)
+
+
+def find_duplicates(df: pd.DataFrame,
+                    new_features: List[str],
+                    threshold: float = 0.995,
+                    max_rows: int = 50_000,
+                    seed: int = 42,
+                    target: Optional[str] = None) -> Dict[str, str]:
+    """
+    Finds new features that duplicate a current column (or an earlier new feature).
+
+    Args:
+        df: frame holding the current columns and the new features
+        new_features: names of the newly generated columns, checked in order
+        threshold: new features with |correlation| above this with any other column are near-duplicates
+        max_rows: rows sampled for the correlation sketch on large frames
+        seed: seed of the row sample
+        target: target column, left out of the comparisons (a feature matching it is leakage, not a duplicate)
+
+    Returns:
+        {pruned feature: reason}
+    """
+    new_features = [f for f in new_features if f in df.columns]
+    pruned: Dict[str, str] = {}
+
+    # Exact copies (any dtype) and constant columns
+    seen = {column_hash(df[c]): c for c in df.columns if c not in new_features and c != target}
+    for feat in new_features:
+        if df[feat].nunique(dropna=True) <= 1:
+            pruned[feat] = "constant"
+            continue
+        digest = column_hash(df[feat])
+        if digest in seen:
+            pruned[feat] = f"identical to {seen[digest]!r}"
+        else:
+            seen[digest] = feat
+
+    candidates = [f for f in new_features if f not in pruned and pd.api.types.is_numeric_dtype(df[f])]
+    if not candidates:
+        return pruned
+
+    sample = df if len(df) <= max_rows else df.iloc[np.sort(
+        np.random.default_rng(seed).choice(len(df), size=max_rows, replace=False))]
+    numeric = [c for c in sample.columns
+               if c not in pruned and c != target and pd.api.types.is_numeric_dtype(sample[c])]
+    rho = np.abs(correlation_sketch(sample[candidates].to_numpy(dtype=float),
+                                    sample[numeric].to_numpy(dtype=float)))
+
+    # A new feature is compared with the current columns and with the earlier new features that were kept
+    position = {c: j for j, c in enumerate(numeric)}
+    compared = [c for c in numeric if c not in candidates]
+    for i, feat in enumerate(candidates):
+        row = np.nan_to_num(rho[i, [position[c] for c in compared]], nan=0.0) if compared else np.array([])
+        if row.size and row.max() > threshold:
+            j = int(row.argmax())
+            pruned[feat] = f"|rho|={row[j]:.4f} with {compared[j]!r}"
+        else:
+            compared.append(feat)
+    return pruned
+
+
+def feature_dedup(threshold: float = 0.995, max_rows: int = 50_000):
+    """
+    Graph node that drops newly generated features duplicating existing columns before they are evaluated.
+
+    Args:
+        threshold: |correlation| above which a new feature counts as a near-duplicate
+        max_rows: rows sampled for the correlation sketch
+    """
+    def agent_node(state: object) -> None:
+        """
+        state must provide:
+          - state.clean_augmented_data: pandas.DataFrame (with the newly generated columns)
+          - state.construct_strategy: dict {feature_name: description} of the new features
+          - state.data: pandas.DataFrame (original columns, never pruned)
+          - state.cur_feature_keys: list of feature names used by the evaluator
+
+        state will be updated with:
+          - state.clean_augmented_data / state.cur_feature_keys: without the pruned features
+          - state.pruned_features: dict {feature_name: reason}, accumulated over iterations (shown to the proposal
+            agent so that it stops suggesting them)
+        """
+        df = state.clean_augmented_data
+        # Original columns are never dropped, even if a proposal reuses their name
+        new_features = [f for f in state.construct_strategy if f not in state.data.columns]
+        pruned = find_duplicates(df, new_features, threshold=threshold, max_rows=max_rows,
+                                 target=getattr(state, "target", None))
+        if not pruned:
+            return
+
+        state.clean_augmented_data = df.drop(columns=list(pruned))
+        state.cur_feature_keys = [k for k in state.cur_feature_keys if k not in pruned]
+        state.pruned_features.update(pruned)
+        history = getattr(state, "proposal_history", None)
+        for feat, reason in pruned.items():
+            if history is not None:
+                history.update(feat, pruned=reason)
+            print(f"✂️ Pruned duplicate feature {feat}: {reason}")
+
+    return agent_node
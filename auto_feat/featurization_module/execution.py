@@ -2,11 +2,24 @@ from typing import Dict
 import pandas as pd
 import numpy as np
 
-def extract_code(result: str) -> str:
-    """Extract Python code from ```python ... ``` block."""
-    return result.strip().strip("```").replace("python", "", 1).strip()
-
-def feature_generation(llm, max_retries: int):
+from auto_feat.deadline import DeadlineExceeded, call_with_deadline, check_deadline
+from auto_feat.featurization_module.overlay import ColumnOverlay
+from auto_feat.featurization_module.feature_store import frame_hash, source_columns
+from auto_feat.featurization_module.primitives import PRIM_NAME, describe_primitives, namespace
+from auto_feat.featurization_module.streaming import rewrite_global_aggregates, stream_state
+from auto_feat.first_pass.retrieval.bm25 import LITERATURE_CHARS, RETRIEVAL_K, retrieve_passages
+from auto_feat.instrumentation import get_tracer
+from auto_feat.LLM_API.structured import extract_code_block
+
+def dataset_hash(state: object) -> str:
+    """Returns (and caches on the state) the content hash of the original columns of the working dataset."""
+    if getattr(state, "dataset_hash", None) is None:
+        df = state.clean_augmented_data
+        original = [c for c in df.columns if c in state.data.columns]
+        state.dataset_hash = frame_hash(df[original])
+    return state.dataset_hash
+
+def feature_generation(llm, max_retries: int, retrieval_k: int = RETRIEVAL_K):
     """
     Generate and execute Python code that creates new features as columns on the
     existing DataFrame. Behavior:
@@ -15,7 +28,20 @@ def feature_generation(llm, max_retries: int):
       - If the generated code raises a KeyError due to referencing a non-existent
         original column, we DO NOT retry — we instead create any missing required
         feature columns and fill them with NaN, then succeed.
-      - Each retry also provides the previously generated code so the LLM can refine it.
+      - Each retry is a repair turn appended to the conversation (the previous reply plus a short note), so the
+        prompt sent before stays an unchanged prefix that the server can serve from its prefix cache.
+      - If the state carries a `feature_store`, features already stored for the same spec and dataset are
+        attached from disk instead of being regenerated; newly generated features are written to the store.
+      - In streaming mode (`state.streaming`), the code is validated on the in-memory sample, then applied chunk
+        by chunk over the shards written by DataClean (see `streaming.stream_features`), which keep the columns of
+        earlier code, so only the new block runs. Code that cannot be streamed is sent back to the LLM like any
+        other execution error.
+      - Inside a node with a deadline (see `auto_feat.deadline`), LLM calls time out and generated code is stopped
+        when the node runs out of time; the attempt is discarded and the node is cancelled.
+      - The prompt carries the `retrieval_k` manuscript passages most relevant to the feature specifications
+        (definitions and units of the quantities involved, see `first_pass.retrieval`), within `LITERATURE_CHARS`.
+      - Every attempt runs against a read-only view of the DataFrame (see `ColumnOverlay`), so failed or
+        partial attempts never leave stray columns behind.
     """
     def agent_node(state: object) -> bool:
         """
@@ -26,13 +52,48 @@ def feature_generation(llm, max_retries: int):
 
         state will be updated with:
           - state.generated_code: str (Python code generated by LLM)
-          - state.clean_augmented_data: pandas.DataFrame (overwritten with transformed dataset)
+          - state.accepted_code: list of str (every accepted code block, in order)
+          - state.clean_augmented_data: pandas.DataFrame (original columns plus the committed new columns;
+            failed attempts leave it untouched)
           - state.error_message: str (used only when retrying due to missing features)
         """
 
+        # Each attempt writes into a throwaway layer; the current df itself is never mutated
+        overlay = ColumnOverlay(state.clean_augmented_data)
+
+        def mark_generated(ok: bool) -> None:
+            """Records the generation outcome of the proposed features in the proposal history."""
+            history = getattr(state, "proposal_history", None)
+            if history is not None:
+                for fname in state.construct_strategy:
+                    history.update(fname, generated=ok and fname in state.clean_augmented_data.columns)
+
+        # Attach features that are already in the feature store, generate only the rest
+        # (the in-memory frame is only a sample in streaming mode, so the store is not used there)
+        streaming = getattr(state, "streaming", False)
+        store = None if streaming else getattr(state, "feature_store", None)
+        pending = dict(state.construct_strategy)
+        if store is not None:
+            stored = {}
+            for fname, desc in state.construct_strategy.items():
+                values = store.get(fname, desc, dataset_hash(state))
+                if values is not None and len(values) == len(overlay.base):
+                    stored[fname] = values
+                    del pending[fname]
+                    record_code = store.lookup(fname, desc, dataset_hash(state))["code"]
+                    if record_code not in state.accepted_code:
+                        state.accepted_code.append(record_code)
+            if stored:
+                overlay.attach(stored)
+                state.clean_augmented_data = overlay.commit()
+                print(f"📦 Attached stored features: {list(stored)}")
+            if not pending:
+                mark_generated(True)
+                return
+
         # Build feature specs string for the prompt
         feature_specs = "\n".join(
-            [f"- {fname}: {desc}" for fname, desc in state.construct_strategy.items()]
+            [f"- {fname}: {desc}" for fname, desc in pending.items()]
         )
 
         # ---------------- SYSTEM PROMPT ----------------
@@ -41,12 +102,17 @@ def feature_generation(llm, max_retries: int):
             "You will receive feature construction instructions that must only use the "
             "original columns in a pandas DataFrame named `df`.\n\n"
             "CODING RULES:\n"
-            "1. Only use the existing columns in `df` as inputs for creating new features.\n"
+            "1. Only use the existing columns in `df` as inputs for creating new features; they are read-only, "
+            "never modify them in place.\n"
             "2. Modify `df` in-place by attaching each new feature as a new column (e.g., df['new'] = ...).\n"
             "3. Do not create a copy of `df` or a new variable. Always work on the same `df`.\n"
-            "4. Do not include return statements.\n\n"
+            "4. Do not include return statements.\n"
+            f"5. An object `{PRIM_NAME}` of vectorized primitives is already available (do not import it). When a "
+            f"specification names one of them, and for group-wise statistics, call it as `{PRIM_NAME}.<name>(...)` "
+            "instead of re-implementing it:\n"
+            f"{describe_primitives()}\n\n"
             "STRICT FORMATTING:\n"
-            "- Use only Python built-ins, numpy, and pandas.\n"
+            f"- Use only Python built-ins, numpy, pandas and `{PRIM_NAME}`.\n"
             "- Always include at the top:\n"
             "    import pandas as pd\n"
             "    import numpy as np\n"
@@ -57,88 +123,112 @@ def feature_generation(llm, max_retries: int):
         )
 
         # ---------------- USER PROMPT ----------------
+        # Static context first (the system message is byte-identical across iterations), then this request;
+        # repairs are appended as further turns so the whole prompt so far stays a cacheable prefix
         base_user_msg = (
-            "Here are the feature specifications:\n"
-            f"{feature_specs}\n\n"
             "The input dataset columns are:\n"
             f"{list(state.clean_augmented_data.columns)}\n\n"
+            "Here are the feature specifications:\n"
+            f"{feature_specs}\n\n"
+            "Relevant manuscript passages (definitions and units of the quantities involved):\n"
+            f"{retrieve_passages(state, feature_specs, retrieval_k, budget_chars=LITERATURE_CHARS)}\n\n"
             "Generate the Python code now."
         )
 
         # Retry loop
         last_result = None
-        system_message = base_system_message
-        user_msg = base_user_msg
-        prev_code = None
+        prompt = [
+            {"role": "system", "content": base_system_message},
+            {"role": "user", "content": base_user_msg}
+        ]
+
+        def request_repair(reply: str, note: str) -> None:
+            prompt.append({"role": "assistant", "content": reply})
+            prompt.append({"role": "user", "content": note})
 
         for attempt in range(max_retries):
-            prompt = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_msg}
-            ]
-            raw = llm(prompt)
+            if attempt > 0:
+                get_tracer().count("retries")
+            check_deadline("feature generation")
+            raw = llm(list(prompt))
             result = raw if isinstance(raw, str) else raw["choices"][0]["message"]["content"]
             last_result = result
 
-            # Expect code block
-            if not (isinstance(result, str) and result.strip().startswith("```python") and result.strip().endswith("```")):
-                user_msg = (
-                    base_user_msg
-                    + "\n\nNote: Your last output did not follow the STRICT formatting. "
-                      "Only output executable Python code inside a ```python block."
-                )
-                if prev_code:
-                    user_msg += f"\n\nFor reference, here was your last attempt:\n```python\n{prev_code}\n```"
+            # Expect a code block (prose around it or a missing fence is repaired locally, see LLM_API.structured)
+            code, _ = extract_code_block(result)
+            if code is None:
+                request_repair(str(result), "Your last output did not follow the STRICT formatting. "
+                                            "Only output executable Python code inside a ```python block.")
                 continue
 
-            code = extract_code(result)
-            prev_code = code  # store for next retry
             state.generated_code = code
 
-            # --- Execute the code on the provided df ---
-            local_vars = {"df": state.clean_augmented_data}
+            # --- Execute the code on a read-only view of the current df ---
             try:
-                exec(code, {}, local_vars)
-                modified_df = local_vars["df"]
-
-                if isinstance(modified_df, pd.DataFrame):
-                    # If the code ran, but some required features are missing → RETRY with feedback
-                    missing_feats = [f for f in state.cur_feature_keys if f not in modified_df.columns]
-                    if missing_feats:
-                        state.error_message = (
-                            "❌ Invalid instruction detected.\n"
-                            f"Missing required features: {missing_feats}\n\n"
-                            f"Full original instruction:\n{state.construct_strategy}"
-                        )
-                        print(state.error_message)
-
-                        user_msg = (
-                            base_user_msg
-                            + f"\n\nNote: Your last code failed because these required features are missing: {missing_feats}\n"
-                              "Please regenerate corrected Python code."
-                        )
-                        if prev_code:
-                            user_msg += f"\n\nFor reference, here was your last attempt:\n```python\n{prev_code}\n```"
-                        continue  # retry generation
-
-                    # ✅ Success: overwrite state df and finish
-                    state.clean_augmented_data = modified_df
-                    print(f"✅ Successfully generated all required features at attempt {attempt+1}")
-                    return
+                with overlay.attempt() as df_view:
+                    local_vars = {"df": df_view}
+                    # Generated code may not outlive the node's deadline (see auto_feat.deadline)
+                    call_with_deadline(exec, code, namespace(), local_vars)
+                    overlay.stage(local_vars["df"])
+
+                if overlay.shadowed:
+                    print(f"⚠️ Ignoring in-place changes to existing columns: {overlay.shadowed}")
+
+                # If the code ran, but some required features are missing → RETRY with feedback
+                missing_feats = [
+                    f for f in state.construct_strategy
+                    if f not in overlay.layer and f not in overlay.base.columns
+                ]
+                if missing_feats:
+                    overlay.discard()
+                    state.error_message = (
+                        "❌ Invalid instruction detected.\n"
+                        f"Missing required features: {missing_feats}\n\n"
+                        f"Full original instruction:\n{state.construct_strategy}"
+                    )
+                    print(state.error_message)
+
+                    request_repair(result, f"Your last code failed because these required features are missing: "
+                                           f"{missing_feats}\nPlease regenerate corrected Python code.")
+                    continue  # retry generation
+
+                # Reject code that cannot be applied chunk by chunk, or that fails on any chunk of the source,
+                # before accepting it (nothing in the state changes until then)
+                if streaming:
+                    rewrite_global_aggregates("\n".join(state.accepted_code + [code]))
+                    stats = stream_state(state, state.accepted_code + [code], overlay.merged())
+
+                # ✅ Success: commit the new columns atomically and finish
+                new_columns = dict(overlay.layer)
+                state.clean_augmented_data = overlay.commit()
+                if store is not None:
+                    sources = source_columns(code, list(state.data.columns))
+                    for fname, values in new_columns.items():
+                        if fname in pending:
+                            store.put(fname, values, pending[fname], code, sources, dataset_hash(state))
+                state.accepted_code.append(code)
+
+                if streaming:
+                    print(f"🧱 Streamed features over {stats['n_rows']} rows into {len(stats['shards'])} shards "
+                          f"({stats['passes']} passes, {stats['cached_blocks']} code blocks reused)")
+                mark_generated(True)
+                print(f"✅ Successfully generated all required features at attempt {attempt+1}")
+                return
+
+            except DeadlineExceeded:
+                overlay.discard()
+                raise
 
             except Exception as e:
+                overlay.discard()
                 error_feedback = str(e)
                 print(f"❌ Execution failed (attempt {attempt+1}): {error_feedback}")
 
-                user_msg = (
-                    base_user_msg
-                    + f"\n\nNote: Your last code failed with the following error:\n{error_feedback}\n"
-                      "Please regenerate corrected Python code."
-                )
-                if prev_code:
-                    user_msg += f"\n\nFor reference, here was your last attempt:\n```python\n{prev_code}\n```"
+                request_repair(result, f"Your last code failed with the following error:\n{error_feedback}\n"
+                                       "Please regenerate corrected Python code.")
                 continue
 
+        mark_generated(False)
         raise RuntimeError(f"Failed after {max_retries} retries. Last output:\n{last_result}")
 
     return agent_node
@@ -0,0 +1,131 @@
+"""
+Persistent on-disk store for generated feature columns and their provenance.
+"""
+from typing import Any, Dict, List, Optional
+import ast
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Returns a content hash of a DataFrame (values, column names and row index)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+def source_columns(code: str, columns: List[str]) -> List[str]:
+    """Returns the columns of `columns` that the given feature code reads through `df[...]` or `df.<name>`."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    referenced = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "df":
+            if isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+                referenced.add(node.slice.value)
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "df":
+            referenced.add(node.attr)
+    return [c for c in columns if c in referenced]
+
+
+class FeatureStore:
+    """
+    Stores each accepted feature column as a memory-mapped NumPy array, alongside a JSON manifest with its
+    provenance (spec text, generating code, source columns, dataset hash, evaluation scores).
+
+    Columns are keyed by (feature name, spec text, dataset hash), so a later iteration or run that asks for the
+    same feature on the same data attaches the stored column instead of regenerating it.
+
+    Args:
+        root: directory where the column files and `manifest.json` live (created if missing)
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(os.path.join(root, "columns"), exist_ok=True)
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    @staticmethod
+    def key(name: str, spec: str, dataset_hash: str) -> str:
+        """Returns the store key of a feature definition on a given dataset."""
+        payload = json.dumps([name, " ".join(str(spec).split()), dataset_hash])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, name: str, spec: str, dataset_hash: str) -> Optional[Dict[str, Any]]:
+        """Returns the provenance record of a stored feature, or None."""
+        return self.manifest.get(self.key(name, spec, dataset_hash))
+
+    def get(self, name: str, spec: str, dataset_hash: str) -> Optional[np.ndarray]:
+        """Returns the stored column as a read-only memory-mapped array (no data is read), or None."""
+        record = self.lookup(name, spec, dataset_hash)
+        if record is None:
+            return None
+        path = os.path.join(self.root, record["file"])
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def put(self,
+            name: str,
+            values: pd.Series,
+            spec: str,
+            code: str,
+            source_cols: List[str],
+            dataset_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Writes a feature column and its provenance. Only numeric and boolean columns can be memory-mapped;
+        other dtypes are skipped and None is returned.
+        """
+        if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+            return None
+        arr = values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        key = self.key(name, spec, dataset_hash)
+        rel_path = os.path.join("columns", f"{key}.npy")
+        tmp_path = os.path.join(self.root, rel_path + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp_path, os.path.join(self.root, rel_path))
+
+        record = {
+            "name": name,
+            "spec": spec,
+            "code": code,
+            "source_columns": list(source_cols),
+            "dataset_hash": dataset_hash,
+            "n_rows": int(arr.shape[0]),
+            "file": rel_path,
+            "created": time.time(),
+            "scores": [],
+        }
+        self.manifest[key] = record
+        self._flush()
+        return record
+
+    def record_scores(self, scores: Dict[str, Dict[str, Any]], dataset_hash: str) -> None:
+        """Appends evaluation scores ({feature name: scores}) to the matching stored features of `dataset_hash`."""
+        changed = False
+        for record in self.manifest.values():
+            if record["dataset_hash"] == dataset_hash and record["name"] in scores:
+                record["scores"].append(scores[record["name"]])
+                changed = True
+        if changed:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Atomically rewrites the manifest."""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
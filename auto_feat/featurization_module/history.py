@@ -0,0 +1,148 @@
+"""
+Indexed history of every proposed feature.
+
+Each proposal is recorded under a normalized signature of its name and of its specification, together with the
+iteration it was proposed in, whether it was generated (or pruned as a duplicate), whether feature selection kept
+it, and what the evaluation said about it (importance and the change of the test metric in its iteration). The
+proposal agent uses it to filter repeated proposals before generation and shows the model a compact "already tried"
+digest.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+from auto_feat.eval_module.uncertainty import MAIN_METRIC
+
+
+def name_signature(name: str) -> str:
+    """Normalized feature name: lowercase alphanumerics only ("Grain_Size Ratio" -> "grainsizeratio")."""
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def spec_signature(spec: str) -> str:
+    """Normalized specification: lowercase words, numbers and arithmetic operators, single-spaced."""
+    return " ".join(re.findall(r"[a-z0-9]+|[-+*/^]", str(spec).lower()))
+
+
+class ProposalHistory:
+    """
+    Every feature proposed so far, indexed by name signature and by specification signature.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, int] = {}
+        self._by_spec: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, name: str, spec: str = "") -> Optional[Dict[str, Any]]:
+        """Returns the earlier entry with the same normalized name or specification, or None."""
+        index = self._by_name.get(name_signature(name))
+        if index is None and spec:
+            index = self._by_spec.get(spec_signature(spec))
+        return self.entries[index] if index is not None else None
+
+    def split_repeats(self, strategy: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        Separates new proposals from repeats of earlier ones.
+
+        Returns:
+            ({name: spec} of new proposals, {name: earlier entry} of repeats)
+        """
+        fresh, repeats = {}, {}
+        for name, spec in strategy.items():
+            entry = self.lookup(name, spec)
+            if entry is None:
+                fresh[name] = spec
+            else:
+                repeats[name] = entry
+        return fresh, repeats
+
+    def record_proposals(self, strategy: Dict[str, str], iteration: Optional[int]) -> None:
+        """Adds newly proposed features."""
+        for name, spec in strategy.items():
+            self._by_name[name_signature(name)] = len(self.entries)
+            self._by_spec.setdefault(spec_signature(spec), len(self.entries))
+            self.entries.append({
+                "name": name,
+                "spec": spec,
+                "iteration": iteration,
+                "generated": None,      # None: not attempted yet
+                "pruned": None,         # reason, if dropped as a duplicate
+                "selected": None,       # False: left out of the evaluated subset by feature selection
+                "importance": None,     # share of GBM importance in its evaluation
+                "metric_delta": None,   # change of the test metric in the iteration that introduced it
+                "verdict": None,        # "improved"/"worse"/"inconclusive" by overlapping CIs (uncertainty mode)
+            })
+
+    def update(self, name: str, **fields: Any) -> None:
+        """Sets fields of the latest entry recorded under `name` (ignored for unknown names)."""
+        index = self._by_name.get(name_signature(name))
+        if index is not None:
+            self.entries[index].update(fields)
+
+    def record_evaluation(self, report: Dict[str, Any], previous: Optional[Dict[str, Any]], task: str) -> None:
+        """
+        Attaches importances and the test metric change of an evaluation to the features it covered, and marks the
+        pool features that feature selection left out of the evaluated subset.
+        """
+        importance = {f["variable"]: f["percentage"] for f in report.get("feature_importance", [])}
+        # The task's main metric, the one the overlapping-CI verdict is computed on
+        metric, _ = MAIN_METRIC[task]
+        delta = None
+        if previous is not None:
+            try:
+                delta = report["performance"]["test"][metric] - previous["performance"]["test"][metric]
+            except (KeyError, TypeError):
+                delta = None
+        evaluated = list(report.get("features", importance))
+        for name in (report.get("selection") or {}).get("pool", []):
+            if name not in evaluated:
+                self.update(name, selected=False)
+        for name in evaluated:
+            index = self._by_name.get(name_signature(name))
+            if index is None:
+                continue
+            entry = self.entries[index]
+            entry["selected"] = True
+            entry["importance"] = importance.get(name, 0.0)
+            if entry["metric_delta"] is None and delta is not None:
+                entry["metric_delta"] = {metric: delta}
+                # Overlapping-CI verdict of the same change, when the report carries confidence intervals
+                entry["verdict"] = (report.get("uncertainty") or {}).get("vs_previous", {}).get("verdict")
+
+    def digest(self, max_items: int = 40, max_spec_chars: int = 80) -> str:
+        """
+        Compact one-line-per-feature summary of what was already tried, oldest first. It changes with every
+        recorded proposal and outcome, so prompts place it after their stable context (it is not a cacheable
+        prefix).
+        """
+        lines = []
+        if len(self.entries) > max_items:
+            lines.append(f"- ... {len(self.entries) - max_items} older proposals")
+        for entry in self.entries[-max_items:]:
+            if entry["pruned"]:
+                outcome = f"pruned ({entry['pruned']})"
+            elif entry["generated"] is False:
+                outcome = "generation failed"
+            elif entry["importance"] is not None:
+                outcome = f"importance {entry['importance']:.1%}"
+                if entry["metric_delta"]:
+                    (metric, delta), = entry["metric_delta"].items()
+                    outcome += f", test {metric} change {delta:+.4g}"
+                    if entry["verdict"] == "inconclusive":
+                        outcome += " (within noise)"
+                    elif entry["verdict"]:
+                        outcome += f" ({entry['verdict']})"
+                if entry.get("selected") is False:
+                    outcome += ", later dropped by feature selection"
+            elif entry.get("selected") is False:
+                outcome = "rejected by feature selection"
+            else:
+                outcome = "not evaluated"
+            spec = str(entry["spec"])
+            if len(spec) > max_spec_chars:
+                spec = spec[:max_spec_chars] + "..."
+            lines.append(f"- {entry['name']} (iteration {entry['iteration']}): {spec} -> {outcome}")
+        return "\n".join(lines) or "None"
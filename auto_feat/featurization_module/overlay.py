@@ -0,0 +1,123 @@
+"""
+Column overlay used to run generated feature code transactionally.
+
+Attempts see the base columns through read-only views rather than through pandas' copy-on-write mode, which is a
+process-wide option and would flip under other threads (parallel selection, the model zoo, pipelined drafts).
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+import numpy as np
+import pandas as pd
+
+
+def _join_columns(columns: List[pd.Series], names: pd.Index, index: pd.Index) -> pd.DataFrame:
+    """Frame made of the given columns without copying their data (one block per column, no consolidation)."""
+    frame = pd.DataFrame(dict(enumerate(columns)), index=index, copy=False)
+    frame.columns = names
+    return frame
+
+
+def _read_only_view(base: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame with the columns of `base` in which NumPy-backed columns are read-only views of the base data (no copy)
+    and extension-typed columns are copies, so that no write through the frame can reach the base.
+    """
+    columns = []
+    for i in range(base.shape[1]):
+        col = base.iloc[:, i]
+        values = col.to_numpy()
+        if isinstance(col.dtype, np.dtype) and values.dtype == col.dtype:
+            values = values.view()
+            values.flags.writeable = False
+            columns.append(pd.Series(values, index=base.index, copy=False))
+        else:
+            columns.append(col.copy(deep=True))
+    return _join_columns(columns, base.columns, base.index)
+
+
+def _shares_data(a: pd.Series, b: pd.Series) -> bool:
+    """True if two columns are still backed by the same data (i.e. one was not written to)."""
+    if isinstance(a.dtype, np.dtype) and isinstance(b.dtype, np.dtype):
+        return np.shares_memory(a.to_numpy(), b.to_numpy())
+    return a.array is b.array
+
+
+class ColumnOverlay:
+    """
+    Lightweight layer of new columns on top of an immutable base DataFrame.
+
+    Each attempt gets a view of the base frame whose columns are read-only views of the base data, so generated
+    code can read `df`, add columns and replace existing ones without copying the whole frame and without touching
+    the base (writing into a base column in place raises "assignment destination is read-only"). Columns the
+    attempt adds are staged into the layer; the layer is committed atomically on success or discarded on failure.
+
+    Args:
+        base: DataFrame holding the original (and previously accepted) columns. It is never modified.
+    """
+
+    def __init__(self, base: pd.DataFrame) -> None:
+        self.base = base
+        self.layer: Dict[str, pd.Series] = {}
+        self.shadowed: List[str] = []   # base columns the last attempt tried to overwrite
+
+    @contextmanager
+    def attempt(self) -> Iterator[pd.DataFrame]:
+        """
+        Yields a fresh read-only view of the base frame for one attempt (only extension-typed columns are copied).
+        """
+        self.discard()
+        yield _read_only_view(self.base)
+
+    def stage(self, df: pd.DataFrame) -> List[str]:
+        """
+        Collects the columns an attempt added to its view into the layer.
+
+        Raises:
+            ValueError: if the attempt changed the rows of the frame (dropped, added or reordered rows).
+
+        Returns:
+            list of staged column names
+        """
+        self.discard()
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError(f"Generated code replaced `df` with a {type(df).__name__}")
+        if not df.index.equals(self.base.index):
+            raise ValueError(
+                "Generated code changed the rows of `df`; only new columns may be attached "
+                f"(expected {len(self.base)} rows, got {len(df)})"
+            )
+
+        for col in df.columns:
+            if col in self.base.columns:
+                # Unchanged columns are still views of the base data
+                if not _shares_data(df[col], self.base[col]):
+                    self.shadowed.append(col)
+                continue
+            self.layer[col] = df[col]
+        return list(self.layer)
+
+    def attach(self, columns: Dict[str, np.ndarray]) -> None:
+        """Stages precomputed column arrays (e.g. memory-mapped from the feature store) without copying them."""
+        for name, values in columns.items():
+            self.layer[name] = pd.Series(values, index=self.base.index, name=name, copy=False)
+
+    def discard(self) -> None:
+        """Drops the staged layer, leaving the base untouched."""
+        self.layer = {}
+        self.shadowed = []
+
+    def merged(self) -> pd.DataFrame:
+        """Frame made of the base columns plus the staged layer (base column data is shared, not copied)."""
+        if not self.layer:
+            return self.base
+        columns = [self.base.iloc[:, i] for i in range(self.base.shape[1])] + list(self.layer.values())
+        return _join_columns(columns, self.base.columns.append(pd.Index(list(self.layer))), self.base.index)
+
+    def commit(self) -> pd.DataFrame:
+        """
+        Returns the merged frame (see `merged`) and rebases the overlay onto it.
+        """
+        committed = self.merged()
+        self.base = committed
+        self.discard()
+        return committed
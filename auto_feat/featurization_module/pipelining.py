@@ -0,0 +1,163 @@
+"""
+Pipelined iterations: the next proposal is drafted while the current feature set is being evaluated.
+
+`ProposalPipeline.wrap_evaluation` starts a proposal in a background thread from the latest available report
+(the one of the previous iteration) and then runs the evaluation, so the LLM works while H2O trains. The draft
+works on a snapshot of the report and of the proposal history taken before the evaluation starts, which the
+evaluation then updates freely. When the fresh report lands, the proposal node reconciles (`take_draft`): the
+draft is used as is unless the report changed materially (the main test metric moved by more than `tol`,
+relative, or the set of the `n_top` most important features changed), in which case the proposal is made again
+from the fresh report. Drafting never changes the state; the draft is only recorded in the proposal history once it
+is accepted. The share of drafts used is in the trace (`Tracer.draft_hit_rate`).
+"""
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+import contextvars
+import copy
+import threading
+
+from auto_feat.eval_module.uncertainty import MAIN_METRIC
+from auto_feat.featurization_module.proposal import propose_features
+from auto_feat.first_pass.retrieval.bm25 import RETRIEVAL_K
+from auto_feat.deadline import time_left
+from auto_feat.instrumentation import NULL_TRACER, get_tracer
+
+# What a proposal reads from the state (see `propose_features`)
+SNAPSHOT_ATTRS = ("features_description", "literature_review", "target", "data_profile", "proposal_history",
+                  "manuscript_path", "manuscript_index", "retrieval_cache_dir")
+
+
+def top_features(report: Dict[str, Any], n: int) -> List[str]:
+    """Names of the `n` most important features of a report."""
+    ranked = sorted(report.get("feature_importance", []), key=lambda f: -f.get("percentage", 0.0))
+    return [f["variable"] for f in ranked[:n]]
+
+
+def snapshot_state(state: object) -> SimpleNamespace:
+    """Copy of what a proposal reads from the state, safe to use while the state is updated by another node."""
+    return SimpleNamespace(**{attr: copy.deepcopy(getattr(state, attr, None)) if attr != "manuscript_index"
+                              else getattr(state, attr, None)   # read-only once built, shared
+                              for attr in SNAPSHOT_ATTRS})
+
+
+def report_changed(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]], task: str,
+                   tol: float = 0.05, n_top: int = 2) -> bool:
+    """
+    Whether a proposal made from `old` should be redone for `new`.
+
+    Args:
+        old: report the draft was made from
+        new: fresh report
+        task: "regression" or "classification" (selects the main metric)
+        tol: relative change of the main test metric considered material. Iteration-to-iteration changes of a few
+            percent are within the noise of a single train/test split and do not change what is worth proposing,
+            so the default is 5%
+        n_top: number of top features by importance that must be unchanged (as a set)
+    """
+    if old is None or new is None:
+        return True
+    metric, _ = MAIN_METRIC[task]
+    try:
+        before, after = old["performance"]["test"][metric], new["performance"]["test"][metric]
+    except (KeyError, TypeError):
+        return True
+    if before is None or after is None:
+        return True
+    if abs(after - before) > tol * max(abs(before), 1e-12):
+        return True
+    return set(top_features(old, n_top)) != set(top_features(new, n_top))
+
+
+class ProposalPipeline:
+    """
+    Overlaps the proposal of iteration i+1 with the evaluation of iteration i.
+
+    Args:
+        llm: LLM wrapper used for the drafts
+        task: "regression" or "classification"
+        max_retries: LLM calls allowed per draft
+        tracer: tracer recording the drafts as "FeatProposalDraft" node runs
+        tol: relative change of the main test metric that invalidates a draft (see `report_changed`)
+        n_top: number of top features whose change invalidates a draft
+        retrieval_k: manuscript passages added to the draft prompt
+        state_attr: name of the state attribute holding the draft between the two nodes
+    """
+
+    def __init__(self,
+                 llm: Callable,
+                 task: str = "regression",
+                 max_retries: int = 3,
+                 tracer=None,
+                 tol: float = 0.05,
+                 n_top: int = 2,
+                 retrieval_k: int = RETRIEVAL_K,
+                 state_attr: str = "proposal_draft") -> None:
+        self.llm = llm
+        self.task = task
+        self.max_retries = max_retries
+        self.tracer = tracer or NULL_TRACER
+        self.tol = tol
+        self.n_top = n_top
+        self.retrieval_k = retrieval_k
+        self.state_attr = state_attr
+
+    def wrap_evaluation(self, fn: Callable) -> Callable:
+        """
+        Wraps the evaluation node so that the next proposal is drafted while it runs. After the evaluation, the
+        draft is waited for no longer than the node has left (see `auto_feat.deadline`); a draft that is not ready
+        then, or an evaluation that failed, leaves no draft.
+        """
+        def evaluation_with_draft(state):
+            setattr(state, self.state_attr, None)
+            # Nothing to draft from before the baseline, and no draft after the last iteration
+            if state.eval_report is None or state.iterations + 1 > state.max_iterations:
+                return fn(state)
+            # The evaluation updates the report and the history while the draft reads them
+            report = copy.deepcopy(state.eval_report)
+            snapshot = snapshot_state(state)
+            snapshot.iterations = state.iterations
+            out: Dict[str, Any] = {}
+
+            def draft_node(snapshot):
+                out["strategy"] = propose_features(self.llm, snapshot, report, self.max_retries, self.retrieval_k)
+
+            def run():
+                try:
+                    self.tracer.wrap("FeatProposalDraft", draft_node)(snapshot)
+                except Exception as e:
+                    print(f"⚠️ Draft proposal failed, the proposal will wait for the report: {e}")
+
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True)
+            thread.start()
+            result = fn(state)
+            thread.join(timeout=time_left())
+            if thread.is_alive():
+                get_tracer().count("drafts_discarded")
+                print("⌛ The draft proposal is not ready in time: proposing from the fresh report")
+            elif "strategy" in out:
+                setattr(state, self.state_attr, {"strategy": out["strategy"], "report": report})
+            return result
+        return evaluation_with_draft
+
+    def take_draft(self, state) -> Optional[Dict[str, str]]:
+        """
+        Returns the draft proposal if it is still valid for the fresh report (and clears it), else None.
+        """
+        draft = getattr(state, self.state_attr, None)
+        setattr(state, self.state_attr, None)
+        if draft is None:
+            return None
+        if report_changed(draft["report"], state.eval_report, self.task, self.tol, self.n_top):
+            get_tracer().count("drafts_discarded")
+            print("🔄 The report changed materially since the draft: proposing again")
+            return None
+        strategy = draft["strategy"]
+        history = getattr(state, "proposal_history", None)
+        if history is not None:
+            strategy, _ = history.split_repeats(strategy)
+            if not strategy:
+                get_tracer().count("drafts_discarded")
+                return None
+        get_tracer().count("drafts_used")
+        print(f"⏩ Using the proposal drafted during evaluation: {list(strategy)}")
+        return strategy
@@ -0,0 +1,146 @@
+"""
+Registry of named, vectorized feature primitives.
+
+Proposals may name these primitives and generated code calls them as `prim.<name>(...)` (the `prim` object is
+placed in the namespace the code runs in), instead of re-implementing ratios, group-wise statistics or binning
+with row-wise Python on every iteration. The registry is listed in the proposal and generation prompts (see
+`describe_primitives`). Every primitive takes and returns pandas Series aligned with `df`; undefined values
+(division by zero, log of non-positive numbers, missing group keys, ...) become NaN rather than raising.
+"""
+from types import SimpleNamespace
+from typing import Callable, Dict, Sequence, Union
+import inspect
+
+import numpy as np
+import pandas as pd
+
+# Name under which the registry is available to generated code
+PRIM_NAME = "prim"
+
+PRIMITIVES: Dict[str, Callable] = {}
+
+# Primitives that need statistics over all rows (cannot be applied chunk by chunk as they are)
+GLOBAL_PRIMITIVES = set()
+
+# Global primitives that streaming mode rewrites into exact mergeable aggregates (see `streaming`); the other
+# global primitives are only available in memory
+STREAMABLE_PRIMITIVES = {"zscore"}
+
+GROUP_AGGREGATES = ("mean", "median", "std", "min", "max", "sum", "count")
+
+
+def primitive(global_stats: bool = False):
+    """Registers a function as a primitive under its own name."""
+    def register(fn: Callable) -> Callable:
+        PRIMITIVES[fn.__name__] = fn
+        if global_stats:
+            GLOBAL_PRIMITIVES.add(fn.__name__)
+        return fn
+    return register
+
+
+def _numeric(x) -> Union[pd.Series, float]:
+    if np.isscalar(x):
+        return float(x)   # constants broadcast against the columns
+    x = x if isinstance(x, pd.Series) else pd.Series(x)
+    return pd.to_numeric(x, errors="coerce").astype(float)
+
+
+@primitive()
+def safe_ratio(a: pd.Series, b: pd.Series, fill: float = np.nan) -> pd.Series:
+    """a / b, with `fill` where b is zero, missing or the result is not finite."""
+    a, b = _numeric(a), _numeric(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = a / b
+    return out.where(np.isfinite(out) & (b != 0), fill)
+
+
+@primitive()
+def safe_log(x: pd.Series, offset: float = 0.0) -> pd.Series:
+    """Natural log of (x + offset), NaN where x + offset <= 0."""
+    x = _numeric(x) + offset
+    return np.log(x.where(x > 0))
+
+
+@primitive()
+def power(x: pd.Series, p: float) -> pd.Series:
+    """x ** p, NaN where undefined (negative base with a fractional power, 0 to a negative power)."""
+    x = _numeric(x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.power(x, p)
+    return out.where(np.isfinite(out))
+
+
+@primitive()
+def interaction(*columns: pd.Series) -> pd.Series:
+    """Product of two or more columns (NaN if any factor is missing)."""
+    out = _numeric(columns[0])
+    for col in columns[1:]:
+        out = out * _numeric(col)
+    return out
+
+
+@primitive()
+def standardize(x: pd.Series, mean: float, std: float) -> pd.Series:
+    """(x - mean) / std with given statistics (e.g. those of the training data); 0 if std is 0."""
+    x = _numeric(x)
+    return (x - mean) / std if std > 0 else x * 0.0
+
+
+@primitive(global_stats=True)
+def zscore(x: pd.Series) -> pd.Series:
+    """(x - mean) / std over all rows (population std); 0 for a constant column."""
+    x = _numeric(x)
+    return standardize(x, x.mean(), x.std(ddof=0))
+
+
+@primitive(global_stats=True)
+def group_agg(df: pd.DataFrame, by: Union[str, Sequence[str]], col: str, agg: str = "mean") -> pd.Series:
+    """Per-row value of `agg` (mean, median, std, min, max, sum, count) of `col` within the row's `by` group."""
+    if agg not in GROUP_AGGREGATES:
+        raise ValueError(f"agg must be one of {GROUP_AGGREGATES}, got {agg!r}")
+    values = _numeric(df[col])
+    keys = [df[k] for k in ([by] if isinstance(by, str) else by)]
+    return values.groupby(keys, dropna=True).transform(agg).astype(float)
+
+
+@primitive(global_stats=True)
+def group_deviation(df: pd.DataFrame, by: Union[str, Sequence[str]], col: str, relative: bool = False) -> pd.Series:
+    """`col` minus its group mean (divided by the group mean if `relative`)."""
+    mean = group_agg(df, by, col, "mean")
+    deviation = _numeric(df[col]) - mean
+    return safe_ratio(deviation, mean) if relative else deviation
+
+
+@primitive(global_stats=True)
+def binning(x: pd.Series, bins: int = 5, method: str = "quantile") -> pd.Series:
+    """Bin index 0..bins-1 of x, with equal-count ("quantile") or equal-width ("uniform") bins; NaN if missing."""
+    x = _numeric(x)
+    if method == "quantile":
+        codes = pd.qcut(x, q=bins, labels=False, duplicates="drop")
+    elif method == "uniform":
+        codes = pd.cut(x, bins=bins, labels=False)
+    else:
+        raise ValueError(f"method must be 'quantile' or 'uniform', got {method!r}")
+    return codes.astype(float)
+
+
+def namespace() -> Dict[str, SimpleNamespace]:
+    """Globals to execute generated feature code with (`prim.<name>` for every registered primitive)."""
+    return {PRIM_NAME: SimpleNamespace(**PRIMITIVES)}
+
+
+def describe_primitives() -> str:
+    """One line per primitive (signature and summary) for the prompts, noting those unavailable in streaming mode."""
+    lines = []
+    for name, fn in PRIMITIVES.items():
+        signature = inspect.signature(fn)
+        signature = signature.replace(
+            parameters=[p.replace(annotation=inspect.Parameter.empty) for p in signature.parameters.values()],
+            return_annotation=inspect.Signature.empty,
+        )
+        summary = inspect.getdoc(fn).splitlines()[0]
+        if name in GLOBAL_PRIMITIVES - STREAMABLE_PRIMITIVES:
+            summary += " Not available when features are streamed in chunks."
+        lines.append(f"- {PRIM_NAME}.{name}{signature}: {summary}")
+    return "\n".join(lines)
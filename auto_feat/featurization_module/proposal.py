@@ -1,76 +1,169 @@
 import json
 
-def feat_proposal(llm, max_retries=3):
+from auto_feat.deadline import check_deadline
+from auto_feat.featurization_module.primitives import describe_primitives
+from auto_feat.first_pass.profiling.profiler import format_profile
+from auto_feat.first_pass.retrieval.bm25 import LITERATURE_CHARS, RETRIEVAL_K, retrieve_passages
+from auto_feat.instrumentation import get_tracer
+from auto_feat.LLM_API.structured import PROPOSAL_SCHEMA, StructuredOutputError, parse_structured
+
+def proposal_query(state, report, n_features=5):
+    """Retrieval query of a proposal: the target plus the most important features of the report and their keys."""
+    descriptions = state.features_description if isinstance(state.features_description, dict) else {}
+    names = [f["variable"] for f in (report or {}).get("feature_importance", [])[:n_features]]
+    return " ".join([str(state.target)] + [f"{name} {descriptions.get(name, '')}" for name in names])
+
+
+def propose_features(llm, state, report, max_retries=3, retrieval_k=RETRIEVAL_K):
+    """
+    Asks the LLM for new features given the state and an evaluation report, without changing the state (so that
+    a draft can be prepared while the report's successor is still being computed, see `pipelining`).
+
+    Args:
+        llm: LLM wrapper
+        state: AutoFeaturizer state (descriptions, literature, target, profile and proposal history are read)
+        report: evaluation report the proposal reacts to
+        max_retries: LLM calls allowed for a usable, non-repeated proposal
+        retrieval_k: manuscript passages retrieved for the target and the top features (0: none); together with
+            the literature summary they are kept within `LITERATURE_CHARS`
+
+    Returns:
+        {feature name: specification} of the proposed features, repeats of earlier proposals removed
+    """
+    description = state.features_description
+    summary = state.literature_review or "None"
+    if len(summary) > LITERATURE_CHARS:
+        summary = summary[:LITERATURE_CHARS] + "..."
+    target = state.target
+
+    system_message = (
+        "You are a scientific feature engineering assistant.\n\n"
+        "Task: Propose new features to create from existing features. "
+        "Use the given feature descriptions, literature summary, target definition, "
+        "and previous run reports.\n\n"
+        "STRICT RULES FOR FEATURE CREATION:\n"
+        "1. Propose at most 10 new features.\n"
+        "2. Each feature must use simple operations:\n"
+        "   - arithmetic (+, -, *, /), ratios or differences\n"
+        "   - statistical summaries (mean, variance, min, max, std)\n"
+        "   - the registered primitives listed below, by name (e.g. safe ratios and logs, group-wise means,\n"
+        "     z-scores, binning)\n"
+        "3. Each feature can involve at most 3 original columns.\n"
+        "4. Use no more than 5 operations per feature.\n"
+        "5. Avoid overly complex, nested, or hard-to-compute transformations.\n"
+        "6. Prefer simple and interpretable features that are meaningful for science and ML.\n\n"
+        "Registered primitives (vectorized and tested; name them in the explanation when they apply):\n"
+        f"{describe_primitives()}\n\n"
+        "Output format (STRICT JSON Dictionary):\n"
+        "{\n"
+        '  \"new_feature_computation\": { \"feature_name\": \"explanation of how to derive from existing features\", ... }\n'
+        "}\n"
+    )
+
+    # Ranges, sparsity and categories of the original columns (computed once, before summarization)
+    profile = getattr(state, "data_profile", None)
+    profile_str = format_profile(profile) if profile else "None"
+
+    # Convert report dict into readable string for LLM
+    report_str = json.dumps(report, indent=2)
+    # Everything proposed in earlier iterations, with its outcome (see ProposalHistory)
+    history = getattr(state, "proposal_history", None)
+    tried_str = history.digest() if history is not None else "None"
+    # The few manuscript passages about the target and the current top features (see first_pass.retrieval),
+    # as many as fit next to the summary
+    passages_str = retrieve_passages(state, proposal_query(state, report), retrieval_k,
+                                     budget_chars=LITERATURE_CHARS - len(summary))
+
+    # Static context first (cacheable prompt prefix), then what changes every iteration: passages, the already
+    # tried digest and the report
+    user_msg = (
+        "\n==== Existing Features ====\n"
+        f"{description}\n"
+        "==== Data Profile ====\n"
+        f"{profile_str}\n"
+        "==== Literature Summary ====\n"
+        f"{summary}\n"
+        "==== Target Specification ====\n"
+        f"{target}\n"
+        "==== Relevant Manuscript Passages ====\n"
+        f"{passages_str}\n"
+        "==== Already Tried Features (do not propose these again) ====\n"
+        f"{tried_str}\n"
+        "==== Previous Runs Report ====\n"
+        f"{report_str}\n"
+        "\nInstructions:\n"
+        "- Suggest no more than 5 simple, interpretable features.\n"
+        "- Use only arithmetic, ratios, differences, statistical summaries or the registered primitives.\n"
+        "- Each feature must be practical to compute in pandas/numpy.\n"
+        "- Follow the strict JSON format.\n"
+    )
+
+    prompt = [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": user_msg}
+    ]
+
+    # Replies are repaired locally when possible (see LLM_API.structured); only replies that cannot be
+    # repaired cost another LLM call
+    raw = None
+    for attempt in range(max_retries):
+        if attempt > 0:
+            get_tracer().count("retries")
+        check_deadline("proposal")
+        raw = llm(list(prompt))
+        try:
+            parsed, _ = parse_structured(raw, PROPOSAL_SCHEMA)
+        except StructuredOutputError as e:
+            prompt.append({"role": "assistant", "content": str(raw)})
+            prompt.append({"role": "user", "content": (
+                f"Your last output was not usable: {e}. Reply with only the JSON object with a "
+                "\"new_feature_computation\" dictionary, in the STRICT format."
+            )})
+            continue
+        # Feature specs are text; a nested spec (e.g. {"formula": ..., "reason": ...}) is kept as its string
+        strategy = {str(k): v if isinstance(v, str) else json.dumps(v, default=str)
+                    for k, v in parsed["new_feature_computation"].items()}
+        if history is not None:
+            # Drop repeats of earlier proposals before they reach generation and evaluation
+            strategy, repeats = history.split_repeats(strategy)
+            if repeats:
+                print(f"🔁 Skipping already tried features: {list(repeats)}")
+            if not strategy:
+                prompt.append({"role": "assistant", "content": str(raw)})
+                prompt.append({"role": "user", "content": (
+                    f"All of these features were already tried: {list(repeats)}. "
+                    "Propose different features, in the same STRICT JSON format."
+                )})
+                continue
+        return strategy
+
+    raise RuntimeError(f"Failed after {max_retries} retries. Last output: {raw}")
+
+
+def commit_proposal(state, strategy):
+    """Records a proposal in the history and makes it the state's construction strategy."""
+    history = getattr(state, "proposal_history", None)
+    if history is not None:
+        history.record_proposals(strategy, getattr(state, "iterations", None))
+    state.construct_strategy = strategy
+
+
+def feat_proposal(llm, max_retries=3, pipeline=None, retrieval_k=RETRIEVAL_K):
     """
     Proposes new features to be created from existing features.
     Limits proposals to simple, interpretable features (max 10).
+
+    Args:
+        llm: LLM wrapper
+        max_retries: LLM calls allowed per proposal
+        pipeline: optional `pipelining.ProposalPipeline`; a proposal drafted during the last evaluation is used
+            instead of a new LLM call when the fresh report did not change materially
+        retrieval_k: manuscript passages added to the prompt (0: none)
     """
     def agent_node(state):
-        description = state.features_description
-        summary = state.literature_review
-        target = state.target
-        report = state.eval_report
-
-        system_message = (
-            "You are a scientific feature engineering assistant.\n\n"
-            "Task: Propose new features to create from existing features. "
-            "Use the given feature descriptions, literature summary, target definition, "
-            "and previous run reports.\n\n"
-            "STRICT RULES FOR FEATURE CREATION:\n"
-            "1. Propose at most 10 new features.\n"
-            "2. Each feature must use simple operations:\n"
-            "   - basic arithmetic (+, -, *, /)\n"
-            "   - ratios or differences\n"
-            "   - statistical summaries (mean, variance, min, max, std)\n"
-            "3. Each feature can involve at most 3 original columns.\n"
-            "4. Use no more than 5 operations per feature.\n"
-            "5. Avoid overly complex, nested, or hard-to-compute transformations.\n"
-            "6. Prefer simple and interpretable features that are meaningful for science and ML.\n\n"
-            "Output format (STRICT JSON Dictionary):\n"
-            "{\n"
-            '  \"new_feature_computation\": { \"feature_name\": \"explanation of how to derive from existing features\", ... }\n'
-            "}\n"
-        )
-
-        # Convert report dict into readable string for LLM
-        report_str = json.dumps(report, indent=2)
-
-        user_msg = (
-            "\n==== Existing Features ====\n"
-            f"{description}\n"
-            "==== Literature Summary ====\n"
-            f"{summary}\n"
-            "==== Target Specification ====\n"
-            f"{target}\n"
-            "==== Previous Runs Report ====\n"
-            f"{report_str}\n"
-            "\nInstructions:\n"
-            "- Suggest no more than 5 simple, interpretable features.\n"
-            "- Use only basic arithmetic, ratios, differences, or statistical summaries.\n"
-            "- Each feature must be practical to compute in pandas/numpy.\n"
-            "- Follow the strict JSON format.\n"
-        )
-
-        prompt = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_msg}
-        ]
-
-        def is_valid_result(result):
-            try:
-                parsed = json.loads(result)
-                return "new_feature_computation" in parsed
-            except Exception:
-                return False
-    
-        raw = None
-        for _ in range(max_retries):
-            raw = llm(prompt)
-            if is_valid_result(raw):
-                parsed = json.loads(raw)  
-                state.construct_strategy = parsed["new_feature_computation"]
-                return 
-
-        raise RuntimeError(f"Failed after {max_retries} retries. Last output: {raw}")
+        strategy = pipeline.take_draft(state) if pipeline is not None else None
+        if strategy is None:
+            strategy = propose_features(llm, state, state.eval_report, max_retries, retrieval_k)
+        commit_proposal(state, strategy)
 
     return agent_node
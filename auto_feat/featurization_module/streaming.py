@@ -0,0 +1,470 @@
+"""
+Chunked (out-of-core) execution of validated feature code over CSV/Parquet sources.
+
+Feature code is written against a whole DataFrame `df`. Row-wise code can run chunk by chunk unchanged, but
+global statistics (e.g. `df['A'].mean()` or `np.std(df['B'])`) would silently become per-chunk statistics. The
+code is therefore rewritten so that every mergeable aggregate goes through a hook: collection passes accumulate
+exact global values over all chunks, and the final pass substitutes them while writing augmented Parquet shards.
+Aggregates whose inputs depend on other aggregates get extra collection passes (one per level of dependency).
+`prim.zscore` is expanded into its mean and std so that it goes through the same hook. Operations that cannot be
+merged across chunks (median, rank, cumsum, groupby, the group-wise primitives, ...) are rejected up front.
+Chunks are cleaned like the in-memory data before any code runs, and the shards keep the columns of the code
+already applied, so each iteration only runs its new code block.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import ast
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from auto_feat.featurization_module.primitives import GLOBAL_PRIMITIVES, PRIM_NAME, STREAMABLE_PRIMITIVES, namespace
+from auto_feat.first_pass.data_clean.clean import apply_clean
+
+
+AGG_HOOK = "__autofeat_agg__"
+
+# Manifest of the shards in a shard directory: cache key, code applied so far, shard paths and row count
+SHARD_MANIFEST = "_autofeat_shards.json"
+
+# Aggregates that can be merged exactly across chunks: method name -> default ddof (None: not applicable)
+MERGEABLE_METHODS = {"mean": None, "sum": None, "min": None, "max": None, "count": None, "std": 1, "var": 1}
+MERGEABLE_NUMPY = {
+    "mean": "mean", "nanmean": "mean", "average": "mean",
+    "sum": "sum", "nansum": "sum",
+    "min": "min", "nanmin": "min", "amin": "min",
+    "max": "max", "nanmax": "max", "amax": "max",
+    "std": "std", "nanstd": "std",
+    "var": "var", "nanvar": "var",
+}
+NUMPY_ALIASES = {"np", "numpy"}
+
+# Operations whose result depends on rows outside the current chunk
+UNSUPPORTED = {
+    "median", "quantile", "mode", "nunique", "unique", "value_counts", "describe", "rank",
+    "cumsum", "cumprod", "cummax", "cummin", "shift", "diff", "pct_change", "rolling", "expanding", "ewm",
+    "groupby", "transform", "sort_values", "drop_duplicates", "duplicated", "idxmax", "idxmin",
+    "nlargest", "nsmallest", "percentile", "nanpercentile", "nanmedian", "nanquantile", "corr", "cov",
+} | GLOBAL_PRIMITIVES - STREAMABLE_PRIMITIVES   # e.g. prim.group_agg, prim.binning
+
+
+class StreamingUnsupportedError(ValueError):
+    """Raised when feature code uses an operation that cannot be computed chunk by chunk."""
+
+
+def _is_global_call(node: ast.Call) -> Optional[Tuple[str, ast.expr, Optional[int]]]:
+    """
+    If `node` is a mergeable global aggregate, returns (statistic, receiver expression, ddof); else None.
+    Calls with an axis other than 0 (row-wise) or with positional arguments are not global aggregates.
+    """
+    kwargs = {kw.arg: kw.value for kw in node.keywords}
+    axis = kwargs.get("axis")
+    if axis is not None and not (isinstance(axis, ast.Constant) and axis.value in (0, "index")):
+        return None
+    ddof = kwargs.get("ddof")
+    if ddof is not None and not isinstance(ddof, ast.Constant):
+        return None
+    func = node.func
+
+    # np.mean(x), np.nanstd(x, ddof=1), ...
+    if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id in NUMPY_ALIASES
+            and func.attr in MERGEABLE_NUMPY and len(node.args) == 1):
+        stat = MERGEABLE_NUMPY[func.attr]
+        default_ddof = 0 if stat in ("std", "var") else None
+        return stat, node.args[0], ddof.value if ddof is not None else default_ddof
+
+    # df['A'].mean(), (df['A'] / df['B']).std(ddof=0), ...
+    if (isinstance(func, ast.Attribute) and func.attr in MERGEABLE_METHODS and not node.args
+            and not (isinstance(func.value, ast.Name) and func.value.id in NUMPY_ALIASES)):
+        return func.attr, func.value, ddof.value if ddof is not None else MERGEABLE_METHODS[func.attr]
+    return None
+
+
+def _names(node: ast.AST) -> Set[str]:
+    """Returns the DataFrame columns ('col:<name>') and variables ('var:<name>') read inside an expression."""
+    names = set()
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Subscript) and isinstance(sub.value, ast.Name) and sub.value.id == "df":
+            if isinstance(sub.slice, ast.Constant):
+                names.add(f"col:{sub.slice.value}")
+            else:
+                names.add("col:*")
+        elif isinstance(sub, ast.Attribute) and isinstance(sub.value, ast.Name) and sub.value.id == "df":
+            names.add(f"col:{sub.attr}")
+        elif isinstance(sub, ast.Name) and sub.id != "df":
+            names.add(f"var:{sub.id}")
+        elif isinstance(sub, ast.Name) and sub.id == "df":
+            names.add("col:*")
+    return names
+
+
+def _targets(stmt: ast.stmt) -> Set[str]:
+    """Returns the columns and variables written by a statement."""
+    if isinstance(stmt, ast.Assign):
+        targets = stmt.targets
+    elif isinstance(stmt, (ast.AugAssign, ast.AnnAssign)):
+        targets = [stmt.target]
+    else:
+        # Compound statements (loops, ifs, ...) may write anything they assign internally
+        return {t for sub in ast.walk(stmt) if isinstance(sub, ast.stmt) and sub is not stmt for t in _targets(sub)}
+    written = set()
+    for target in targets:
+        for sub in ast.walk(target):
+            if isinstance(sub, ast.Subscript) and isinstance(sub.value, ast.Name) and sub.value.id == "df":
+                if isinstance(sub.slice, ast.Constant):
+                    written.add(f"col:{sub.slice.value}")
+            elif isinstance(sub, ast.Name) and sub.id != "df":
+                written.add(f"var:{sub.id}")
+    return written
+
+
+def _expand_primitive(node: ast.Call) -> ast.expr:
+    """Rewrites prim.zscore(x) as prim.standardize(x, x.mean(), x.std(ddof=0)), whose statistics are mergeable."""
+    func = node.func
+    if not (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == PRIM_NAME
+            and len(node.args) == 1 and not node.keywords):
+        raise StreamingUnsupportedError(f"Unsupported call of a global primitive: {ast.unparse(node)}")
+    x = ast.unparse(node.args[0])
+    expanded = ast.parse(f"{PRIM_NAME}.standardize({x}, ({x}).mean(), ({x}).std(ddof=0))", mode="eval").body
+    return ast.copy_location(expanded, node)
+
+
+class _AggregateRewriter(ast.NodeTransformer):
+    """Replaces mergeable aggregates with hook calls and records their dependency level."""
+
+    def __init__(self, levels: Dict[str, int]) -> None:
+        self.levels = levels
+        self.aggregates: List[Dict[str, Any]] = []
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else None
+        if name in STREAMABLE_PRIMITIVES:
+            return self.visit(_expand_primitive(node))
+        if name in UNSUPPORTED:
+            raise StreamingUnsupportedError(
+                f"`{name}` needs rows from all chunks and cannot be streamed: {ast.unparse(node)}"
+            )
+        match = _is_global_call(node)
+        if match is None:
+            return self.generic_visit(node)
+
+        stat, receiver, ddof = match
+        before = len(self.aggregates)
+        receiver = self.visit(receiver)
+        nested = [agg["level"] for agg in self.aggregates[before:]]
+        level = 1 + max([self.levels.get(n, 0) for n in _names(receiver)] + nested + [0])
+        index = len(self.aggregates)
+        self.aggregates.append({"stat": stat, "ddof": ddof, "level": level, "source": ast.unparse(node)})
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id=AGG_HOOK, ctx=ast.Load()),
+                args=[ast.Constant(index), receiver],
+                keywords=[],
+            ),
+            node,
+        )
+
+
+def rewrite_global_aggregates(code: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Rewrites mergeable global aggregates in feature code into hook calls.
+
+    Raises:
+        StreamingUnsupportedError: if the code uses operations that cannot be computed chunk by chunk.
+
+    Returns:
+        (rewritten code, aggregates) where each aggregate is {"stat", "ddof", "level", "source"} and `level` is
+        the number of collection passes needed before its value is exact.
+    """
+    tree = ast.parse(code)
+    levels: Dict[str, int] = {}
+    rewriter = _AggregateRewriter(levels)
+    body = []
+    for stmt in tree.body:
+        before = len(rewriter.aggregates)
+        stmt = rewriter.visit(stmt)
+        body.append(stmt)
+        # Anything written by this statement is only exact once the aggregates (and inputs) it reads are
+        level = max([agg["level"] for agg in rewriter.aggregates[before:]]
+                    + [levels.get(n, 0) for n in _names(stmt)] + [0])
+        for name in _targets(stmt):
+            levels[name] = max(levels.get(name, 0), level)
+    tree.body = body
+    return ast.unparse(ast.fix_missing_locations(tree)), rewriter.aggregates
+
+
+class _Accumulator:
+    """Mergeable running statistics (count, sum, sum of squares, min, max) of one aggregate."""
+
+    def __init__(self, stat: str, ddof: Optional[int]) -> None:
+        self.stat = stat
+        self.ddof = ddof
+        self.columns = None
+        self.n = self.total = self.sumsq = None
+        self.lo = self.hi = None
+
+    @staticmethod
+    def _as_matrix(values: Any) -> Tuple[np.ndarray, Optional[pd.Index]]:
+        if isinstance(values, pd.DataFrame):
+            return values.to_numpy(dtype=np.float64, na_value=np.nan), values.columns
+        if isinstance(values, pd.Series):
+            return values.to_numpy(dtype=np.float64, na_value=np.nan).reshape(-1, 1), None
+        return np.asarray(values, dtype=np.float64).reshape(len(values), -1), None
+
+    def add(self, values: Any) -> None:
+        try:
+            matrix, columns = self._as_matrix(values)
+        except (TypeError, ValueError) as e:
+            raise StreamingUnsupportedError(f"Cannot stream a {self.stat} over non-numeric values: {e}")
+        self.columns = columns
+        valid = ~np.isnan(matrix)
+        n = valid.sum(axis=0)
+        total = np.where(valid, matrix, 0.0).sum(axis=0)
+        sumsq = np.where(valid, matrix ** 2, 0.0).sum(axis=0)
+        lo = np.where(valid, matrix, np.inf).min(axis=0, initial=np.inf)
+        hi = np.where(valid, matrix, -np.inf).max(axis=0, initial=-np.inf)
+        if self.n is None:
+            self.n, self.total, self.sumsq, self.lo, self.hi = n, total, sumsq, lo, hi
+        else:
+            self.n = self.n + n
+            self.total = self.total + total
+            self.sumsq = self.sumsq + sumsq
+            self.lo = np.minimum(self.lo, lo)
+            self.hi = np.maximum(self.hi, hi)
+
+    def value(self) -> Any:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n = self.n.astype(np.float64)
+            if self.stat == "count":
+                result = n
+            elif self.stat == "sum":
+                result = self.total
+            elif self.stat == "mean":
+                result = self.total / n
+            elif self.stat == "min":
+                result = np.where(np.isinf(self.lo), np.nan, self.lo)
+            elif self.stat == "max":
+                result = np.where(np.isinf(self.hi), np.nan, self.hi)
+            else:
+                var = (self.sumsq - self.total ** 2 / n) / (n - self.ddof)
+                var = np.where(n - self.ddof > 0, np.maximum(var, 0.0), np.nan)
+                result = np.sqrt(var) if self.stat == "std" else var
+        if self.columns is not None:
+            return pd.Series(result, index=self.columns)
+        return float(result[0])
+
+
+def iter_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yields a CSV or Parquet file as DataFrames of at most `chunksize` rows."""
+    if path.endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Streaming Parquet sources requires `pyarrow` (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def read_sample(path: str, n_rows: int) -> pd.DataFrame:
+    """Reads the first `n_rows` rows of a CSV or Parquet file."""
+    if path.endswith((".parquet", ".pq")):
+        return next(iter_chunks(path, n_rows))
+    return pd.read_csv(path, nrows=n_rows)
+
+
+def _normalize_dtypes(chunk: pd.DataFrame, text_columns: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Casts columns to chunk-independent dtypes so that all shards share one Parquet schema: `text_columns` (known
+    from the in-memory sample) are always strings, even in a chunk where they happen to be all missing.
+    """
+    out = {}
+    for col in chunk.columns:
+        values = chunk[col]
+        if col not in text_columns and (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+            out[col] = values.astype(np.float64)
+        else:
+            out[col] = values.astype("string")
+    return pd.DataFrame(out, index=chunk.index)
+
+
+def collect_aggregates(code_blocks: List[str],
+                       chunks: Callable[[], Iterable[pd.DataFrame]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Computes the exact global value of every mergeable aggregate of the feature code over all chunks.
+
+    Args:
+        code_blocks: accepted feature code, applied in order
+        chunks: returns a fresh iterator over the data chunks (called once per collection pass)
+
+    Raises:
+        StreamingUnsupportedError: if the code uses operations that cannot be computed chunk by chunk.
+
+    Returns:
+        (rewritten code, aggregates) where each aggregate is {"stat", "ddof", "level", "source", "value"}
+    """
+    code, aggregates = rewrite_global_aggregates("\n".join(code_blocks))
+    compiled = compile(code, "<feature code>", "exec")
+    final: Dict[int, Any] = {}
+
+    def hook(index, values):
+        if index in final:
+            return final[index]
+        # Collection pass: accumulate, and keep the code running with the chunk-local value
+        accumulators[index].add(values)
+        local = _Accumulator(aggregates[index]["stat"], aggregates[index]["ddof"])
+        local.add(values)
+        return local.value()
+
+    # Aggregates of level p become exact at the end of pass p
+    n_passes = max([agg["level"] for agg in aggregates] + [0])
+    for level in range(1, n_passes + 1):
+        accumulators = {i: _Accumulator(agg["stat"], agg["ddof"])
+                        for i, agg in enumerate(aggregates) if i not in final}
+        for chunk in chunks():
+            exec(compiled, {AGG_HOOK: hook, **namespace()}, {"df": chunk})
+        for i, acc in accumulators.items():
+            if aggregates[i]["level"] == level:
+                final[i] = acc.value()
+    return code, [{**agg, "value": final[i]} for i, agg in enumerate(aggregates)]
+
+
+def _source_fingerprint(path: str) -> List[Any]:
+    """Cheap identity of a source file (size and modification time) for the shard cache."""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _read_manifest(shard_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(shard_dir, SHARD_MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if all(os.path.exists(p) for p in manifest.get("shards", [])) else None
+
+
+def stream_features(code_blocks: List[str],
+                    source_path: str,
+                    shard_dir: str,
+                    chunksize: int = 100_000,
+                    coerced_columns: Sequence[str] = (),
+                    target: Optional[str] = None,
+                    text_columns: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Applies feature code chunk by chunk over a CSV/Parquet source and writes augmented Parquet shards.
+
+    Every chunk first goes through the same clean-up as the in-memory data (`clean.apply_clean`: placeholders to
+    NaN, the coerced columns parsed as numbers, rows without a target dropped). The shards keep the columns of
+    the code already applied, recorded in a manifest next to them: when the accepted code only grew since the
+    last call, just the new blocks run, over the existing shards, instead of all code over the whole source.
+
+    Args:
+        code_blocks: accepted feature code, applied in order (each block may read columns created by earlier ones)
+        source_path: CSV or Parquet file with the original data
+        shard_dir: output directory; existing `part-*.parquet` shards in it are replaced
+        chunksize: rows per chunk (and per shard)
+        coerced_columns: columns DataClean converted from text to numbers
+        target: target column; rows where it is missing are dropped (None: keep all rows)
+        text_columns: columns written as strings in every shard (default: by the dtype of each chunk)
+
+    Raises:
+        StreamingUnsupportedError: if the code uses operations that cannot be computed chunk by chunk.
+
+    Returns:
+        dict with the shard paths, number of rows, number of passes, the global aggregates used and the number of
+        code blocks reused from the existing shards
+    """
+    key = {"source": _source_fingerprint(source_path), "chunksize": chunksize,
+           "coerced_columns": list(coerced_columns), "target": target}
+    manifest = _read_manifest(shard_dir)
+    applied = manifest["code"] if manifest and manifest["key"] == key else None
+    reuse = applied is not None and applied == list(code_blocks[:len(applied)])
+
+    if reuse:
+        # Only the new blocks, over the shards that already hold the columns of the earlier ones
+        new_blocks = list(code_blocks[len(applied):])
+        shard_paths = list(manifest["shards"])
+
+        def chunks() -> Iterator[pd.DataFrame]:
+            return (pd.read_parquet(path) for path in shard_paths)
+    else:
+        new_blocks = list(code_blocks)
+        shard_paths = None
+
+        def chunks() -> Iterator[pd.DataFrame]:
+            return (apply_clean(chunk, coerced_columns, target) for chunk in iter_chunks(source_path, chunksize))
+
+    if reuse and not new_blocks:
+        return {"shards": shard_paths, "n_rows": manifest["n_rows"], "passes": 0, "aggregates": [],
+                "cached_blocks": len(applied)}
+
+    code, aggregates = collect_aggregates(new_blocks, chunks)
+    compiled = compile(code, "<feature code>", "exec")
+    values = [agg["value"] for agg in aggregates]
+
+    def run(chunk: pd.DataFrame) -> pd.DataFrame:
+        local_vars = {"df": chunk}
+        exec(compiled, {AGG_HOOK: lambda index, _: values[index], **namespace()}, local_vars)
+        return local_vars["df"]
+
+    # Final pass: apply the code with exact global values and write one shard per chunk. Shards are written
+    # next to the current ones and only swapped in once every chunk succeeded, so code that fails on a chunk
+    # leaves the shards and the manifest of the accepted code as they were
+    os.makedirs(shard_dir, exist_ok=True)
+    shards, n_rows = [], 0
+    try:
+        for i, chunk in enumerate(chunks()):
+            augmented = _normalize_dtypes(run(chunk), text_columns)
+            path = shard_paths[i] if reuse else os.path.join(shard_dir, f"part-{i:05d}.parquet")
+            augmented.to_parquet(f"{path}.tmp", index=False)
+            shards.append(path)
+            n_rows += len(augmented)
+    except BaseException:
+        for path in shards:
+            if os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
+        raise
+    if not reuse:
+        for name in os.listdir(shard_dir):
+            if name.startswith("part-") and name.endswith(".parquet"):
+                os.remove(os.path.join(shard_dir, name))
+    for path in shards:
+        os.replace(f"{path}.tmp", path)
+
+    with open(os.path.join(shard_dir, SHARD_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"key": key, "code": list(code_blocks), "shards": shards, "n_rows": n_rows}, f)
+    return {
+        "shards": shards,
+        "n_rows": n_rows,
+        "passes": max([agg["level"] for agg in aggregates] + [0]) + 1,
+        "aggregates": aggregates,
+        "cached_blocks": len(applied) if reuse else 0,
+    }
+
+
+def stream_state(state: object,
+                 code_blocks: Optional[List[str]] = None,
+                 sample: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Writes the shards of a streaming-mode state (its accepted code over its source, cleaned with the DataClean
+    decisions made on the sample) and points the evaluator at them.
+
+    Args:
+        code_blocks: code to apply instead of `state.accepted_code` (e.g. with a block not accepted yet)
+        sample: in-memory frame giving the column types, instead of `state.clean_augmented_data`
+    """
+    report = getattr(state, "clean_report", None)
+    sample = state.clean_augmented_data if sample is None else sample
+    text_columns = [c for c in sample.columns
+                    if not pd.api.types.is_numeric_dtype(sample[c]) or pd.api.types.is_bool_dtype(sample[c])]
+    stats = stream_features(
+        state.accepted_code if code_blocks is None else code_blocks, state.data_path, state.shard_dir, state.chunksize,
+        coerced_columns=list((report or {}).get("coerced_to_numeric") or {}),
+        target=state.target if report is not None else None,
+        text_columns=text_columns,
+    )
+    state.augmented_data_path = state.shard_dir
+    return stats
@@ -1,5 +1,7 @@
 """
 Scripts to define what needs to happen on the first pass, that is, things that only happen once, including:
+- streaming profile of the raw data
+- lexical (BM25) index of the manuscript passages
 - literature summarization 
 - generation of raw feature descriptions
 - raw data clean-up
@@ -0,0 +1,182 @@
+"""
+Vectorized clean-up of the raw dataset before the first evaluation.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+import re
+
+import numpy as np
+import pandas as pd
+
+# Column names marking identifiers and bibliographic metadata rather than physical quantities
+METADATA_PATTERN = re.compile(r"^\s*(identifier|reference)\b|\b(id|doi|url|title|author|authors|citation)\s*$",
+                              re.IGNORECASE)
+
+# Strings that stand for a missing value in hand-curated tables
+PLACEHOLDERS = ("", "-", "--", "?", "na", "n/a", "nan", "none", "null", "not reported", "unknown")
+
+# A number, optionally qualified and followed by a short unit: "1,200", "~300", "<5", "25 °C", "3.2e-4 wt%"
+# (identifiers such as DOIs or "10.1016/j.x" and longer text do not match)
+NUMBER_PATTERN = (r"^\s*[~<>≈≤≥]?\s*([-+]?(?:\d[\d,]*\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+                  r"\s*(?:[%A-Za-zµμ°$][\w°µμ/^$%·.\- ]{0,15})?\s*$")
+
+
+def normalize_missing(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Replaces placeholder strings (any case, surrounding whitespace) and infinities by NaN."""
+    changed = {}
+    out = df.copy()
+    for col in out.columns:
+        values = out[col]
+        if pd.api.types.is_numeric_dtype(values):
+            mask = np.isinf(values.to_numpy(dtype=float, na_value=np.nan))
+        elif values.dtype == object or pd.api.types.is_string_dtype(values):
+            mask = values.astype("string").str.strip().str.lower().isin(PLACEHOLDERS).fillna(False).to_numpy()
+        else:
+            continue
+        if mask.any():
+            out.loc[mask, col] = np.nan
+            changed[col] = int(mask.sum())
+    return out, changed
+
+
+def parse_numbers(values: pd.Series) -> pd.Series:
+    """Parses numbers written with units, thousands separators or qualifiers; NaN where a value does not parse."""
+    return pd.to_numeric(
+        values.astype("string").str.extract(NUMBER_PATTERN, expand=False).str.replace(",", "", regex=False),
+        errors="coerce",
+    )
+
+
+def apply_clean(df: pd.DataFrame, coerced_columns: Iterable[str] = (), target: Optional[str] = None) -> pd.DataFrame:
+    """
+    Replays the row-level clean-up of `clean_dataset` with decisions already made: placeholder strings and
+    infinities become NaN, the given columns are parsed as numbers and, with a target, rows without it are dropped.
+    Used for data that never goes through `clean_dataset` as a whole (streamed chunks, new data to score).
+    """
+    df, _ = normalize_missing(df)
+    for col in coerced_columns:
+        if col in df.columns:
+            df[col] = parse_numbers(df[col]).astype(float)
+    if target is not None and target in df.columns:
+        df = df.loc[df[target].notna().to_numpy()].reset_index(drop=True)
+    return df
+
+
+def coerce_numeric(df: pd.DataFrame, min_parsed: float = 0.9) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Converts text columns whose non-missing values are numbers (possibly with units, thousands separators or
+    qualifiers such as "~" and "<") to floats, when at least `min_parsed` of them parse.
+
+    Returns:
+        (frame, {column: number of values that did not parse and became NaN})
+    """
+    coerced = {}
+    out = df.copy()
+    for col in out.columns:
+        values = out[col]
+        if not (values.dtype == object or pd.api.types.is_string_dtype(values)):
+            continue
+        present = values.notna()
+        if not present.any():
+            continue
+        parsed = parse_numbers(values)
+        n_parsed = int(parsed[present].notna().sum())
+        if n_parsed >= min_parsed * int(present.sum()):
+            out[col] = parsed.astype(float)
+            coerced[col] = int(present.sum()) - n_parsed
+    return out, coerced
+
+
+def metadata_columns(df: pd.DataFrame, columns: Iterable[str], max_unique_ratio: float = 0.9) -> Dict[str, str]:
+    """
+    Finds identifier and reference columns: metadata names (IDENTIFIER/REFERENCE prefixes, *id, doi, title, ...)
+    and free-text columns whose values are nearly all distinct.
+
+    Returns:
+        {column: reason}
+    """
+    found = {}
+    n = max(len(df), 1)
+    for col in columns:
+        if METADATA_PATTERN.search(str(col)):
+            found[col] = "identifier/reference metadata"
+        elif df[col].dtype == object and df[col].nunique(dropna=True) > max_unique_ratio * n and n > 20:
+            found[col] = "free text with a distinct value per row"
+    return found
+
+
+def clean_dataset(df: pd.DataFrame,
+                  target: str,
+                  feature_keys: Iterable[str],
+                  drop_rows: bool = True,
+                  max_missing: float = 0.99) -> Tuple[pd.DataFrame, list, Dict[str, Any]]:
+    """
+    Cleans the raw frame and the list of model features.
+
+    Steps: placeholder strings and infinities become NaN; numeric-looking text columns become floats; rows without a
+    target are dropped (if `drop_rows`); identifier/reference columns and columns missing in more than `max_missing`
+    of the rows are excluded from the features. Remaining NaNs are left to the models, which handle them natively.
+
+    Returns:
+        (clean frame, feature keys, report of every change)
+    """
+    report: Dict[str, Any] = {"rows_before": int(len(df))}
+    df, report["placeholders_to_nan"] = normalize_missing(df)
+    df, report["coerced_to_numeric"] = coerce_numeric(df)
+
+    if drop_rows:
+        has_target = df[target].notna().to_numpy()
+        report["dropped_missing_target"] = int((~has_target).sum())
+        df = df.loc[has_target].reset_index(drop=True)
+    report["rows_after"] = int(len(df))
+
+    feature_keys = [k for k in feature_keys if k in df.columns and k != target]
+    excluded = metadata_columns(df, feature_keys)
+    missing = df[feature_keys].isna().mean() if feature_keys else pd.Series(dtype=float)
+    for col in missing[missing > max_missing].index:
+        excluded.setdefault(col, f"{missing[col]:.0%} missing")
+    report["excluded_features"] = excluded
+    return df, [k for k in feature_keys if k not in excluded], report
+
+
+def data_clean(max_missing: float = 0.99):
+    """
+    Graph node cleaning the dataset after the Summarizer (see `clean_dataset`).
+
+    Args:
+        max_missing: columns missing in a larger share of the rows are excluded from the features
+    """
+    def cleaner(state):
+        """
+        state must provide:
+          - state.clean_augmented_data: pandas.DataFrame (raw dataset)
+          - state.cur_feature_keys: list of feature names
+          - state.target: str, target column name
+
+        state will be updated with:
+          - state.clean_augmented_data: cleaned frame (rows with a target only)
+          - state.cur_feature_keys: without identifier/reference and (almost) empty columns
+          - state.clean_report: dict describing every change
+          - state.augmented_data_path: the cleaned shards (streaming mode)
+        """
+        df, feature_keys, report = clean_dataset(
+            state.clean_augmented_data, state.target, state.cur_feature_keys, max_missing=max_missing,
+        )
+        state.clean_augmented_data = df
+        state.cur_feature_keys = feature_keys
+        state.clean_report = report
+
+        # In streaming mode the frame is only a sample: the decisions made on it are replayed chunk by chunk over
+        # the whole source, into the shards H2O reads (imported here, as streaming itself uses this module)
+        if getattr(state, "streaming", False):
+            from auto_feat.featurization_module.streaming import stream_state
+
+            stats = stream_state(state)
+            print(f"🧱 Cleaned {stats['n_rows']} rows into {len(stats['shards'])} shards")
+
+        print(f"🧹 Data clean: {report['rows_before']} → {report['rows_after']} rows, "
+              f"{len(report['coerced_to_numeric'])} columns coerced to numeric, "
+              f"{len(report['excluded_features'])} columns excluded from features")
+        for col, reason in report["excluded_features"].items():
+            print(f"   - excluded {col}: {reason}")
+
+    return cleaner
@@ -0,0 +1,3 @@
+"""
+Scripts to profile the raw data in one streaming pass
+"""
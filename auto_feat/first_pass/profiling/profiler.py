@@ -0,0 +1,279 @@
+"""
+One-pass streaming profile of the raw dataset.
+
+The file is read chunk by chunk (see `streaming.iter_chunks`) and every column feeds fixed-size sketches, so memory
+stays bounded by the chunk size whatever the file size:
+  - quantiles: a KLL-style compactor sketch (levels of at most `k` sorted values, each item of level h standing for
+    2^h original values)
+  - top categories: Misra-Gries heavy hitters (at most `k` counters; exact while no counter was evicted)
+  - cardinality: HyperLogLog over 64-bit value hashes (exact when the heavy-hitter table never overflowed)
+Profiles are cached by the content hash of the file and the profiling parameters, in memory and optionally as JSON
+files.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.featurization_module.streaming import iter_chunks
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Profiles computed in this process, by file hash and profiling parameters
+_PROFILE_CACHE: Dict[str, Dict[str, Any]] = {}
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the file content, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of a stream of floats in O(k log n) memory.
+
+    Args:
+        k: capacity of each level (rank error is roughly log2(n / k) / k)
+        seed: seed of the random compaction offsets
+    """
+
+    def __init__(self, k: int = 256, seed: int = 0) -> None:
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self.k:
+                buf = np.sort(self.levels[h])
+                keep = buf[len(buf) - len(buf) % 2:]   # the odd one out stays at this level
+                promoted = buf[int(self._rng.integers(2)):len(buf) - len(buf) % 2:2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cum = values[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, np.asarray(qs) * cum[-1], side="left")
+        return [float(values[min(i, len(values) - 1)]) for i in idx]
+
+
+class HeavyHitters:
+    """
+    Misra-Gries summary of the most frequent values (counts are lower bounds, short by at most n / (k + 1)).
+
+    Args:
+        k: number of counters kept
+    """
+
+    def __init__(self, k: int = 64) -> None:
+        self.k = k
+        self.counts: Dict[Any, int] = {}
+        self.overflowed = False
+
+    def update(self, counts: pd.Series) -> None:
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) > self.k:
+            self.overflowed = True
+            threshold = sorted(self.counts.values(), reverse=True)[self.k]
+            self.counts = {v: c - threshold for v, c in self.counts.items() if c > threshold}
+
+    def top(self, n: int) -> List[List[Any]]:
+        return [[v, c] for v, c in sorted(self.counts.items(), key=lambda item: -item[1])[:n]]
+
+
+class HyperLogLog:
+    """
+    Distinct-count estimate from 2^p registers.
+
+    Args:
+        p: register index bits (relative error about 1.04 / sqrt(2^p))
+    """
+
+    def __init__(self, p: int = 12) -> None:
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> None:
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes << np.uint64(self.p)
+        # Rank = position of the leftmost 1-bit in the remaining 64 - p bits
+        with np.errstate(divide="ignore"):
+            msb = np.where(rest > 0, np.floor(np.log2(rest.astype(float))), -1.0)
+        rank = np.clip(64 - msb, 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def estimate(self) -> float:
+        m = float(len(self.registers))
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = int(np.sum(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)   # linear counting for small cardinalities
+        return float(estimate)
+
+
+class ColumnProfiler:
+    """Accumulates the statistics of one column over chunks."""
+
+    def __init__(self, k: int = 256, top_k: int = 64) -> None:
+        self.count = 0
+        self.nulls = 0
+        self.dtypes: List[str] = []
+        self.numeric_count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.sketch = QuantileSketch(k)
+        self.heavy = HeavyHitters(top_k)
+        self.hll = HyperLogLog()
+
+    def update(self, values: pd.Series) -> None:
+        if str(values.dtype) not in self.dtypes:
+            self.dtypes.append(str(values.dtype))
+        self.count += len(values)
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+        if pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present):
+            # Integers and floats hash alike, so chunks inferred with different dtypes agree
+            present = present.astype(float)
+            x = present.to_numpy()
+            x = x[np.isfinite(x)]
+            if len(x):
+                self.numeric_count += len(x)
+                self.total += float(x.sum())
+                self.total_sq += float(np.dot(x, x))
+                self.min = min(self.min, float(x.min()))
+                self.max = max(self.max, float(x.max()))
+                self.sketch.update(x)
+        else:
+            present = present.astype(str)
+        self.heavy.update(present.value_counts(sort=False))
+        self.hll.update(pd.util.hash_pandas_object(present, index=False).to_numpy())
+
+    def result(self, top: int = 5) -> Dict[str, Any]:
+        numeric = self.numeric_count > 0 and not any(d in ("object", "string", "bool") for d in self.dtypes)
+        out: Dict[str, Any] = {
+            "dtype": self.dtypes[0] if len(self.dtypes) == 1 else "/".join(self.dtypes),
+            "null_fraction": self.nulls / self.count if self.count else 0.0,
+            "distinct": len(self.heavy.counts) if not self.heavy.overflowed else int(round(self.hll.estimate())),
+            "distinct_exact": not self.heavy.overflowed,
+        }
+        if numeric:
+            mean = self.total / self.numeric_count
+            out.update({
+                "min": self.min, "max": self.max, "mean": mean,
+                "std": max(self.total_sq / self.numeric_count - mean * mean, 0.0) ** 0.5,
+                "quantiles": dict(zip([f"p{int(q * 100):02d}" for q in QUANTILES], self.sketch.quantiles(QUANTILES))),
+            })
+        out["top"] = [[str(v), c] for v, c in self.heavy.top(top)]
+        return out
+
+
+def profile_dataset(path: str, chunksize: int = 100_000, k: int = 256, top: int = 5) -> Dict[str, Any]:
+    """
+    Profiles a CSV or Parquet file in one streaming pass.
+
+    Args:
+        path: data file
+        chunksize: rows per chunk
+        k: capacity of the quantile sketch levels (and a quarter of it: number of heavy-hitter counters)
+        top: most frequent values reported per column
+
+    Returns:
+        {"rows", "columns": {column: {"dtype", "null_fraction", "distinct", "distinct_exact", "top"
+        [, "min", "max", "mean", "std", "quantiles"]}}}
+    """
+    columns: Dict[str, ColumnProfiler] = {}
+    rows = 0
+    for chunk in iter_chunks(path, chunksize):
+        rows += len(chunk)
+        for col in chunk.columns:
+            if col not in columns:
+                columns[col] = ColumnProfiler(k, max(top, k // 4))
+            columns[col].update(chunk[col])
+    return {"rows": rows, "columns": {col: prof.result(top) for col, prof in columns.items()}}
+
+
+def load_profile(path: str,
+                 cache_dir: Optional[str] = None,
+                 chunksize: int = 100_000,
+                 k: int = 256,
+                 top: int = 5) -> Dict[str, Any]:
+    """
+    Returns the profile of a data file, computing it only when no profile of the same content and parameters is
+    cached.
+
+    Args:
+        path: data file
+        cache_dir: directory of cached profiles (<key>.json); None keeps them in memory only
+        chunksize, k, top: profiling parameters (see `profile_dataset`)
+    """
+    content = file_hash(path)
+    key = hashlib.sha256(json.dumps([content, chunksize, k, top]).encode("utf-8")).hexdigest()
+    if key in _PROFILE_CACHE:
+        return _PROFILE_CACHE[key]
+    cache_path = os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    else:
+        profile = {"file_hash": content, **profile_dataset(path, chunksize=chunksize, k=k, top=top)}
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f, indent=2)
+            os.replace(tmp_path, cache_path)
+    _PROFILE_CACHE[key] = profile
+    return profile
+
+
+def format_profile(profile: Dict[str, Any], max_categories: int = 5, max_label: int = 30) -> str:
+    """
+    Compact text of a profile for prompts: one line per column.
+
+    Numeric columns show range and quantiles; text and low-cardinality columns show their most frequent values.
+    """
+    def num(x):
+        return f"{x:.4g}"
+
+    lines = [f"{profile['rows']} rows"]
+    for col, stats in profile["columns"].items():
+        parts = [stats["dtype"], f"{stats['null_fraction']:.1%} null",
+                 f"{'' if stats['distinct_exact'] else '~'}{stats['distinct']} distinct"]
+        if "quantiles" in stats:
+            parts.append(f"range [{num(stats['min'])}, {num(stats['max'])}]")
+            parts.append("p5/25/50/75/95 " + "/".join(num(v) for v in stats["quantiles"].values()))
+        if stats["top"] and ("quantiles" not in stats or stats["distinct"] <= max_categories):
+            total = profile["rows"] or 1
+            parts.append("top " + ", ".join(
+                f"{str(v)[:max_label]} ({c / total:.0%})" for v, c in stats["top"][:max_categories]
+            ))
+        lines.append(f"- {col}: " + "; ".join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,3 @@
+"""
+Scripts to index the manuscript passages for targeted retrieval
+"""
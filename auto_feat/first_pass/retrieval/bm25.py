@@ -0,0 +1,249 @@
+"""
+Lexical (BM25) retrieval over manuscript passages.
+
+The manuscript(s) are split into overlapping passages of a fixed number of words and indexed once in an inverted
+index (term -> passages containing it, with term frequencies). Agents then retrieve the few passages relevant to
+the target and to the features under discussion instead of carrying the whole literature in every prompt, so
+prompts stay small however many papers are loaded: the Summarizer reads the full text only while it fits
+`MANUSCRIPT_CHARS` (otherwise the passages most relevant to the target and the data columns, up to that size),
+and the literature context of the proposal and generation prompts (summary plus passages) is capped at
+`LITERATURE_CHARS`. Indexes are cached by the content hash of the manuscripts and the chunking parameters, in
+memory and optionally as JSON files.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Union
+import hashlib
+import json
+import math
+import os
+import re
+
+import numpy as np
+
+from auto_feat.first_pass.profiling.profiler import file_hash
+
+# Indexes built in this process, by cache key
+_INDEX_CACHE: Dict[str, "BM25Index"] = {}
+
+# Passages retrieved per proposal or generation prompt
+RETRIEVAL_K = 4
+# Size of the manuscript text the Summarizer reads (longer manuscripts: their most relevant passages)
+MANUSCRIPT_CHARS = 60_000
+# Size of the literature context (summary plus passages) of a proposal or generation prompt
+LITERATURE_CHARS = 6_000
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.-][a-z0-9]+)*")
+_WORD = re.compile(r"\S+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can for from has have in into is it its of on or such than that the their "
+    "these this those to was were which with within without we our not also may more most other only".split()
+)
+
+
+def _stem(token: str) -> str:
+    """Minimal plural stripping, so that "alloys" matches "alloy" and "properties" matches "property"."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms (decimals and hyphenated words kept whole), stopwords removed."""
+    return [_stem(t) for t in _TOKEN.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def chunk_text(text: str, source: str = "", chunk_words: int = 120, overlap: int = 30) -> List[Dict[str, Any]]:
+    """
+    Splits a text into passages of `chunk_words` words, consecutive passages sharing `overlap` words.
+
+    Returns:
+        [{"source", "start" (character offset), "text"}]
+    """
+    words = list(_WORD.finditer(text))
+    step = max(1, chunk_words - overlap)
+    passages = []
+    for i in range(0, max(len(words) - overlap, 1), step):
+        window = words[i:i + chunk_words]
+        if not window:
+            break
+        passages.append({"source": source, "start": window[0].start(),
+                         "text": text[window[0].start():window[-1].end()]})
+    return passages
+
+
+class BM25Index:
+    """
+    Inverted index of passages scored with Okapi BM25.
+
+    Args:
+        passages: [{"source", "start", "text"}] from `chunk_text`
+        k1: term-frequency saturation
+        b: document-length normalization
+    """
+
+    def __init__(self, passages: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75) -> None:
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        postings: Dict[str, List[List[int]]] = {}
+        doc_len = []
+        for i, passage in enumerate(passages):
+            counts = Counter(tokenize(passage["text"]))
+            doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append([i, tf])
+        self._set_postings({t: np.array(p, dtype=np.int64).T for t, p in postings.items()}, doc_len)
+
+    def _set_postings(self, postings: Dict[str, np.ndarray], doc_len: Sequence[int]) -> None:
+        self.postings = postings   # term -> 2 x n array of (passage index, term frequency)
+        self.doc_len = np.asarray(doc_len, dtype=float)
+        self.avg_len = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+
+    def idf(self, term: str) -> float:
+        n_docs = len(self.passages)
+        df = self.postings[term].shape[1] if term in self.postings else 0
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every passage for the query (each distinct query term counted once)."""
+        scores = np.zeros(len(self.passages))
+        if not len(self.passages):
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avg_len, 1e-9))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            docs, tf = self.postings[term]
+            scores[docs] += self.idf(term) * tf * (self.k1 + 1) / (tf + norm[docs])
+        return scores
+
+    def search(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
+        """Top-k passages with a positive score, best first, in the passage format plus "score"."""
+        scores = self.scores(query)
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [{**self.passages[i], "score": float(scores[i])} for i in top if scores[i] > 0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k1": self.k1, "b": self.b, "passages": self.passages, "doc_len": self.doc_len.astype(int).tolist(),
+            "postings": {t: p.tolist() for t, p in self.postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BM25Index":
+        index = cls.__new__(cls)
+        index.passages, index.k1, index.b = data["passages"], data["k1"], data["b"]
+        index._set_postings({t: np.array(p, dtype=np.int64).reshape(2, -1) for t, p in data["postings"].items()},
+                            data["doc_len"])
+        return index
+
+
+def manuscript_paths(path: Union[str, Sequence[str], None]) -> List[str]:
+    """The manuscript path(s) of a state as a list."""
+    if not path:
+        return []
+    return [path] if isinstance(path, str) else list(path)
+
+
+def load_index(paths: Union[str, Sequence[str]],
+               cache_dir: Optional[str] = None,
+               chunk_words: int = 120,
+               overlap: int = 30) -> BM25Index:
+    """
+    Returns the index of the manuscript(s), building it only when no index of the same content is cached.
+
+    Args:
+        paths: manuscript text file(s)
+        cache_dir: directory of cached indexes (<key>.json); None keeps them in memory only
+        chunk_words: words per passage
+        overlap: words shared by consecutive passages
+    """
+    paths = manuscript_paths(paths)
+    key = hashlib.sha256(
+        json.dumps([[file_hash(p) for p in paths], chunk_words, overlap]).encode("utf-8")
+    ).hexdigest()
+    if key in _INDEX_CACHE:
+        return _INDEX_CACHE[key]
+    cache_path = os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            index = BM25Index.from_dict(json.load(f))
+    else:
+        passages = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                passages.extend(chunk_text(f.read(), os.path.basename(path), chunk_words, overlap))
+        index = BM25Index(passages)
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index.to_dict(), f)
+            os.replace(tmp_path, cache_path)
+    _INDEX_CACHE[key] = index
+    return index
+
+
+def format_passages(hits: List[Dict[str, Any]], max_chars: int = 800, budget_chars: Optional[int] = None) -> str:
+    """
+    Compact text of retrieved passages for prompts (each cut to `max_chars`), best first; with `budget_chars`,
+    passages are added only while the whole text fits it.
+    """
+    lines, size = [], 0
+    for hit in hits:
+        text = " ".join(hit["text"].split())
+        if len(text) > max_chars:
+            text = text[:max_chars] + "..."
+        line = f"- [{hit['source']} @{hit['start']}] {text}"
+        if budget_chars is not None and size + len(line) + 1 > budget_chars:
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines) or "None"
+
+
+def select_passages(index: BM25Index, query: str, budget_chars: int) -> str:
+    """
+    Text of the passages most relevant to a query, taken best first while they fit `budget_chars` and then put
+    back in document order (overlapping passages are merged), for reading in place of the whole manuscript.
+    """
+    chosen, size = [], 0
+    for hit in index.search(query, k=len(index.passages)):
+        if size + len(hit["text"]) > budget_chars:
+            continue
+        chosen.append(hit)
+        size += len(hit["text"])
+    parts: List[str] = []
+    last: Optional[Dict[str, Any]] = None
+    for hit in sorted(chosen, key=lambda h: (h["source"], h["start"])):
+        end = hit["start"] + len(hit["text"])
+        if last is not None and last["source"] == hit["source"] and hit["start"] <= last["end"]:
+            parts[-1] += hit["text"][last["end"] - hit["start"]:]
+        else:
+            parts.append(f"[{hit['source']} @{hit['start']}] {hit['text']}")
+        if last is None or last["source"] != hit["source"] or end > last["end"]:
+            last = {"source": hit["source"], "end": end}
+    return "\n\n[...]\n\n".join(parts)
+
+
+def retrieve_passages(state: object, query: str, k: int = RETRIEVAL_K, budget_chars: Optional[int] = None) -> str:
+    """
+    Top-k manuscript passages for a query, formatted for a prompt ("None" without a readable manuscript), within
+    `budget_chars` when given.
+
+    Uses the index on the state (`state.manuscript_index`, built by the Summarizer) or loads it.
+    """
+    paths = manuscript_paths(getattr(state, "manuscript_path", None))
+    if k <= 0 or not paths:
+        return "None"
+    index = getattr(state, "manuscript_index", None)
+    if index is None:
+        try:
+            index = load_index(paths, cache_dir=getattr(state, "retrieval_cache_dir", None))
+        except (OSError, TypeError) as e:
+            print(f"Error indexing manuscript: {e}")
+            return "None"
+        state.manuscript_index = index
+    return format_passages(index.search(query, k), budget_chars=budget_chars)
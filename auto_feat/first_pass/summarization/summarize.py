@@ -1,4 +1,11 @@
-import ast
+import os
+
+from auto_feat.deadline import check_deadline
+from auto_feat.first_pass.profiling.profiler import format_profile, load_profile
+from auto_feat.first_pass.retrieval.bm25 import MANUSCRIPT_CHARS, load_index, manuscript_paths, select_passages
+from auto_feat.featurization_module.streaming import read_sample
+from auto_feat.instrumentation import get_tracer
+from auto_feat.LLM_API.structured import SUMMARY_SCHEMA, StructuredOutputError, parse_structured
 
 
 def summarize(llm, max_retries=10):
@@ -21,23 +28,38 @@ def summarize(llm, max_retries=10):
         manuscript_path = state.manuscript_path
         data_path = state.data_path
 
-        # Read the manuscript file
+        # Read the manuscript file(s) and index their passages for the later agents (cached by content hash)
         try:
-            with open(manuscript_path, 'r', encoding='utf-8') as f:
-                manuscript_text = f.read()
+            texts = []
+            for path in manuscript_paths(manuscript_path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    texts.append((os.path.basename(path), f.read()))
+            manuscript_text = texts[0][1] if len(texts) == 1 else "\n\n".join(
+                f"==== {name} ====\n{text}" for name, text in texts
+            )
+            state.manuscript_index = load_index(manuscript_path,
+                                                cache_dir=getattr(state, "retrieval_cache_dir", None))
         except Exception as e:
             print(f"Error reading manuscript file: {e}")
             return
 
-        # Read the data file
+        # Read a few rows of the data file and profile all of it in one streaming pass (cached by file hash)
         try:
-            with open(data_path, 'r', encoding='utf-8') as f:
-                data_lines = f.readlines()[:5]  # Read first 5 lines
-                data_text = ''.join(data_lines)
+            sample = read_sample(data_path, 5)
+            data_text = sample.to_csv(index=False)
+            if getattr(state, "data_profile", None) is None:
+                state.data_profile = load_profile(data_path, cache_dir=getattr(state, "profile_cache_dir", None))
+            profile_text = format_profile(state.data_profile)
         except Exception as e:
             print(f"Error reading data file: {e}")
             return
 
+        # Manuscripts too long to read whole are replaced by their passages most relevant to the target and the
+        # data columns, up to the same size (see first_pass.retrieval)
+        if len(manuscript_text) > MANUSCRIPT_CHARS:
+            query = " ".join([str(getattr(state, "target", "") or "")] + [str(c) for c in sample.columns])
+            manuscript_text = select_passages(state.manuscript_index, query, MANUSCRIPT_CHARS)
+
         # ---------------- SYSTEM PROMPT ----------------
         system_message = (
             "System: You are tasked with understanding and summarizing a scientific text with particular attention to the use of the data for development of machine learning models.\n\n"
@@ -57,11 +79,14 @@ def summarize(llm, max_retries=10):
         )
 
         # ---------------- USER PROMPT ----------------
+        # The manuscript comes first so that it is a byte-identical prefix for every call on the same paper
         user_msg = (
             "\n==== Manuscript text ====\n"
             f"{manuscript_text}\n"
             "==== Data ====\n"
             f"{data_text}\n"
+            "==== Data Profile (all rows) ====\n"
+            f"{profile_text}\n"
             "\n\nInstructions:\n"
             "No extra instructions necessary\n"
         )
@@ -71,30 +96,30 @@ def summarize(llm, max_retries=10):
                 {"role": "user", "content": user_msg}
             ]
 
-        # Retry loop:
-        def is_valid_result(result):
-
-            resd = ast.literal_eval(result)
+        # Retry loop: replies are repaired locally when possible (see LLM_API.structured); only replies that
+        # cannot be repaired or miss required keys cost another LLM call
+        raw = None
+        for attempt in range(max_retries):
+            if attempt > 0:
+                get_tracer().count("retries")
+            check_deadline("summarization")
+            raw = llm(list(prompt))
             try:
-                check1 = 'manuscript_summary' in resd.keys()
-                check2 = 'column_key' in resd.keys()
-                check3 = 'notes' in resd.keys()
-                check4 = len(resd['column_key'].keys()) > 1
-                check = check1 and check2 and check3 and check4
-
-            except Exception as e:
-                print(f'json improperly formated: {resd}')
-                return False
-
-            return check
-        
-        for _ in range(max_retries):
-            raw = llm(prompt)
-            resd = ast.literal_eval(raw)
-            if is_valid_result(raw):
-                state.literature_review = resd['manuscript_summary']  # update the state with the result
-                state.features_description = resd['column_key']      # update the state with the result
-                return
+                resd, _ = parse_structured(raw, SUMMARY_SCHEMA)
+                if len(resd['column_key']) <= 1:
+                    raise StructuredOutputError("'column_key' must have one entry per data column")
+            except StructuredOutputError as e:
+                print(f'summary improperly formatted ({e}): {raw}')
+                # Repair turn: the original request stays unchanged (a cacheable prefix), a short correction is appended
+                prompt.append({"role": "assistant", "content": str(raw)})
+                prompt.append({"role": "user", "content": (
+                    f"Your last output was not usable: {e}. Reply with only a dictionary with the keys "
+                    "'manuscript_summary', 'column_key' (one entry per data column) and 'notes', in the STRICT format."
+                )})
+                continue
+            state.literature_review = resd['manuscript_summary']  # update the state with the result
+            state.features_description = resd['column_key']      # update the state with the result
+            return
         # If we exhaust all retries, we can return the an error or raise an exception
         raise RuntimeError(f"Failed after {max_retries} retries. Last output: {raw}")
 
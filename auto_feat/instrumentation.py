@@ -0,0 +1,198 @@
+"""
+Per-node timing, token and resource instrumentation for the LangGraph pipeline.
+
+Graph nodes are wrapped with `Tracer.wrap`, which opens a record for each node run. Code running inside a node
+(e.g. `chatbox` or the evaluator) reports into the active record through `get_tracer()`, without having to pass
+the tracer around. When no tracer is active, `get_tracer()` returns a `NullTracer` whose methods do nothing.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# Numeric fields accumulated on every node record
+COUNTERS = (
+    "llm_calls",
+    "llm_latency_s",
+    "prompt_tokens",
+    "completion_tokens",
+    "retries",
+    "cancelled",
+    "format_repairs",
+    "llm_retries",
+    "rate_limited",
+    "llm_throttled_s",
+    "llm_coalesced",
+    "llm_fast_calls",
+    "llm_escalations",
+    "drafts_used",
+    "drafts_discarded",
+    "prompt_chars",
+    "prefix_reused_chars",
+    "h2o_upload_s",
+    "h2o_train_s",
+    "h2o_predict_s",
+    "zoo_train_s",
+)
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of the current process in MB (0 where it cannot be measured)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 ** 2) if sys.platform == "darwin" else peak / 1024
+
+
+class NullTracer:
+    """Tracer that records nothing; used when instrumentation is disabled."""
+
+    enabled = False
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        return fn
+
+    def count(self, field: str, n: float = 1) -> None:
+        pass
+
+    def record_llm_call(self, latency: float, usage: Any = None, **fields: Any) -> None:
+        pass
+
+    @contextmanager
+    def timer(self, field: str) -> Iterator[None]:
+        yield
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return []
+
+    def draft_hit_rate(self) -> Optional[float]:
+        return None
+
+
+NULL_TRACER = NullTracer()
+_active_tracer: ContextVar = ContextVar("autofeat_tracer", default=NULL_TRACER)
+_active_record: ContextVar = ContextVar("autofeat_trace_record", default=None)
+
+
+def get_tracer():
+    """Returns the tracer of the node currently running, or the no-op tracer."""
+    return _active_tracer.get()
+
+
+class Tracer(NullTracer):
+    """
+    Records one entry per graph node run (wall time, LLM latency and tokens, retries, H2O timings, peak RSS) and
+    one entry per LLM call.
+
+    Args:
+        state_attr: name of the state attribute the per-iteration summary table is attached to after every node
+    """
+
+    enabled = True
+
+    def __init__(self, state_attr: str = "trace_summary") -> None:
+        self.state_attr = state_attr
+        self.nodes: List[Dict[str, Any]] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """Wraps a graph node so that each of its runs is recorded."""
+        def traced_node(state):
+            record = {"node": name, "iteration": getattr(state, "iterations", None), **{c: 0 for c in COUNTERS}}
+            tracer_token = _active_tracer.set(self)
+            record_token = _active_record.set(record)
+            start = time.perf_counter()
+            record["start_s"] = start - self._t0
+            try:
+                return fn(state)
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                record["wall_s"] = time.perf_counter() - start
+                record["peak_rss_mb"] = peak_rss_mb()
+                _active_record.reset(record_token)
+                _active_tracer.reset(tracer_token)
+                with self._lock:
+                    self.nodes.append(record)
+                setattr(state, self.state_attr, self.summary())
+        return traced_node
+
+    def count(self, field: str, n: float = 1) -> None:
+        """Adds `n` to a counter of the active node record."""
+        record = _active_record.get()
+        if record is not None:
+            with self._lock:
+                record[field] = record.get(field, 0) + n
+
+    def record_llm_call(self, latency: float, usage: Any = None, **fields: Any) -> None:
+        """Records one LLM round trip (latency in seconds, OpenAI-style `usage` object) on the active node."""
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        record = _active_record.get()
+        with self._lock:
+            self.llm_calls.append({
+                "node": record["node"] if record else None,
+                "iteration": record["iteration"] if record else None,
+                "latency_s": latency,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                **fields,
+            })
+        self.count("llm_calls")
+        self.count("llm_latency_s", latency)
+        self.count("prompt_tokens", prompt_tokens)
+        self.count("completion_tokens", completion_tokens)
+
+    @contextmanager
+    def timer(self, field: str) -> Iterator[None]:
+        """Adds the elapsed time of the block to a counter of the active node record."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.count(field, time.perf_counter() - start)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Returns one row per iteration with totals over its node runs and the wall time of each node."""
+        rows: Dict[Any, Dict[str, Any]] = {}
+        with self._lock:
+            for record in self.nodes:
+                row = rows.setdefault(record["iteration"], {
+                    "iteration": record["iteration"], "wall_s": 0.0, **{c: 0 for c in COUNTERS}, "nodes": {},
+                })
+                row["wall_s"] += record["wall_s"]
+                for c in COUNTERS:
+                    row[c] += record[c]
+                row["nodes"][record["node"]] = row["nodes"].get(record["node"], 0.0) + record["wall_s"]
+                row["peak_rss_mb"] = max(row.get("peak_rss_mb", 0.0), record["peak_rss_mb"])
+        return list(rows.values())
+
+    def draft_hit_rate(self) -> Optional[float]:
+        """Share of the proposal drafts of pipelined mode that were used (None: no drafts)."""
+        with self._lock:
+            used = sum(record["drafts_used"] for record in self.nodes)
+            discarded = sum(record["drafts_discarded"] for record in self.nodes)
+        return used / (used + discarded) if used + discarded else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the full trace (node runs, LLM calls, the per-iteration summary and the draft hit rate)."""
+        return {"nodes": list(self.nodes), "llm_calls": list(self.llm_calls), "summary": self.summary(),
+                "draft_hit_rate": self.draft_hit_rate()}
+
+    def to_json(self, path: str) -> None:
+        """Writes the full trace as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
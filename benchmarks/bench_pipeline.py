@@ -0,0 +1,157 @@
+"""
+Offline end-to-end benchmark of the AutoFeaturizer pipeline.
+
+Runs `build_autofeat_graph` against a stub LLM that replays recorded responses (no LLM server needed) on
+synthetically scaled versions of the bundled dataset, and reports per-stage wall time, throughput and peak
+memory. Each configuration runs in a fresh process so that memory figures do not leak between sizes.
+
+Example:
+    python benchmarks/bench_pipeline.py --rows 1500 100000 1000000 --cols 23 200 --latency 0.5 \\
+        --output bench.json --baseline previous_bench.json
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(BENCH_DIR, "..")))
+sys.path.append(BENCH_DIR)
+
+from synthetic import scale_dataset
+
+DATA_DIR = os.path.join(BENCH_DIR, "..", "auto_feat", "data")
+TARGET = "OUTPUT PROPERTY: YS (MPa)"
+
+
+def run_config(n_rows: int, n_cols: int, args: dict) -> dict:
+    """Runs the pipeline once on a synthetic dataset of the given shape and returns its stage statistics."""
+    from auto_feat import AutoFeaturizer
+    from auto_feat.build_graph import build_autofeat_graph
+    from auto_feat.instrumentation import Tracer
+    from auto_feat.LLM_API.replay import ReplayLLM
+
+    source = pd.read_csv(os.path.join(DATA_DIR, "data.csv"))
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "data.csv")
+        start = time.perf_counter()
+        scale_dataset(source, n_rows, n_cols, seed=args["seed"]).to_csv(data_path, index=False)
+        synth_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        state = AutoFeaturizer(
+            target=TARGET,
+            manuscript_path=os.path.join(DATA_DIR, "manuscript.txt"),
+            data_path=data_path,
+            max_iterations=args["iterations"],
+        )
+        load_s = time.perf_counter() - start
+
+        llm = ReplayLLM.from_json(args["responses"], latency_s=args["latency"], jitter=args["jitter"])
+        tracer = Tracer()
+        app = build_autofeat_graph(task="regression", max_retries=3, tracer=tracer, llm=llm).compile()
+        start = time.perf_counter()
+        app.invoke(state)
+        total_s = time.perf_counter() - start
+
+    stages = {}
+    for record in tracer.nodes:
+        stage = stages.setdefault(record["node"], {"runs": 0, "wall_s": 0.0, "llm_latency_s": 0.0,
+                                                   "h2o_train_s": 0.0, "peak_rss_mb": 0.0})
+        stage["runs"] += 1
+        stage["wall_s"] += record["wall_s"]
+        stage["llm_latency_s"] += record["llm_latency_s"]
+        stage["h2o_train_s"] += record["h2o_train_s"]
+        stage["peak_rss_mb"] = max(stage["peak_rss_mb"], record["peak_rss_mb"])
+    for stage in stages.values():
+        stage["rows_per_s"] = n_rows * stage["runs"] / stage["wall_s"] if stage["wall_s"] > 0 else None
+
+    return {
+        "rows": n_rows,
+        "cols": n_cols,
+        "synthesize_s": synth_s,
+        "load_s": load_s,
+        "pipeline_s": total_s,
+        "llm_calls": dict(llm.calls),
+        "stages": stages,
+    }
+
+
+def find_regressions(results: list, baseline: list, tolerance: float) -> list:
+    """Returns a description of every stage that got slower than the baseline by more than `tolerance`."""
+    previous = {(r["rows"], r["cols"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["rows"], result["cols"]))
+        if old is None:
+            continue
+        for name, stage in result["stages"].items():
+            old_stage = old["stages"].get(name)
+            if old_stage and stage["wall_s"] > old_stage["wall_s"] * (1 + tolerance):
+                regressions.append(
+                    f"{name} @ {result['rows']}x{result['cols']}: "
+                    f"{old_stage['wall_s']:.2f}s -> {stage['wall_s']:.2f}s"
+                )
+    return regressions
+
+
+def print_table(results: list) -> None:
+    print(f"\n{'rows':>10} {'cols':>5} {'stage':<15} {'runs':>4} {'wall s':>9} {'LLM s':>8} "
+          f"{'train s':>8} {'rows/s':>12} {'peak MB':>9}")
+    for result in results:
+        for name, stage in result["stages"].items():
+            rows_per_s = f"{stage['rows_per_s']:.0f}" if stage["rows_per_s"] else "-"
+            print(f"{result['rows']:>10} {result['cols']:>5} {name:<15} {stage['runs']:>4} "
+                  f"{stage['wall_s']:>9.2f} {stage['llm_latency_s']:>8.2f} {stage['h2o_train_s']:>8.2f} "
+                  f"{rows_per_s:>12} {stage['peak_rss_mb']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1500, 100_000, 1_000_000])
+    parser.add_argument("--cols", type=int, nargs="+", default=[23, 200])
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated LLM latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="relative jitter of the simulated latency")
+    parser.add_argument("--responses", default=os.path.join(BENCH_DIR, "recorded_responses.json"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown per stage")
+    args = parser.parse_args()
+
+    config = {k: getattr(args, k) for k in ("iterations", "latency", "jitter", "responses", "seed")}
+    results = []
+    for n_rows in args.rows:
+        for n_cols in args.cols:
+            # Fresh process per configuration so peak RSS is not inherited from larger runs
+            ctx = multiprocessing.get_context("spawn")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(run_config, n_rows, n_cols, config).result()
+            print(f"✅ {n_rows} rows x {n_cols} cols: {result['pipeline_s']:.2f}s")
+            results.append(result)
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Performance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Synthetic scaling of the bundled dataset for benchmarking.
+"""
+from typing import Optional
+import warnings
+import numpy as np
+import pandas as pd
+
+
+def scale_dataset(df: pd.DataFrame,
+                  n_rows: int,
+                  n_cols: Optional[int] = None,
+                  noise: float = 0.01,
+                  seed: int = 42) -> pd.DataFrame:
+    """
+    Returns a synthetic version of `df` with `n_rows` rows and (at least) `n_cols` columns.
+
+    Rows are resampled with replacement and floating-point values receive small multiplicative noise, so that
+    the column names, dtypes, sparsity and value ranges of the original data are kept. Extra columns are random
+    linear combinations of the original floating-point columns plus noise, named `SYNTH PROPERTY: <i>`.
+
+    Args:
+        df: source dataset
+        n_rows: number of rows of the synthetic dataset
+        n_cols: total number of columns; defaults to the number of columns of `df`
+        noise: relative standard deviation of the multiplicative noise on numeric values
+        seed: random seed
+    """
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), size=n_rows)].reset_index(drop=True)
+
+    numeric = out.select_dtypes(include="floating").columns
+    values = out[numeric].to_numpy(dtype=np.float64)
+    values *= 1.0 + noise * rng.standard_normal(values.shape)
+    out[numeric] = values
+
+    n_extra = max(0, (n_cols or len(df.columns)) - len(df.columns))
+    if n_extra:
+        # Missing values are filled with column means so that the synthetic columns stay dense
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-empty columns
+            base = np.nan_to_num(values - np.nanmean(values, axis=0), nan=0.0)
+        weights = rng.standard_normal((len(numeric), n_extra)) / np.sqrt(len(numeric))
+        extra = base @ weights + rng.standard_normal((n_rows, n_extra))
+        extra_df = pd.DataFrame(extra, columns=[f"SYNTH PROPERTY: {i}" for i in range(n_extra)])
+        out = pd.concat([out, extra_df], axis=1)
+    return out
@@ -5,6 +5,9 @@ Main entry point for the AutoFeaturizer pipeline.
 import os
 from auto_feat import AutoFeaturizer
 from auto_feat.build_graph import build_autofeat_graph
+from auto_feat.instrumentation import Tracer
+from auto_feat.LLM_API.LLM_chat import chatbox
+from auto_feat.LLM_API.routing import ModelRouter
 
 
 def main():
@@ -25,7 +28,11 @@ def main():
     )
 
     # --- Build LangGraph workflow ---
-    workflow = build_autofeat_graph(task="regression", max_retries=10)
+    tracer = Tracer()
+    router = ModelRouter(chatbox, verbose=True)   # large model for summaries/proposals, fast tier for code and repairs
+    # The fused feature transform and the best model are exported for scoring new data (see auto_feat.export)
+    workflow = build_autofeat_graph(task="regression", max_retries=10, tracer=tracer, llm=router,
+                                    export_dir="autofeat_artifact")
     app = workflow.compile()
 
     # --- Run pipeline ---
@@ -67,6 +74,21 @@ def main():
     print("\n=== Final DataFrame Head ===")
     print(state.clean_augmented_data.head())
 
+    print("\n=== Timing Summary ===")
+    for row in state.trace_summary:
+        print(
+            f"Iteration {row['iteration']}: {row['wall_s']:.1f}s total, "
+            f"LLM {row['llm_latency_s']:.1f}s over {row['llm_calls']} calls, "
+            f"H2O train {row['h2o_train_s']:.1f}s, peak RSS {row['peak_rss_mb']:.0f} MB, "
+            f"prompt prefix reuse {row['prefix_reused_chars'] / max(row['prompt_chars'], 1):.0%}, "
+            f"{row['format_repairs']} replies repaired locally, {row['retries']} retries"
+        )
+    print("\n=== LLM Latency per Model ===")
+    for model, row in router.stats().items():
+        print(f"{model}: {row['calls']} calls ({row['failed']} failed), median {row['median_s']:.1f}s, "
+              f"total {row['total_s']:.1f}s")
+    tracer.to_json("autofeat_trace.json")
+
 
 if __name__ == "__main__":
     main()
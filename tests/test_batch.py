@@ -0,0 +1,55 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.batch import load_manifest, pending_jobs, report_path
+
+
+class TestBatchManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_jsonl_defaults_and_stable_ids(self):
+        path = self._write("jobs.jsonl", "\n".join([
+            json.dumps({"manuscript": "a.txt", "dataset": "a.csv", "target": "YS (MPa)"}),
+            json.dumps({"manuscript": "a.txt", "dataset": "a.csv", "target": "HV", "task": "classification",
+                        "iterations": 5, "id": "hv"}),
+        ]))
+        jobs = load_manifest(path)
+        self.assertEqual(jobs[0]["task"], "regression")
+        self.assertEqual(jobs[0]["iterations"], 3)
+        self.assertEqual(jobs[0]["dataset"], os.path.join(self.tmp.name, "a.csv"))
+        self.assertEqual(jobs[1]["id"], "hv")
+        self.assertEqual(jobs[0]["id"], load_manifest(path)[0]["id"])
+
+    def test_csv_and_validation(self):
+        path = self._write("jobs.csv", "manuscript,dataset,target\nm.txt,d.csv,T\nm.txt,d.csv,\n")
+        with self.assertRaises(ValueError):
+            load_manifest(path)
+
+    def test_existing_reports_are_skipped(self):
+        path = self._write("jobs.json", json.dumps([
+            {"manuscript": "m.txt", "dataset": "d.csv", "target": "A"},
+            {"manuscript": "m.txt", "dataset": "d.csv", "target": "B"},
+        ]))
+        jobs = load_manifest(path)
+        with open(report_path(self.tmp.name, jobs[0]), "w") as f:
+            f.write("{}")
+        self.assertEqual([j["target"] for j in pending_jobs(jobs, self.tmp.name)], ["B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
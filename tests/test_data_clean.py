@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.first_pass.data_clean.clean import clean_dataset, coerce_numeric, data_clean, normalize_missing
+
+
+class DummyState:
+    def __init__(self, df, target):
+        self.clean_augmented_data = df
+        self.cur_feature_keys = [c for c in df.columns if c != target]
+        self.target = target
+        self.clean_report = None
+
+
+class TestDataClean(unittest.TestCase):
+    def setUp(self):
+        n = 30
+        self.df = pd.DataFrame({
+            "IDENTIFIER: Sample ID": [f"S{i}" for i in range(n)],
+            "REFERENCE: doi": ["10.1016/j.actamat.2014.07.023"] * n,
+            "temperature": ["25 °C", "1,200", "~300", "<5", "n/a"] + ["100"] * (n - 5),
+            "phase": ["FCC", "BCC"] * (n // 2),
+            "empty": [None] * n,
+            "ratio": [1.0, np.inf] + [0.5] * (n - 2),
+            "target": [1.0, None] + list(np.arange(n - 2, dtype=float)),
+        })
+
+    def test_placeholders_and_infinities(self):
+        out, changed = normalize_missing(self.df)
+        self.assertTrue(pd.isna(out.loc[4, "temperature"]))
+        self.assertTrue(pd.isna(out.loc[1, "ratio"]))
+        self.assertEqual(changed, {"temperature": 1, "ratio": 1})
+
+    def test_numeric_strings(self):
+        out, coerced = coerce_numeric(normalize_missing(self.df)[0])
+        self.assertEqual(out["temperature"].tolist()[:4], [25.0, 1200.0, 300.0, 5.0])
+        self.assertIn("temperature", coerced)
+        # DOIs start with a number but are not numbers
+        self.assertNotIn("REFERENCE: doi", coerced)
+        self.assertNotIn("phase", coerced)
+
+    def test_clean_dataset(self):
+        df, keys, report = clean_dataset(self.df, "target", [c for c in self.df.columns if c != "target"])
+        self.assertEqual(len(df), 29)
+        self.assertEqual(report["dropped_missing_target"], 1)
+        self.assertEqual(keys, ["temperature", "phase", "ratio"])
+        self.assertEqual(set(report["excluded_features"]), {"IDENTIFIER: Sample ID", "REFERENCE: doi", "empty"})
+
+    def test_node_updates_state(self):
+        state = DummyState(self.df, "target")
+        data_clean()(state)
+        self.assertEqual(len(state.clean_augmented_data), 29)
+        self.assertNotIn("empty", state.cur_feature_keys)
+        self.assertEqual(state.clean_report["rows_before"], 30)
+
+    def test_streaming_writes_clean_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state = DummyState(self.df.head(10), "target")
+            state.streaming = True
+            state.data_path = os.path.join(tmp, "data.csv")
+            state.shard_dir = os.path.join(tmp, "shards")
+            state.chunksize = 8
+            state.accepted_code = []
+            self.df.to_csv(state.data_path, index=False)
+
+            # The decisions are made on the sample and replayed over every chunk of the source
+            data_clean()(state)
+            self.assertEqual(len(state.clean_augmented_data), 9)
+            self.assertEqual(state.augmented_data_path, state.shard_dir)
+            shards = pd.read_parquet(state.shard_dir)
+            expected = clean_dataset(self.df, "target", [])[0]
+            self.assertEqual(len(shards), len(expected))
+            np.testing.assert_array_equal(shards["temperature"].to_numpy(float), expected["temperature"])
+
+
+if __name__ == "__main__":
+    unittest.main()
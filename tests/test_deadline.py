@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from auto_feat import AutoFeaturizer
+from auto_feat.deadline import DeadlineExceeded, RunDeadline, call_with_deadline, check_deadline, time_left
+from auto_feat.featurization_module.execution import feature_generation
+from auto_feat.instrumentation import Tracer
+from auto_feat.LLM_API.routing import ModelRouter
+
+
+class TestDeadline(unittest.TestCase):
+    def test_no_deadline_runs_inline(self):
+        self.assertIsNone(time_left())
+        check_deadline()
+        self.assertEqual(call_with_deadline(sum, [1, 2, 3]), 6)
+
+    def test_overrunning_call_is_cancelled(self):
+        deadline = RunDeadline(node_budgets={"node": 0.3})
+        outcome = {}
+        threads = threading.active_count()
+
+        def node(state):
+            outcome["left"] = time_left()
+            call_with_deadline(exec, "while True:\n    pass\n", {}, {})   # generated code checks the deadline
+
+        state = AutoFeaturizer(target="y")
+        start = time.monotonic()
+        deadline.wrap("node", node)(state)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(threading.active_count(), threads)   # the generated code stopped
+        self.assertLessEqual(outcome["left"], 0.3)
+        self.assertEqual(state.deadline_exceeded["node"], "node")
+        self.assertIsNone(time_left())   # the expiry does not leak out of the node
+
+    def test_uninterruptible_call_is_reported_as_abandoned(self):
+        deadline = RunDeadline(node_budgets={"node": 0.1})
+        state = AutoFeaturizer(target="y")
+        deadline.wrap("node", lambda state: call_with_deadline(time.sleep, 1.0, grace_s=0.1))(state)
+        self.assertIn("still running", state.deadline_exceeded["reason"])
+
+    def test_entry_node_restarts_the_clock(self):
+        deadline = RunDeadline(run_budget_s=0.2)
+        entry = deadline.wrap("entry", lambda state: None, starts_run=True)
+        slow = deadline.wrap("slow", lambda state: time.sleep(0.3) or check_deadline("the end"))
+
+        state = AutoFeaturizer(target="y")
+        entry(state)
+        slow(state)
+        self.assertEqual(state.deadline_exceeded["node"], "slow")
+
+        # Invoking the graph again: a fresh budget, and the earlier cancellation is cleared
+        entry(state)
+        self.assertIsNone(state.deadline_exceeded)
+        deadline.wrap("fast", lambda state: check_deadline("the end"))(state)
+        self.assertIsNone(state.deadline_exceeded)
+
+    def test_cancelled_run_skips_remaining_nodes(self):
+        deadline = RunDeadline(run_budget_s=0.05)
+        calls = []
+
+        def slow(state):
+            calls.append("slow")
+            time.sleep(0.1)
+            check_deadline("next step")
+
+        def later(state):
+            calls.append("later")
+
+        state = AutoFeaturizer(target="y")
+        tracer = Tracer()
+        tracer.wrap("slow", deadline.wrap("slow", slow))(state)
+        deadline.wrap("later", later)(state)
+        self.assertEqual(calls, ["slow"])
+        self.assertEqual(tracer.nodes[0]["cancelled"], 1)
+
+    def test_hanging_generated_code_is_cancelled(self):
+        state = AutoFeaturizer(target="y")
+        state.clean_augmented_data = pd.DataFrame({"x": [1.0, 2.0]})
+        state.construct_strategy = {"x2": "x squared"}
+
+        def llm(prompt, **kwargs):
+            return "```python\nwhile True:\n    df['x2'] = df['x'] ** 2\n```"
+
+        node = RunDeadline(node_budgets={"FeatGeneration": 0.5}).wrap("FeatGeneration", feature_generation(llm, 3))
+        node(state)
+        self.assertEqual(state.deadline_exceeded["node"], "FeatGeneration")
+        self.assertNotIn("x2", state.clean_augmented_data.columns)
+
+    def test_router_does_not_fall_back_on_deadline(self):
+        models = []
+
+        def llm(prompt, model=None, temperature=0.3):
+            models.append(model)
+            raise DeadlineExceeded("out of time")
+
+        router = ModelRouter(llm)
+        prompt = [{"role": "system", "content": "System: You are a Python data engineer."}]
+        with self.assertRaises(DeadlineExceeded):
+            router(prompt)
+        self.assertEqual(len(models), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.featurization_module.dedup import correlation_sketch, feature_dedup, find_duplicates
+
+
+class DummyState:
+    def __init__(self, df, new_features):
+        self.data = df[[c for c in df.columns if c not in new_features]]
+        self.clean_augmented_data = df
+        self.construct_strategy = {f: "..." for f in new_features}
+        self.cur_feature_keys = list(df.columns)
+        self.pruned_features = {}
+
+
+class TestDedup(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        a = rng.normal(size=200)
+        b = rng.normal(size=200)
+        a[::7] = np.nan
+        self.df = pd.DataFrame({
+            "a": a,
+            "b": b,
+            "a_copy": a.copy(),
+            "a_in_mpa": a * 1000 + 5,          # linear rescaling
+            "ab_ratio": a / (np.abs(b) + 1),   # genuinely new
+            "const": np.ones(200),
+        })
+        self.new = ["a_copy", "a_in_mpa", "ab_ratio", "const"]
+
+    def test_correlation_sketch_matches_pandas(self):
+        rho = correlation_sketch(self.df[["ab_ratio"]].to_numpy(), self.df[["a", "b"]].to_numpy())
+        expected = self.df[["ab_ratio", "a", "b"]].corr().loc["ab_ratio", ["a", "b"]].to_numpy()
+        np.testing.assert_allclose(rho[0], expected, atol=1e-10)
+
+    def test_find_duplicates(self):
+        pruned = find_duplicates(self.df, self.new, threshold=0.995)
+        self.assertEqual(set(pruned), {"a_copy", "a_in_mpa", "const"})
+        self.assertIn("identical to 'a'", pruned["a_copy"])
+        self.assertEqual(pruned["const"], "constant")
+
+    def test_near_duplicates_among_new_features(self):
+        df = self.df.assign(ratio_twice=self.df["ab_ratio"] * 2)
+        pruned = find_duplicates(df, ["ab_ratio", "ratio_twice"], threshold=0.995)
+        self.assertEqual(list(pruned), ["ratio_twice"])
+
+    def test_target_is_not_a_duplicate_source(self):
+        df = self.df.assign(b_copy=self.df["b"], b_scaled=self.df["b"] * 3)
+        self.assertEqual(set(find_duplicates(df, ["b_copy", "b_scaled"])), {"b_copy", "b_scaled"})
+        # With "b" as the target, the copies are only compared with each other
+        self.assertEqual(find_duplicates(df, ["b_copy", "b_scaled"], target="b"),
+                         {"b_scaled": "|rho|=1.0000 with 'b_copy'"})
+
+    def test_node_updates_state(self):
+        state = DummyState(self.df, self.new)
+        feature_dedup(threshold=0.995)(state)
+        self.assertEqual(list(state.clean_augmented_data.columns), ["a", "b", "ab_ratio"])
+        self.assertNotIn("a_in_mpa", state.cur_feature_keys)
+        self.assertEqual(set(state.pruned_features), {"a_copy", "a_in_mpa", "const"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat import AutoFeaturizer
+from auto_feat.export import ScoringArtifact, export_artifact, fuse_feature_code, score_file
+
+CODE = [
+    "import pandas as pd\nimport numpy as np\ndf['x_centered'] = df['x'] - df['x'].mean()",
+    "df['ratio'] = prim.safe_ratio(df['x_centered'], df['load'])",
+]
+
+
+def load(source):
+    namespace = {}
+    exec(compile(source, "<transform>", "exec"), namespace)
+    return namespace
+
+
+class TestFuseFeatureCode(unittest.TestCase):
+    def setUp(self):
+        self.train = pd.DataFrame({"x": [1.0, 2.0, 3.0, 6.0], "load": ["1,000 N", "2 kN", "n/a", "500"]})
+
+    def test_global_statistics_are_frozen(self):
+        source, info = fuse_feature_code(CODE, lambda: [self.train], coerced_columns=["load"])
+        self.assertTrue(info["row_wise"])
+        self.assertEqual(info["aggregates"], 1)
+        # Only the primitives the code calls are inlined
+        self.assertIn("def safe_ratio(", source)
+        self.assertNotIn("def zscore(", source)
+        self.assertNotIn("Registry of named", source)
+        transform = load(source)["transform"]
+
+        # One new row: its feature uses the training mean (3.0), not the mean of the chunk
+        out = transform(pd.DataFrame({"x": [5.0], "load": ["4"]}))
+        self.assertEqual(out["x_centered"].tolist(), [2.0])
+        self.assertEqual(out["ratio"].tolist(), [0.5])
+
+        out = transform(self.train)
+        self.assertEqual(out["load"].tolist()[:2], [1000.0, 2.0])
+        self.assertTrue(np.isnan(out["load"][2]))
+
+    def test_rows_without_target_are_left_out_of_statistics(self):
+        train = self.train.assign(y=[1.0, 1.0, 1.0, None])
+        source, _ = fuse_feature_code(CODE[:1], lambda: [train], target="y")
+        self.assertEqual(load(source)["transform"](pd.DataFrame({"x": [4.0]}))["x_centered"].tolist(), [2.0])
+
+    def test_unfreezable_statistics(self):
+        source, info = fuse_feature_code(["df['m'] = df['x'] - df['x'].median()"], lambda: [self.train])
+        self.assertFalse(info["row_wise"])
+        self.assertEqual(load(source)["transform"](self.train)["m"].tolist(), [-1.5, -0.5, 0.5, 3.5])
+
+
+class TestExportArtifact(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        x = rng.uniform(0, 10, 200)
+        self.raw = pd.DataFrame({
+            "x": x,
+            "load": [f"{v:.1f} kN" for v in rng.uniform(1, 5, 200)],
+            "phase": rng.choice(["BCC", "FCC"], 200),
+            "y": 3 * x + rng.normal(0, 0.1, 200),
+        })
+        self.data_path = os.path.join(self.tmp.name, "data.csv")
+        self.raw.to_csv(self.data_path, index=False)
+
+        state = AutoFeaturizer(target="y", data_path=self.data_path)
+        df = state.clean_augmented_data.copy()
+        df["load"] = df["load"].str.replace(" kN", "").astype(float)   # as coerced by DataClean
+        state.clean_report = {"coerced_to_numeric": {"load": 0}}
+        # The run's features: the accepted code applied to the clean frame
+        state.clean_augmented_data = load(fuse_feature_code(CODE, lambda: [df], ["load"])[0])["transform"](df)
+        state.accepted_code = list(CODE)
+        state.datalog = [{"model_id": "H2O_GBM_test", "features": ["x_centered", "ratio", "phase"],
+                          "performance": {"test": {"RMSE": 0.5}}}]
+        self.state = state
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sklearn_artifact_scores_in_chunks(self):
+        out_dir = os.path.join(self.tmp.name, "artifact")
+        manifest = export_artifact(self.state, out_dir, model="sklearn")
+        self.assertEqual(manifest["model"]["format"], "sklearn")
+        self.assertEqual(manifest["text_features"], ["phase"])
+        self.assertTrue(manifest["row_wise"])
+
+        # The artifact imports nothing from auto_feat
+        with open(os.path.join(out_dir, "transform.py"), encoding="utf-8") as f:
+            self.assertNotIn("auto_feat", f.read().replace("auto_feat.export", ""))
+
+        new_data = self.raw.drop(columns="y")
+        whole = ScoringArtifact(out_dir).predict(new_data)["predict"].to_numpy()
+        self.assertLess(np.sqrt(np.mean((whole - self.raw["y"]) ** 2)), 1.0)
+
+        input_path = os.path.join(self.tmp.name, "new.csv")
+        new_data.to_csv(input_path, index=False)
+        for name in ("scored.csv", "scored.parquet"):
+            output_path = os.path.join(self.tmp.name, name)
+            stats = score_file(out_dir, input_path, output_path, chunksize=30)
+            self.assertEqual(stats, {"rows": 200, "chunks": 7})
+            scored = pd.read_csv(output_path) if name.endswith(".csv") else pd.read_parquet(output_path)
+            np.testing.assert_allclose(scored["predict"].to_numpy(), whole)
+            self.assertEqual(list(scored.columns), list(new_data.columns) + ["predict"])
+
+    def test_mojo_requires_the_h2o_model(self):
+        with self.assertRaises(Exception):
+            export_artifact(self.state, os.path.join(self.tmp.name, "mojo"), model="mojo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.featurization_module.feature_store import FeatureStore, frame_hash, source_columns
+from auto_feat.featurization_module.execution import feature_generation
+from auto_feat import AutoFeaturizer
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame({"A": [1.0, 2.0, 3.0], "B": [3.0, 4.0, 5.0]})
+        self.code = "df['feature_sum'] = df['A'] + df['B']"
+
+    def test_put_get_roundtrip(self):
+        store = FeatureStore(self.store_dir)
+        h = frame_hash(self.df)
+        store.put("feature_sum", self.df["A"] + self.df["B"], "sum of A and B", self.code, ["A", "B"], h)
+        store.record_scores({"feature_sum": {"percentage": 0.4}}, h)
+
+        reopened = FeatureStore(self.store_dir)
+        values = reopened.get("feature_sum", "sum of  A and B", h)
+        self.assertIsInstance(values, np.memmap)
+        self.assertEqual(values.tolist(), [4.0, 6.0, 8.0])
+        record = reopened.lookup("feature_sum", "sum of A and B", h)
+        self.assertEqual(record["source_columns"], ["A", "B"])
+        self.assertEqual(record["scores"], [{"percentage": 0.4}])
+        self.assertIsNone(reopened.get("feature_sum", "sum of A and B", "other-dataset"))
+
+    def test_source_columns(self):
+        self.assertEqual(source_columns(self.code + "\ndf['C'] = df.B", ["A", "B", "Z"]), ["A", "B"])
+
+    def test_generation_reuses_stored_features(self):
+        calls = []
+
+        def llm(prompt, **kwargs):
+            calls.append(prompt)
+            return f"```python\n{self.code}\n```"
+
+        for _ in range(2):
+            state = AutoFeaturizer(target="dummy_target", feature_store_path=self.store_dir)
+            state.data = self.df
+            state.clean_augmented_data = self.df
+            state.construct_strategy = {"feature_sum": "sum of A and B"}
+            feature_generation(llm, max_retries=2)(state)
+            self.assertEqual(state.clean_augmented_data["feature_sum"].tolist(), [4.0, 6.0, 8.0])
+
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
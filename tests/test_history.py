@@ -0,0 +1,95 @@
+import unittest
+import json
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.featurization_module.history import ProposalHistory
+from auto_feat.featurization_module.proposal import feat_proposal
+
+
+class DummyState:
+    def __init__(self):
+        self.features_description = {"A": "first", "B": "second"}
+        self.literature_review = "A/B matters."
+        self.target = "T"
+        self.eval_report = None
+        self.iterations = 2
+        self.proposal_history = ProposalHistory()
+        self.construct_strategy = None
+
+
+class TestProposalHistory(unittest.TestCase):
+
+    def test_lookup_by_name_or_spec(self):
+        history = ProposalHistory()
+        history.record_proposals({"A_over_B": "Ratio of A / B"}, iteration=1)
+        self.assertIsNotNone(history.lookup("a over b"))
+        self.assertIsNotNone(history.lookup("ratio_ab", "ratio of  A/B"))
+        self.assertIsNone(history.lookup("A_times_B", "A * B"))
+
+    def test_outcomes_in_digest(self):
+        history = ProposalHistory()
+        history.record_proposals({"r": "A / B", "c": "A * 0", "f": "log A"}, iteration=1)
+        history.update("c", pruned="constant")
+        history.update("f", generated=False)
+        history.update("r", generated=True)
+        previous = {"performance": {"test": {"RMSE": 2.0}}}
+        report = {"performance": {"test": {"RMSE": 1.5}}, "features": ["A", "r"],
+                  "feature_importance": [{"variable": "A", "percentage": 0.75}, {"variable": "r", "percentage": 0.25}]}
+        history.record_evaluation(report, previous, "regression")
+        digest = history.digest()
+        self.assertIn("r (iteration 1): A / B -> importance 25.0%, test RMSE change -0.5", digest)
+        self.assertIn("pruned (constant)", digest)
+        self.assertIn("generation failed", digest)
+
+    def test_classification_uses_the_verdict_metric(self):
+        history = ProposalHistory()
+        history.record_proposals({"r": "A / B"}, iteration=1)
+        previous = {"performance": {"test": {"Accuracy": 0.80, "LogLoss": 0.5}}}
+        report = {"performance": {"test": {"Accuracy": 0.85, "LogLoss": 0.6}}, "features": ["r"],
+                  "feature_importance": [{"variable": "r", "percentage": 1.0}],
+                  "uncertainty": {"vs_previous": {"metric": "Accuracy", "verdict": "improved"}}}
+        history.record_evaluation(report, previous, "classification")
+        (metric, delta), = history.entries[0]["metric_delta"].items()
+        self.assertEqual(metric, "Accuracy")
+        self.assertAlmostEqual(delta, 0.05)
+        self.assertEqual(history.entries[0]["verdict"], "improved")
+
+    def test_selection_rejections_in_digest(self):
+        history = ProposalHistory()
+        history.record_proposals({"r": "A / B", "s": "A - B"}, iteration=1)
+        report = {"performance": {"test": {"RMSE": 1.5}}, "features": ["A", "r"],
+                  "feature_importance": [{"variable": "A", "percentage": 0.75}, {"variable": "r", "percentage": 0.25}],
+                  "selection": {"pool": ["A", "B", "r", "s"]}}
+        history.record_evaluation(report, None, "regression")
+        self.assertIn("s (iteration 1): A - B -> rejected by feature selection", history.digest())
+
+        # Dropped by a later selection after being evaluated
+        history.record_evaluation({**report, "features": ["A"]}, report, "regression")
+        self.assertIn("-> importance 25.0%, later dropped by feature selection", history.digest())
+
+    def test_proposal_filters_repeats(self):
+        replies = iter([
+            json.dumps({"new_feature_computation": {"a_over_b": "A / B"}}),
+            json.dumps({"new_feature_computation": {"a_minus_b": "A - B", "ratio": "a/b"}}),
+        ])
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return next(replies)
+
+        state = DummyState()
+        state.proposal_history.record_proposals({"A_over_B": "A / B"}, iteration=1)
+        feat_proposal(llm, max_retries=3)(state)
+        self.assertEqual(state.construct_strategy, {"a_minus_b": "A - B"})
+        self.assertIn("A_over_B (iteration 1)", prompts[0][1]["content"])
+        self.assertIn("already tried", prompts[1][-1]["content"])
+        self.assertEqual(len(state.proposal_history), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.eval_module.hparams import EARLY_STOPPING, HyperparamCache, tune_gbm
+
+
+class FakeModel:
+    """Stands in for an H2O estimator: early stopping keeps 40 trees at learn_rate 0.1, 80 at 0.05."""
+
+    def __init__(self, ntrees, **params):
+        self.params = params
+        self.ntrees = min(ntrees, int(4 / params["learn_rate"]))
+
+    def summary(self):
+        return {"number_of_trees": [self.ntrees]}
+
+
+class TestHyperparams(unittest.TestCase):
+
+    def test_tune_gbm_picks_best_grid_point(self):
+        built = []
+
+        def build(ntrees, **params):
+            built.append(params)
+            return FakeModel(ntrees, **params)
+
+        best = tune_gbm(build, lambda m: abs(m.params["max_depth"] - 5) + m.params["learn_rate"], lambda m: None,
+                        max_trees=200)
+        self.assertEqual((best["max_depth"], best["learn_rate"], best["ntrees"]), (5, 0.05, 80))
+        self.assertTrue(all(p["stopping_rounds"] == EARLY_STOPPING["stopping_rounds"] for p in built))
+
+    def test_cache_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hparams.json")
+            key = HyperparamCache.key("abc", "YS", "regression")
+            HyperparamCache(path).put(key, {"max_depth": 5, "ntrees": 80}, valid_loss=1.0)
+            self.assertEqual(HyperparamCache(path).get(key), {"max_depth": 5, "ntrees": 80})
+            self.assertIsNone(HyperparamCache(path).get(HyperparamCache.key("abc", "HV", "regression")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import json
+import tempfile
+import os
+import sys
+from types import SimpleNamespace
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.instrumentation import NULL_TRACER, Tracer, get_tracer
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_node_records_and_summary(self):
+        tracer = Tracer()
+
+        def node(state):
+            get_tracer().record_llm_call(0.5, SimpleNamespace(prompt_tokens=100, completion_tokens=20))
+            get_tracer().count("retries")
+            with get_tracer().timer("h2o_train_s"):
+                pass
+
+        state = SimpleNamespace(iterations=1)
+        tracer.wrap("FeatProposal", node)(state)
+        tracer.wrap("FeatProposal", node)(state)
+
+        self.assertEqual(len(tracer.nodes), 2)
+        self.assertEqual(len(state.trace_summary), 1)
+        row = state.trace_summary[0]
+        self.assertEqual(row["iteration"], 1)
+        self.assertEqual(row["llm_calls"], 2)
+        self.assertEqual(row["prompt_tokens"], 200)
+        self.assertEqual(row["retries"], 2)
+        self.assertIn("FeatProposal", row["nodes"])
+
+        path = os.path.join(tempfile.mkdtemp(), "trace.json")
+        tracer.to_json(path)
+        with open(path) as f:
+            self.assertEqual(len(json.load(f)["llm_calls"]), 2)
+
+    def test_no_op_outside_nodes(self):
+        self.assertIs(get_tracer(), NULL_TRACER)
+        node = lambda state: None
+        self.assertIs(NULL_TRACER.wrap("Evaluation", node), node)
+
+
+if __name__ == "__main__":
+    unittest.main()
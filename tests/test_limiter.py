@@ -0,0 +1,139 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from openai import APITimeoutError, InternalServerError, RateLimitError
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat import AutoFeaturizer
+from auto_feat.deadline import RunDeadline
+from auto_feat.LLM_API import LLM_chat
+from auto_feat.LLM_API.limiter import AdaptiveConcurrency, CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+def api_error(cls, status, headers=None):
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(status, request=request, headers=headers or {})
+    return cls("error", response=response, body=None)
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+class TestLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self._create = LLM_chat.client.chat.completions.create
+
+    def tearDown(self):
+        LLM_chat.client.chat.completions.create = self._create
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        bucket.acquire(1)
+        start = time.monotonic()
+        bucket.acquire(1)
+        self.assertGreater(time.monotonic() - start, 0.005)
+
+    @unittest.skipIf(os.name == "nt", "buckets are shared with flock")
+    def test_token_bucket_shared_across_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "requests.bucket")
+            # Two buckets on the same file stand for two processes: the second one finds the budget spent
+            first = TokenBucket(rate=20, capacity=2, state_path=path)
+            second = TokenBucket(rate=20, capacity=2, state_path=path)
+            self.assertEqual(first.acquire(2), 0.0)
+            self.assertGreater(second.acquire(1), 0.0)
+
+    def test_waits_stop_at_the_deadline(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        bucket.acquire(1)
+        concurrency = AdaptiveConcurrency(initial=1, max_limit=1)
+        concurrency.acquire()
+        for wait in (bucket.acquire, concurrency.acquire):
+            state = AutoFeaturizer(target="y")
+            start = time.monotonic()
+            RunDeadline(node_budgets={"node": 0.2}).wrap("node", lambda s: wait())(state)
+            self.assertLess(time.monotonic() - start, 1.0)
+            self.assertEqual(state.deadline_exceeded["node"], "node")
+
+    def test_aimd(self):
+        concurrency = AdaptiveConcurrency(initial=4, max_limit=8)
+        concurrency.acquire()
+        concurrency.release(overloaded=True)
+        self.assertEqual(concurrency.limit, 2)
+        for _ in range(10):
+            concurrency.acquire()
+            concurrency.release()
+        self.assertGreater(concurrency.limit, 2)
+
+    def test_breaker_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_s=0.01)
+        breaker.record(failed=True)
+        breaker.record(failed=True)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        time.sleep(0.02)
+        breaker.before_call()   # probe
+        breaker.record(failed=False)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_chatbox_fails_fast_when_unhealthy(self):
+        LLM_chat.configure_limiter(failure_threshold=3, cooldown_s=60)
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            raise api_error(InternalServerError, 503)
+
+        LLM_chat.client.chat.completions.create = create
+        with mock.patch.object(LLM_chat.time, "sleep"), self.assertRaises(CircuitOpenError):
+            LLM_chat.chatbox([{"role": "user", "content": "hi"}], max_attempts=10)
+        self.assertEqual(len(calls), 3)
+        with self.assertRaises(CircuitOpenError):
+            LLM_chat.chatbox([{"role": "user", "content": "hi"}])
+        self.assertEqual(len(calls), 3)
+
+    def test_deadline_timeouts_do_not_open_the_breaker(self):
+        limiter = LLM_chat.configure_limiter(failure_threshold=1, cooldown_s=60)
+
+        def create(timeout=None, **kwargs):
+            time.sleep(timeout)
+            raise APITimeoutError(request=httpx.Request("POST", "http://test/v1/chat/completions"))
+
+        LLM_chat.client.chat.completions.create = create
+        state = SimpleNamespace()
+        RunDeadline(node_budgets={"node": 0.2}).wrap(
+            "node", lambda state: LLM_chat.chatbox([{"role": "user", "content": "hi"}]))(state)
+        self.assertEqual(state.deadline_exceeded["node"], "node")
+        self.assertEqual(limiter.breaker.state, "closed")
+        self.assertEqual(limiter.breaker.failures, 0)
+
+    def test_chatbox_retries_429(self):
+        limiter = LLM_chat.configure_limiter(initial_concurrency=4)
+        replies = [api_error(RateLimitError, 429, {"retry-after": "1"}), completion(" ok ")]
+
+        def create(**kwargs):
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        LLM_chat.client.chat.completions.create = create
+        with mock.patch.object(LLM_chat.time, "sleep") as sleep:
+            self.assertEqual(LLM_chat.chatbox([{"role": "user", "content": "hi"}]), "ok")
+        sleep.assert_called_once_with(1.0)
+        self.assertLess(limiter.concurrency.limit, 4)
+        self.assertEqual(limiter.breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.eval_module.model_zoo import consensus_importance, prepare_matrix, run_model_zoo
+
+
+class TestModelZoo(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 400
+        self.df = pd.DataFrame({
+            "x": rng.normal(size=n),
+            "noise": rng.normal(size=n),
+            "phase": rng.choice(["BCC", "FCC"], size=n),
+            "id": [f"row{i}" for i in range(n)],
+        })
+        self.df["y"] = 3 * self.df["x"] + 2 * (self.df["phase"] == "BCC") + rng.normal(scale=0.1, size=n)
+        self.df.loc[::10, "x"] = np.nan
+        self.df.loc[::13, "y"] = np.nan
+
+    def test_prepare_matrix(self):
+        data = prepare_matrix(self.df, ["x", "noise", "phase", "id"], "y")
+        # One column per numeric feature, one per category; high-cardinality text is dropped
+        self.assertEqual(data["groups"]["x"], [0])
+        self.assertEqual(len(data["groups"]["phase"]), 2)
+        self.assertNotIn("id", data["groups"])
+        self.assertFalse(np.isnan(data["X_train"]).any())
+        self.assertEqual(len(data["X_train"]) + len(data["X_test"]), self.df["y"].notna().sum())
+
+    def test_zoo_and_consensus(self):
+        data = prepare_matrix(self.df, ["x", "noise", "phase"], "y")
+        result = run_model_zoo(data, families=["linear", "gbm"], max_workers=2)
+        self.assertGreater(result["models"]["linear"]["test"]["R2"], 0.9)
+        ranking = [row["variable"] for row in result["consensus_importance"]]
+        self.assertEqual(ranking[0], "x")
+        self.assertEqual(ranking[-1], "noise")
+
+    def test_single_learner_flag(self):
+        consensus = consensus_importance({
+            "linear": {"a": 1.0, "b": 0.0, "c": 0.0},
+            "gbm": {"a": 0.5, "b": 0.5, "c": 0.0},
+        })
+        flags = {row["variable"]: row["single_learner"] for row in consensus}
+        self.assertEqual(flags, {"a": False, "b": True, "c": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
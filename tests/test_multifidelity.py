@@ -0,0 +1,42 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.eval_module.multifidelity import candidate_feature_sets, rung_budgets, successive_halving
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+
+    def test_rung_budgets(self):
+        budgets = rung_budgets(min_fraction=0.1, min_trees=20, max_trees=200, eta=3)
+        self.assertEqual(budgets[0], (0.1, 20))
+        self.assertEqual(budgets[-1], (1.0, 200))
+        fractions = [b[0] for b in budgets]
+        self.assertEqual(fractions, sorted(fractions))
+
+    def test_best_candidate_survives(self):
+        candidates = [["a", "b", "n1", "n2"], ["a", "b", "n2"], ["a", "b", "n1"]] + [["a"]] * 6
+        losses = [1.0, 0.7, 1.1] + [2.0] * 6
+        calls = []
+
+        def score_fn(keys, fraction, ntrees):
+            calls.append((fraction, ntrees))
+            return losses[candidates.index(keys)] + (1 - fraction)
+
+        winner, history = successive_halving(candidates, score_fn, eta=3)
+        self.assertEqual(winner, ["a", "b", "n2"])
+        self.assertEqual(len(history[0]["scores"]), 9)
+        self.assertEqual(len(history[1]["scores"]), 3)
+        # Only a third of the candidates reach the second rung
+        self.assertEqual(len(calls), 9 + 3)
+
+    def test_candidate_feature_sets(self):
+        candidates = candidate_feature_sets(["a", "n1", "n2"], ["n1", "n2", "missing"])
+        self.assertEqual(candidates, [["a", "n1", "n2"], ["a", "n2"], ["a", "n1"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.featurization_module.overlay import ColumnOverlay
+from auto_feat.featurization_module.execution import feature_generation
+from auto_feat import AutoFeaturizer
+
+
+def scripted_llm(responses):
+    """Returns an LLM stub that replays the given responses in order."""
+    replies = iter(responses)
+
+    def llm(prompt, **kwargs):
+        return next(replies)
+    return llm
+
+
+class TestColumnOverlay(unittest.TestCase):
+
+    def setUp(self):
+        self.base = pd.DataFrame({"A": [1.0, 2.0, 3.0], "B": [4.0, 5.0, 6.0]})
+
+    def test_commit_adds_columns_without_touching_base(self):
+        overlay = ColumnOverlay(self.base)
+        with overlay.attempt() as df:
+            df["C"] = df["A"] + df["B"]
+            df["A"] = df["A"] * 10
+            overlay.stage(df)
+
+        self.assertEqual(list(overlay.layer), ["C"])
+        self.assertEqual(overlay.shadowed, ["A"])
+
+        committed = overlay.commit()
+        self.assertEqual(list(committed.columns), ["A", "B", "C"])
+        self.assertEqual(list(self.base.columns), ["A", "B"])
+        self.assertEqual(self.base["A"].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(committed["A"].tolist(), [1.0, 2.0, 3.0])
+        self.assertTrue(np.shares_memory(committed["B"].to_numpy(), self.base["B"].to_numpy()))
+
+    def test_in_place_writes_never_reach_the_base(self):
+        overlay = ColumnOverlay(self.base)
+        with overlay.attempt() as df:
+            with self.assertRaises(ValueError):
+                df.loc[df["A"] > 1, "A"] = 0.0
+            df.fillna(0.0, inplace=True)
+            self.assertTrue(np.shares_memory(df["B"].to_numpy(), self.base["B"].to_numpy()))
+        self.assertEqual(self.base["A"].tolist(), [1.0, 2.0, 3.0])
+        self.assertFalse(pd.get_option("mode.copy_on_write"))   # no process-wide option is changed
+
+    def test_discard_and_row_changes(self):
+        overlay = ColumnOverlay(self.base)
+        with overlay.attempt() as df:
+            df["C"] = 1.0
+            overlay.stage(df)
+        overlay.discard()
+        self.assertIs(overlay.commit(), self.base)
+
+        with overlay.attempt() as df:
+            with self.assertRaises(ValueError):
+                overlay.stage(df.iloc[:2])
+
+    def test_failed_attempt_leaves_no_stray_columns(self):
+        state = AutoFeaturizer(target="dummy_target")
+        state.construct_strategy = {"feature_sum": "sum of A and B"}
+        state.clean_augmented_data = self.base
+
+        llm = scripted_llm([
+            "```python\ndf['stray'] = df['A']\ndf['feature_sum'] = df['Z']\n```",
+            "```python\ndf['feature_sum'] = df['A'] + df['B']\n```",
+        ])
+        feature_generation(llm, max_retries=2)(state)
+
+        self.assertEqual(list(state.clean_augmented_data.columns), ["A", "B", "feature_sum"])
+        self.assertEqual(list(self.base.columns), ["A", "B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
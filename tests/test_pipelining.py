@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import time
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat import AutoFeaturizer
+from auto_feat.instrumentation import Tracer
+from auto_feat.featurization_module.pipelining import ProposalPipeline, report_changed
+from auto_feat.featurization_module.proposal import feat_proposal
+
+
+def report(rmse, top=("a", "b", "c")):
+    importance = [{"variable": v, "percentage": 0.5 / (i + 1)} for i, v in enumerate(top)]
+    return {"performance": {"test": {"RMSE": rmse}}, "feature_importance": importance}
+
+
+class SlowLLM:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return f'{{"new_feature_computation": {{"f{self.calls}": "a divided by b, version {self.calls}"}}}}'
+
+
+class TestReportChanged(unittest.TestCase):
+    def test_material_changes(self):
+        self.assertFalse(report_changed(report(1.0), report(1.005), "regression", tol=0.01))
+        self.assertTrue(report_changed(report(1.0), report(0.95), "regression", tol=0.01))
+        self.assertTrue(report_changed(report(1.0), report(1.0, top=("a", "d", "c")), "regression"))
+        self.assertFalse(report_changed(report(1.0), report(1.03, top=("a", "b", "d")), "regression"))
+        self.assertFalse(report_changed(report(1.0, top=("a", "b", "c")), report(1.0, top=("c", "a", "b")),
+                                        "regression", n_top=3))
+        self.assertTrue(report_changed(None, report(1.0), "regression"))
+
+
+class TestProposalPipeline(unittest.TestCase):
+    def setUp(self):
+        self.state = AutoFeaturizer(target="y", max_iterations=3)
+        self.state.iterations = 1
+        self.state.eval_report = report(1.0)
+
+    def run_iteration(self, llm, fresh_report, eval_s=0.3, tracer=None):
+        pipeline = ProposalPipeline(llm, tol=0.01, tracer=tracer)
+
+        def evaluation(state):
+            time.sleep(eval_s)
+            state.eval_report = fresh_report
+
+        start = time.perf_counter()
+        pipeline.wrap_evaluation(evaluation)(self.state)
+        elapsed = time.perf_counter() - start
+        self.state.iterations += 1
+        proposal = feat_proposal(llm, max_retries=2, pipeline=pipeline)
+        (tracer.wrap("FeatProposal", proposal) if tracer else proposal)(self.state)
+        return elapsed
+
+    def test_draft_overlaps_evaluation_and_is_reused(self):
+        llm = SlowLLM(delay=0.3)
+        tracer = Tracer()
+        elapsed = self.run_iteration(llm, report(1.002), tracer=tracer)
+        self.assertEqual(tracer.draft_hit_rate(), 1.0)
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(list(self.state.construct_strategy), ["f1"])
+        self.assertEqual(self.state.proposal_history.lookup("f1")["iteration"], 2)
+        self.assertIsNone(self.state.proposal_draft)
+
+    def test_material_change_reprompts(self):
+        llm = SlowLLM()
+        self.run_iteration(llm, report(0.8), eval_s=0.0)
+        self.assertEqual(llm.calls, 2)
+        self.assertEqual(list(self.state.construct_strategy), ["f2"])
+        self.assertIsNone(self.state.proposal_history.lookup("f1"))   # the discarded draft is not recorded
+
+    def test_draft_reads_a_snapshot(self):
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt[1]["content"])
+            time.sleep(0.2)
+            return '{"new_feature_computation": {"f": "a / b"}}'
+
+        def evaluation(state):
+            state.proposal_history.record_proposals({"written_by_evaluation": "a * b"}, 1)
+            state.eval_report = report(0.5)
+
+        self.state.eval_report = report(1.0)
+        ProposalPipeline(llm).wrap_evaluation(evaluation)(self.state)
+        self.assertNotIn("written_by_evaluation", prompts[0])
+        self.assertEqual(self.state.proposal_draft["report"], report(1.0))
+
+    def test_failed_evaluation_does_not_wait_for_the_draft(self):
+        def evaluation(state):
+            raise RuntimeError("H2O down")
+
+        start = time.perf_counter()
+        with self.assertRaises(RuntimeError):
+            ProposalPipeline(SlowLLM(delay=1.0)).wrap_evaluation(evaluation)(self.state)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIsNone(self.state.proposal_draft)
+
+    def test_no_draft_after_last_iteration(self):
+        llm = SlowLLM()
+        self.state.iterations = 3
+        ProposalPipeline(llm).wrap_evaluation(lambda state: None)(self.state)
+        self.assertEqual(llm.calls, 0)
+        self.assertIsNone(self.state.proposal_draft)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat import AutoFeaturizer
+from auto_feat.featurization_module import primitives as prim
+from auto_feat.featurization_module.execution import feature_generation
+from auto_feat.featurization_module.streaming import StreamingUnsupportedError, rewrite_global_aggregates
+
+
+class TestPrimitives(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "method": ["CAST", "CAST", "ANNEAL", "ANNEAL", None],
+            "x": [1.0, 3.0, 2.0, 6.0, 5.0],
+            "y": [2.0, 0.0, np.nan, -3.0, 1.0],
+        })
+
+    def test_row_wise(self):
+        np.testing.assert_array_equal(prim.safe_ratio(self.df["x"], self.df["y"]), [0.5, np.nan, np.nan, -2.0, 5.0])
+        np.testing.assert_array_equal(prim.safe_ratio(self.df["x"], self.df["y"], fill=0.0)[1:3], [0.0, 0.0])
+        np.testing.assert_allclose(prim.safe_log(self.df["y"]), [np.log(2.0), np.nan, np.nan, np.nan, 0.0])
+        np.testing.assert_allclose(prim.power(self.df["y"], 0.5), [2 ** 0.5, 0.0, np.nan, np.nan, 1.0])
+        np.testing.assert_array_equal(prim.interaction(self.df["x"], self.df["y"], 2), [4.0, 0.0, np.nan, -36.0, 10.0])
+
+    def test_global(self):
+        z = prim.zscore(self.df["x"])
+        self.assertAlmostEqual(z.mean(), 0.0)
+        self.assertAlmostEqual(z.std(ddof=0), 1.0)
+        np.testing.assert_array_equal(prim.zscore(pd.Series([2.0, 2.0])), [0.0, 0.0])
+
+        expected = self.df.groupby("method")["x"].transform("mean")
+        np.testing.assert_array_equal(prim.group_agg(self.df, "method", "x"), expected)
+        self.assertTrue(np.isnan(prim.group_agg(self.df, "method", "x")[4]))   # missing group key
+        np.testing.assert_array_equal(prim.group_deviation(self.df, "method", "x")[:4], [-1.0, 1.0, -2.0, 2.0])
+        with self.assertRaises(ValueError):
+            prim.group_agg(self.df, "method", "x", agg="mode")
+
+        np.testing.assert_array_equal(prim.binning(self.df["x"], bins=2, method="uniform"), [0, 0, 0, 1, 1])
+        self.assertEqual(prim.binning(self.df["x"], bins=5).nunique(), 5)
+
+    def test_registry(self):
+        self.assertEqual(set(prim.namespace()["prim"].__dict__), set(prim.PRIMITIVES))
+        text = prim.describe_primitives()
+        for name in prim.PRIMITIVES:
+            self.assertIn(f"prim.{name}(", text)
+
+    def test_streaming_rejects_global_primitives(self):
+        rewrite_global_aggregates("df['r'] = prim.safe_ratio(df['x'], df['y'])")
+        with self.assertRaises(StreamingUnsupportedError):
+            rewrite_global_aggregates("df['g'] = prim.group_agg(df, 'method', 'x')")
+        self.assertIn("prim.group_agg(df, by, col, agg='mean'): Per-row value", prim.describe_primitives())
+        self.assertIn("Not available when features are streamed", prim.describe_primitives())
+        self.assertNotIn("streamed", prim.describe_primitives().split("prim.zscore")[1].splitlines()[0])
+
+    def test_streaming_zscore_uses_global_statistics(self):
+        code, aggregates = rewrite_global_aggregates("df['z'] = prim.zscore(df['x'])")
+        self.assertEqual([(a["stat"], a["ddof"]) for a in aggregates], [("mean", None), ("std", 0)])
+        self.assertIn("prim.standardize", code)
+
+    def test_generated_code_can_call_primitives(self):
+        state = AutoFeaturizer(target="dummy_target")
+        state.clean_augmented_data = self.df
+        state.construct_strategy = {"x_dev": "x minus its mean per method (prim.group_deviation)"}
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return "```python\ndf['x_dev'] = prim.group_deviation(df, 'method', 'x')\n```"
+
+        feature_generation(llm, max_retries=1)(state)
+        self.assertIn("prim.group_deviation(df, by, col, relative=False)", prompts[0][0]["content"])
+        np.testing.assert_array_equal(state.clean_augmented_data["x_dev"][:4], [-1.0, 1.0, -2.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
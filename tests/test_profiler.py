@@ -0,0 +1,99 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.first_pass.profiling import profiler
+from auto_feat.first_pass.profiling.profiler import (
+    HeavyHitters, HyperLogLog, QuantileSketch, format_profile, load_profile, profile_dataset,
+)
+
+
+class TestSketches(unittest.TestCase):
+    def test_quantile_sketch(self):
+        x = np.random.default_rng(0).normal(size=200_000)
+        sketch = QuantileSketch(k=256)
+        for start in range(0, len(x), 10_000):
+            sketch.update(x[start:start + 10_000])
+        np.testing.assert_allclose(sketch.quantiles([0.05, 0.5, 0.95]), np.quantile(x, [0.05, 0.5, 0.95]), atol=0.05)
+        # Memory stays bounded: a few levels of at most k values
+        self.assertLess(sum(len(level) for level in sketch.levels), 256 * 12)
+
+    def test_heavy_hitters(self):
+        hh = HeavyHitters(k=3)
+        hh.update(pd.Series(["a"] * 50 + ["b"] * 30 + list("cdefgh")).value_counts())
+        self.assertTrue(hh.overflowed)
+        self.assertEqual([v for v, _ in hh.top(2)], ["a", "b"])
+
+    def test_hyperloglog(self):
+        hll = HyperLogLog()
+        hll.update(pd.util.hash_pandas_object(pd.Series(np.arange(50_000.0)), index=False).to_numpy())
+        self.assertAlmostEqual(hll.estimate() / 50_000, 1.0, delta=0.05)
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(1)
+        n = 5000
+        self.df = pd.DataFrame({
+            "x": rng.uniform(0, 10, n),
+            "phase": rng.choice(["FCC", "BCC", "HCP"], n, p=[0.6, 0.3, 0.1]),
+            "sparse": np.where(rng.random(n) < 0.8, np.nan, 1.0),
+            "id": np.arange(n),
+        })
+        self.path = os.path.join(self.tmp.name, "data.csv")
+        self.df.to_csv(self.path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_profile_matches_pandas(self):
+        profile = profile_dataset(self.path, chunksize=700)
+        cols = profile["columns"]
+        self.assertEqual(profile["rows"], 5000)
+        self.assertAlmostEqual(cols["x"]["min"], self.df["x"].min())
+        self.assertAlmostEqual(cols["x"]["max"], self.df["x"].max())
+        self.assertAlmostEqual(cols["x"]["quantiles"]["p50"], self.df["x"].median(), delta=0.3)
+        self.assertAlmostEqual(cols["sparse"]["null_fraction"], self.df["sparse"].isna().mean())
+        self.assertEqual(cols["phase"]["distinct"], 3)
+        self.assertTrue(cols["phase"]["distinct_exact"])
+        self.assertEqual(cols["phase"]["top"][0][0], "FCC")
+        self.assertFalse(cols["id"]["distinct_exact"])
+        self.assertAlmostEqual(cols["id"]["distinct"] / 5000, 1.0, delta=0.05)
+
+        text = format_profile(profile)
+        self.assertIn("- phase: object", text)
+        self.assertIn("FCC (", text)
+
+    def test_cached_by_file_hash(self):
+        cache_dir = os.path.join(self.tmp.name, "profiles")
+        first = load_profile(self.path, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # A new process (empty memory cache) reads the JSON instead of profiling again
+        profiler._PROFILE_CACHE.clear()
+        original = profiler.profile_dataset
+        profiler.profile_dataset = lambda *args, **kwargs: self.fail("profiled twice")
+        try:
+            second = load_profile(self.path, cache_dir=cache_dir)
+        finally:
+            profiler.profile_dataset = original
+        self.assertEqual(second["columns"]["phase"]["top"], first["columns"]["phase"]["top"])
+
+        # Other profiling parameters, another profile
+        smaller = load_profile(self.path, cache_dir=cache_dir, top=1)
+        self.assertIsNot(smaller, first)
+        self.assertEqual(len(smaller["columns"]["phase"]["top"]), 1)
+        self.assertEqual(smaller["file_hash"], first["file_hash"])
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from auto_feat.LLM_API.prompt_prefix import PrefixReuseTracker, shared_prefix_chars
+from auto_feat.featurization_module.execution import feature_generation
+
+
+class DummyState:
+    def __init__(self):
+        self.data = pd.DataFrame({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+        self.clean_augmented_data = self.data.copy()
+        self.construct_strategy = {"ab_sum": "a + b"}
+        self.cur_feature_keys = ["a", "b", "ab_sum"]
+        self.accepted_code = []
+
+
+class TestPrefixReuse(unittest.TestCase):
+
+    def test_shared_prefix_chars(self):
+        old = [{"role": "system", "content": "static"}, {"role": "user", "content": "hello world"}]
+        new = [{"role": "system", "content": "static"}, {"role": "user", "content": "hello there"}]
+        self.assertEqual(shared_prefix_chars(new, old), len("static") + len("hello "))
+        self.assertEqual(shared_prefix_chars([{"role": "user", "content": "static"}], old), 0)
+
+    def test_tracker(self):
+        tracker = PrefixReuseTracker()
+        prompt = [{"role": "system", "content": "x" * 90}, {"role": "user", "content": "y" * 10}]
+        self.assertEqual(tracker.observe(prompt), (100, 0))
+        repair = prompt + [{"role": "assistant", "content": "z" * 50}, {"role": "user", "content": "fix"}]
+        self.assertEqual(tracker.observe(repair), (153, 100))
+
+    def test_generation_repairs_extend_the_prompt(self):
+        replies = iter(["not code", "```python\ndf['ab_sum'] = df['a'] + df['b']\n```"])
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return next(replies)
+
+        state = DummyState()
+        feature_generation(llm, max_retries=3)(state)
+        self.assertIn("ab_sum", state.clean_augmented_data.columns)
+        # The retry resends the first prompt unchanged, followed by the reply and a repair note
+        self.assertEqual(prompts[1][:2], prompts[0])
+        self.assertEqual([m["role"] for m in prompts[1][2:]], ["assistant", "user"])
+        self.assertEqual(prompts[1][2]["content"], "not code")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.featurization_module.proposal import feat_proposal
+from auto_feat.first_pass.retrieval import bm25
+from auto_feat.first_pass.retrieval.bm25 import (BM25Index, chunk_text, format_passages, load_index, retrieve_passages,
+                                                  select_passages, tokenize)
+
+PAPER = (
+    "Yield strength of the alloys was measured in compression at room temperature. "
+    "Grain size was obtained from electron backscatter diffraction maps. "
+    "Density values were computed from the rule of mixtures of elemental densities. "
+    "The valence electron concentration correlates with the observed BCC or FCC phases."
+)
+
+
+class DummyState:
+    def __init__(self, manuscript_path):
+        self.manuscript_path = manuscript_path
+        self.features_description = {"grain_size": "average grain size (um)"}
+        self.literature_review = "summary"
+        self.target = "yield strength (MPa)"
+        self.eval_report = {"feature_importance": [{"variable": "grain_size", "percentage": 0.6}]}
+        self.construct_strategy = {}
+
+
+class TestBM25(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "paper.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(PAPER)
+        bm25._INDEX_CACHE.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Alloys' properties, 3.5 wt-% and BCC"),
+                         ["alloy", "property", "3.5", "wt", "bcc"])
+
+    def test_chunks_overlap(self):
+        text = " ".join(f"w{i}" for i in range(25))
+        passages = chunk_text(text, "p.txt", chunk_words=10, overlap=5)
+        self.assertEqual([p["text"].split()[0] for p in passages], ["w0", "w5", "w10", "w15"])
+        self.assertEqual(passages[-1]["text"].split()[-1], "w24")
+        self.assertEqual(passages[1]["start"], text.index("w5"))
+
+    def test_ranking(self):
+        index = BM25Index(chunk_text(PAPER, "paper.txt", chunk_words=12, overlap=0))
+        hits = index.search("grain size", k=2)
+        self.assertIn("Grain size", hits[0]["text"])
+        self.assertEqual(len(hits), 1)   # passages without any query term are not returned
+        self.assertEqual(index.search("unrelated words", k=3), [])
+
+    def test_cached_by_content(self):
+        cache_dir = os.path.join(self.tmp.name, "indexes")
+        index = load_index(self.path, cache_dir=cache_dir)
+        self.assertIs(load_index([self.path], cache_dir=cache_dir), index)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # A new process reads the JSON file and ranks identically
+        bm25._INDEX_CACHE.clear()
+        reloaded = load_index(self.path, cache_dir=cache_dir)
+        self.assertIsNot(reloaded, index)
+        self.assertEqual(reloaded.search("phase density", 3), index.search("phase density", 3))
+
+        # Different content, different index
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(" Hardness was also reported.")
+        self.assertIsNot(load_index(self.path, cache_dir=cache_dir), index)
+
+    def test_proposal_prompt_carries_relevant_passages(self):
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return '{"new_feature_computation": {"inv_sqrt_grain": "1 / sqrt(grain_size)"}}'
+
+        state = DummyState(self.path)
+        feat_proposal(llm, retrieval_k=1)(state)
+        user_msg = prompts[0][1]["content"]
+        self.assertIn("==== Relevant Manuscript Passages ====", user_msg)
+        self.assertIn("Grain size was obtained", user_msg)
+        self.assertIsNotNone(state.manuscript_index)
+
+        self.assertEqual(retrieve_passages(state, "grain size", k=0), "None")
+        self.assertEqual(retrieve_passages(DummyState(None), "grain size"), "None")
+
+    def test_budgets(self):
+        index = BM25Index(chunk_text(PAPER, "paper.txt", chunk_words=12, overlap=0))
+        hits = index.search("grain size density", k=3)
+        self.assertEqual(len(hits), 2)
+        one = format_passages(hits, budget_chars=len(format_passages(hits[:1])) + 1)
+        self.assertEqual(one, format_passages(hits[:1]))
+        self.assertEqual(format_passages(hits, budget_chars=10), "None")
+
+        # The Summarizer's excerpt: best passages within the budget, in document order
+        excerpt = select_passages(index, "density grain", budget_chars=200)
+        self.assertLess(excerpt.index("Grain size"), excerpt.index("Density values"))
+        self.assertNotIn("Yield strength", excerpt)
+        self.assertNotIn("FCC phases", excerpt)
+        self.assertLessEqual(len(select_passages(index, "density", budget_chars=10)), 10)
+
+    def test_literature_context_is_capped(self):
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return '{"new_feature_computation": {"inv_sqrt_grain": "1 / sqrt(grain_size)"}}'
+
+        state = DummyState(self.path)
+        state.literature_review = "x" * bm25.LITERATURE_CHARS
+        feat_proposal(llm)(state)
+        user_msg = prompts[0][1]["content"]
+        self.assertNotIn("Grain size was obtained", user_msg)   # no room left next to the summary
+
+
+if __name__ == "__main__":
+    unittest.main()
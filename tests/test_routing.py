@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+import openai
+
+from auto_feat.instrumentation import Tracer
+from auto_feat.LLM_API.routing import DEFAULT_TIERS, ModelRouter
+
+
+def conversation(system, repairs=0):
+    prompt = [{"role": "system", "content": system}, {"role": "user", "content": "request"}]
+    for _ in range(repairs):
+        prompt += [{"role": "assistant", "content": "bad reply"}, {"role": "user", "content": "fix it"}]
+    return prompt
+
+
+SUMMARY = "System: You are tasked with understanding and summarizing a scientific text"
+GENERATION = "System: You are a Python data engineer."
+
+LARGE, FAST = DEFAULT_TIERS["large"]["model"], DEFAULT_TIERS["fast"]["model"]
+
+
+class RecordingLLM:
+    def __init__(self, fail_models=()):
+        self.models = []
+        self.fail_models = fail_models
+
+    def __call__(self, prompt, model=None, temperature=0.3):
+        self.models.append(model)
+        if model in self.fail_models:
+            response = httpx.Response(404, request=httpx.Request("POST", "http://llm/v1/chat/completions"))
+            raise openai.NotFoundError("model unavailable", response=response, body=None)
+        return "ok"
+
+
+class TestModelRouter(unittest.TestCase):
+    def test_routes_by_agent_and_call_type(self):
+        llm = RecordingLLM()
+        router = ModelRouter(llm)
+        router(conversation(SUMMARY))
+        router(conversation(SUMMARY, repairs=1))
+        router(conversation(GENERATION))
+        router(conversation(GENERATION, repairs=1))
+        self.assertEqual(llm.models, [LARGE, FAST, FAST, FAST])
+        self.assertEqual([d["call_type"] for d in router.decisions], ["initial", "repair", "initial", "repair"])
+
+    def test_escalates_after_failures(self):
+        llm = RecordingLLM()
+        router = ModelRouter(llm, escalate_after=2)
+        router(conversation(GENERATION, repairs=2))
+        self.assertEqual(llm.models, [LARGE])
+        self.assertTrue(router.decisions[0]["escalated"])
+
+        # Never escalate
+        router = ModelRouter(llm, escalate_after=0)
+        router(conversation(GENERATION, repairs=5))
+        self.assertEqual(llm.models[-1], FAST)
+
+    def test_failed_fast_call_is_retried_on_large_model(self):
+        llm = RecordingLLM(fail_models=(FAST,))
+        tracer = Tracer()
+        router = ModelRouter(llm)
+
+        def node(state):
+            return router(conversation(GENERATION))
+
+        self.assertEqual(tracer.wrap("FeatGeneration", node)(type("State", (), {})()), "ok")
+        self.assertEqual(llm.models, [FAST, LARGE])
+        record = tracer.summary()[0]
+        self.assertEqual(record["llm_fast_calls"], 1)
+        self.assertEqual(record["llm_escalations"], 1)
+
+        stats = router.stats()
+        self.assertEqual(stats[FAST]["failed"], 1)
+        self.assertEqual(stats[LARGE]["calls"], 1)
+
+    def test_other_errors_are_not_escalated(self):
+        models = []
+
+        def llm(prompt, model=None, temperature=0.3):
+            models.append(model)
+            raise RuntimeError("ChatCompletion failed after retries")
+
+        with self.assertRaises(RuntimeError):
+            ModelRouter(llm)(conversation(GENERATION))
+        self.assertEqual(models, [FAST])
+
+    def test_prompt_only_callable(self):
+        prompts = []
+
+        def llm(prompt):
+            prompts.append(prompt)
+            return "ok"
+
+        router = ModelRouter(llm)
+        self.assertEqual(router(conversation(SUMMARY)), "ok")
+        self.assertEqual(router(conversation(GENERATION), model="pinned"), "ok")
+        self.assertEqual(len(prompts), 2)
+        self.assertEqual(router.decisions[0]["model"], "default")
+
+    def test_explicit_model_and_custom_routes(self):
+        llm = RecordingLLM()
+        ModelRouter(llm)(conversation(GENERATION), model="pinned")
+        self.assertEqual(llm.models, ["pinned"])
+
+        tiers = {"large": {"model": "big", "temperature": 0.3}, "tiny": {"model": "tiny", "temperature": 0.0}}
+        router = ModelRouter(llm, tiers=tiers, routes={"summarize": {"initial": "tiny"}})
+        router(conversation(SUMMARY))
+        router(conversation(SUMMARY, repairs=1))   # no route for repairs: the escalation tier
+        router([{"role": "user", "content": "no system prompt"}])
+        self.assertEqual(llm.models[1:], ["tiny", "big", "big"])
+
+
+if __name__ == "__main__":
+    unittest.main()
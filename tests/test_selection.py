@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat import AutoFeaturizer
+from auto_feat.eval_module.selection import greedy_selection
+from auto_feat.instrumentation import Tracer, get_tracer
+
+
+# Loss of a subset: useful features lower it, noise features raise it a little
+WEIGHTS = {"a": -3.0, "b": -2.0, "new_good": -1.5, "noise": 0.2, "new_noise": 0.3}
+
+
+def loss(keys):
+    return 10.0 + sum(WEIGHTS[k] for k in keys)
+
+
+class TestGreedySelection(unittest.TestCase):
+
+    def test_forward_and_backward(self):
+        selected, best, steps = greedy_selection(
+            ["a", "b", "noise", "new_good", "new_noise"], loss, initial=["a", "b", "noise"]
+        )
+        self.assertEqual(selected, ["a", "b", "new_good"])
+        self.assertAlmostEqual(best, loss(["a", "b", "new_good"]))
+        self.assertEqual([(s["action"], s["feature"]) for s in steps], [("add", "new_good"), ("remove", "noise")])
+
+    def test_candidates_scored_in_parallel_and_traced(self):
+        threads = set()
+        tracer = Tracer()
+
+        def score_fn(keys):
+            threads.add(threading.get_ident())
+            time.sleep(0.05)
+            get_tracer().count("h2o_train_s", 1.0)
+            return loss(keys)
+
+        node = tracer.wrap("Evaluation", lambda state: greedy_selection(list(WEIGHTS), score_fn, initial=["a"]))
+        node(type("State", (), {})())
+        self.assertGreater(len(threads), 1)
+        self.assertGreater(tracer.nodes[0]["h2o_train_s"], 1.0)
+
+    def test_feature_pool_is_cumulative(self):
+        state = AutoFeaturizer(target="OUTPUT PROPERTY: YS (MPa)")
+        original = list(state.cur_feature_keys)
+        state.construct_strategy = {"f1": "..."}
+        state.construct_strategy = {"f2": "...", "f1": "..."}
+        self.assertEqual(state.cur_feature_keys, original + ["f1", "f2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import concurrent.futures
+import multiprocessing
+import tempfile
+import threading
+import time
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat import AutoFeaturizer
+from auto_feat.deadline import RunDeadline
+from auto_feat.LLM_API.singleflight import SingleFlight, request_key
+
+
+def slow_call(lock_dir, counter_path):
+    """Runs one coalesced request in a separate process; every upstream call appends a line to counter_path."""
+    def upstream():
+        with open(counter_path, "a") as f:
+            f.write("call\n")
+        time.sleep(1.5)
+        return "summary"
+    return SingleFlight(lock_dir).do("same-prompt", upstream)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_request_key(self):
+        prompt = [{"role": "user", "content": "hi"}]
+        self.assertEqual(request_key("m", 0.3, prompt), request_key("m", 0.3, list(prompt)))
+        self.assertNotEqual(request_key("m", 0.3, prompt), request_key("m", 0.7, prompt))
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def upstream():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return "summary"
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+            first = pool.submit(flight.do, "k", upstream)
+            started.wait()
+            others = [pool.submit(flight.do, "k", upstream) for _ in range(3)]
+            results = [first.result()] + [f.result() for f in others]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [("summary", False)] + [("summary", True)] * 3)
+
+        # Completed requests are not cached: the next identical request goes upstream again
+        flight.do("k", upstream)
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_reach_all_waiters(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def upstream():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("server down")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(flight.do, "k", upstream)
+            started.wait()
+            second = pool.submit(flight.do, "k", upstream)
+            for future in (first, second):
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+    def test_waiters_stop_at_their_deadline(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def upstream():
+            started.set()
+            release.wait(5)
+            return "summary"
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(flight.do, "k", upstream)
+            started.wait()
+            state = AutoFeaturizer(target="y")
+            start = time.monotonic()
+            RunDeadline(node_budgets={"node": 0.2}).wrap("node", lambda s: flight.do("k", upstream))(state)
+            self.assertLess(time.monotonic() - start, 1.0)
+            self.assertEqual(state.deadline_exceeded["node"], "node")
+            release.set()
+            self.assertEqual(leader.result(), ("summary", False))
+
+    def test_processes_share_one_call(self):
+        lock_dir = tempfile.mkdtemp()
+        counter_path = os.path.join(lock_dir, "calls.txt")
+        ctx = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=3, mp_context=ctx) as pool:
+            futures = [pool.submit(slow_call, lock_dir, counter_path) for _ in range(3)]
+            results = [f.result() for f in futures]
+
+        with open(counter_path) as f:
+            n_calls = len(f.readlines())
+        self.assertLess(n_calls, 3)
+        self.assertTrue(all(result == "summary" for result, _ in results))
+        self.assertEqual(sum(shared for _, shared in results), 3 - n_calls)
+
+        # Once every process is done, closing removes the coalescing files (other files are left alone)
+        SingleFlight(lock_dir).close()
+        self.assertEqual(os.listdir(lock_dir), ["calls.txt"])
+
+    @unittest.skipIf(os.name == "nt", "cross-process coalescing uses flock")
+    def test_idle_files_expire(self):
+        import fcntl
+        lock_dir = tempfile.mkdtemp()
+        flight = SingleFlight(lock_dir, ttl_s=3600)
+        flight.do("k", lambda: "summary")
+        self.assertEqual(sorted(os.listdir(lock_dir)), ["k.json", "k.lock"])
+        self.assertEqual(flight.sweep(3600), 0)   # still fresh
+
+        # A held lock is never swept
+        with open(os.path.join(lock_dir, "k.lock")) as held:
+            fcntl.flock(held, fcntl.LOCK_EX)
+            self.assertEqual(flight.sweep(0), 0)
+            fcntl.flock(held, fcntl.LOCK_UN)
+        self.assertEqual(flight.sweep(0), 1)
+        self.assertEqual(os.listdir(lock_dir), [])
+        self.assertEqual(flight.do("k", lambda: "again"), ("again", False))
+
+
+if __name__ == "__main__":
+    unittest.main()
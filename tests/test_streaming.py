@@ -0,0 +1,139 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat import AutoFeaturizer
+from auto_feat.featurization_module.execution import feature_generation
+from auto_feat.featurization_module.primitives import namespace
+from auto_feat.featurization_module.streaming import (
+    StreamingUnsupportedError,
+    rewrite_global_aggregates,
+    stream_features,
+)
+
+CODE = (
+    "import numpy as np\n"
+    "df['z'] = (df['A'] - df['A'].mean()) / df['A'].std()\n"
+    "df['scaled'] = df['B'] / df['B'].max()\n"
+    "df['centered'] = df['scaled'] - np.mean(df['scaled'])\n"
+    "df['row_max'] = df[['A', 'B']].max(axis=1)\n"
+)
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({"A": rng.normal(size=1000), "B": rng.uniform(size=1000)})
+        self.df.loc[3, "A"] = np.nan
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, "data.csv")
+        self.df.to_csv(self.src, index=False)
+
+    def test_rewrite_levels(self):
+        _, aggregates = rewrite_global_aggregates(CODE)
+        self.assertEqual([a["stat"] for a in aggregates], ["mean", "std", "max", "mean"])
+        self.assertEqual([a["level"] for a in aggregates], [1, 1, 1, 2])
+
+    def test_unsupported(self):
+        with self.assertRaises(StreamingUnsupportedError):
+            rewrite_global_aggregates("df['r'] = df['A'].rank()")
+
+    def test_matches_in_memory(self):
+        shard_dir = os.path.join(self.tmp, "shards")
+        stats = stream_features([CODE], self.src, shard_dir, chunksize=128)
+        self.assertEqual(stats["n_rows"], 1000)
+        self.assertEqual(stats["passes"], 3)
+
+        streamed = pd.read_parquet(shard_dir)
+        expected = self.df.copy()
+        exec(CODE, {}, {"df": expected})
+        for col in ["z", "scaled", "centered", "row_max"]:
+            np.testing.assert_allclose(streamed[col].to_numpy(float), expected[col].to_numpy(float))
+
+    def test_shards_are_cleaned_and_reused(self):
+        raw = self.df.copy()
+        raw["load"] = [f"{v:.3f} kN" for v in self.df["B"]]
+        raw.loc[5, "load"] = "n/a"
+        raw.loc[7, "B"] = np.nan
+        src = os.path.join(self.tmp, "raw.csv")
+        raw.to_csv(src, index=False)
+        shard_dir = os.path.join(self.tmp, "clean_shards")
+        blocks = ["df['l2'] = df['load'] * 2", "df['lc'] = df['l2'] - df['l2'].mean()"]
+
+        first = stream_features(blocks[:1], src, shard_dir, chunksize=128, coerced_columns=["load"], target="B")
+        self.assertEqual(first["n_rows"], 999)   # the row without a target is dropped
+        second = stream_features(blocks, src, shard_dir, chunksize=128, coerced_columns=["load"], target="B")
+        self.assertEqual(second["cached_blocks"], 1)
+
+        streamed = pd.read_parquet(shard_dir)
+        expected = raw[raw["B"].notna()].reset_index(drop=True)
+        expected["load"] = expected["load"].str.replace(" kN", "").replace("n/a", np.nan).astype(float)
+        exec("\n".join(blocks), {}, {"df": expected})
+        np.testing.assert_allclose(streamed["lc"].to_numpy(float), expected["lc"].to_numpy(float))
+
+        # Other code from the start: rebuilt from the source
+        rebuilt = stream_features(["df['l3'] = df['load'] * 3"], src, shard_dir, 128, ["load"], "B")
+        self.assertEqual(rebuilt["cached_blocks"], 0)
+        self.assertNotIn("lc", pd.read_parquet(shard_dir).columns)
+
+    def test_zscore_primitive_matches_in_memory(self):
+        code = "df['zA'] = prim.zscore(df['A'])"
+        stream_features([code], self.src, os.path.join(self.tmp, "zshards"), chunksize=128)
+        expected = self.df.copy()
+        exec(code, namespace(), {"df": expected})
+        streamed = pd.read_parquet(os.path.join(self.tmp, "zshards"))
+        np.testing.assert_allclose(streamed["zA"].to_numpy(float), expected["zA"].to_numpy(float))
+
+    def test_code_failing_past_the_sample_is_not_accepted(self):
+        values = [str(float(i)) for i in range(300)]
+        values[250] = "abc"
+        src = os.path.join(self.tmp, "late_error.csv")
+        pd.DataFrame({"a": values, "y": range(300)}).to_csv(src, index=False)
+
+        state = AutoFeaturizer(target="y")
+        state.streaming, state.data_path, state.chunksize = True, src, 100
+        state.shard_dir = os.path.join(self.tmp, "late_shards")
+        state.clean_report = None
+        state.clean_augmented_data = pd.read_csv(src, nrows=100)
+        state.construct_strategy = {"b": "a times 2.5"}
+        stream_features([], src, state.shard_dir, 100)
+
+        replies = iter([
+            "```python\ndf['b'] = df['a'] * 2.5\n```",
+            "```python\nimport pandas as pd\ndf['b'] = pd.to_numeric(df['a'], errors='coerce') * 2.5\n```",
+        ])
+        prompts = []
+
+        def llm(prompt, **kwargs):
+            prompts.append(prompt)
+            return next(replies)
+
+        feature_generation(llm, max_retries=2)(state)
+        self.assertEqual(len(prompts), 2)   # the first block only failed on the third chunk
+        self.assertEqual(state.accepted_code,
+                         ["import pandas as pd\ndf['b'] = pd.to_numeric(df['a'], errors='coerce') * 2.5"])
+        self.assertEqual(list(state.clean_augmented_data.columns), ["a", "y", "b"])
+        streamed = pd.read_parquet(state.shard_dir, columns=["b"])
+        self.assertEqual(len(streamed), 300)
+        self.assertTrue(np.isnan(streamed["b"][250]))
+
+        # Failing on every attempt: nothing of the failed blocks is kept, in memory or in the shards
+        state.construct_strategy = {"c": "a plus 1"}
+        replies = iter(["```python\ndf['c'] = df['a'] + 1\n```"] * 2)
+        with self.assertRaises(RuntimeError):
+            feature_generation(llm, max_retries=2)(state)
+        self.assertEqual(len(state.accepted_code), 1)
+        self.assertNotIn("c", state.clean_augmented_data.columns)
+        self.assertNotIn("c", pd.read_parquet(os.path.join(state.shard_dir, "part-00000.parquet")).columns)
+        self.assertFalse([n for n in os.listdir(state.shard_dir) if n.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from auto_feat.instrumentation import Tracer
+from auto_feat.LLM_API.structured import (
+    PROPOSAL_SCHEMA, SUMMARY_SCHEMA, StructuredOutputError, extract_code_block, parse_structured,
+)
+from auto_feat.featurization_module.proposal import feat_proposal
+
+
+class TestParseStructured(unittest.TestCase):
+    def test_clean_replies_need_no_repair(self):
+        self.assertEqual(parse_structured('{"new_feature_computation": {"a": "x"}}', PROPOSAL_SCHEMA),
+                         ({"new_feature_computation": {"a": "x"}}, False))
+        # Python literal forms
+        reply = "{'manuscript_summary': 's', 'column_key': {'A': 'a', 'B': 'b'}, 'notes': None}"
+        self.assertFalse(parse_structured(reply, SUMMARY_SCHEMA)[1])
+
+    def test_repairs(self):
+        replies = [
+            'Sure! Here are the features:\n```json\n{"new_feature_computation": {"a": "x / y",},}\n```\nHope it helps.',
+            '{"new_feature_computation": {"a": "x", "flag": true, "none": null}',   # cut off, JSON literals
+            "{“new_feature_computation”: {“a”: “x”}}",
+        ]
+        for reply in replies:
+            parsed, repaired = parse_structured(reply, PROPOSAL_SCHEMA)
+            self.assertTrue(repaired)
+            self.assertEqual(parsed["new_feature_computation"]["a"][0], "x")
+
+    def test_string_content_is_left_alone(self):
+        reply = '```\n{"new_feature_computation": {"a": "true ratio, x/y", "b": "it\'s {nested}"}}\n```'
+        parsed, _ = parse_structured(reply, PROPOSAL_SCHEMA)
+        self.assertEqual(parsed["new_feature_computation"], {"a": "true ratio, x/y", "b": "it's {nested}"})
+
+    def test_schema_errors(self):
+        with self.assertRaisesRegex(StructuredOutputError, "missing keys"):
+            parse_structured('{"features": {}}', PROPOSAL_SCHEMA)
+        with self.assertRaisesRegex(StructuredOutputError, "must be a dict"):
+            parse_structured('{"new_feature_computation": ["a"]}', PROPOSAL_SCHEMA)
+        with self.assertRaises(StructuredOutputError):
+            parse_structured("I cannot help with that.", PROPOSAL_SCHEMA)
+
+    def test_code_blocks(self):
+        self.assertEqual(extract_code_block("```python\ndf['a'] = 1\n```"), ("df['a'] = 1", False))
+        self.assertEqual(extract_code_block("Here you go:\n```python\ndf['a'] = 1\n```\nDone."), ("df['a'] = 1", True))
+        self.assertEqual(extract_code_block("df['a'] = df['b'] * 2"), ("df['a'] = df['b'] * 2", True))
+        self.assertEqual(extract_code_block("Sorry, I cannot do that."), (None, False))
+
+
+class DummyState:
+    features_description = {"x": "x"}
+    literature_review = "summary"
+    target = "y"
+    eval_report = {}
+    construct_strategy = None
+
+
+class TestProposalRepairs(unittest.TestCase):
+    def test_fenced_reply_costs_no_retry(self):
+        calls = []
+
+        def llm(prompt):
+            calls.append(prompt)
+            return 'Here:\n```json\n{"new_feature_computation": {"x_sq": "x * x",}}\n```'
+
+        tracer = Tracer()
+        state = DummyState()
+        tracer.wrap("FeatProposal", feat_proposal(llm))(state)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(state.construct_strategy, {"x_sq": "x * x"})
+        record = tracer.summary()[0]
+        self.assertEqual(record["format_repairs"], 1)
+        self.assertEqual(record["retries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
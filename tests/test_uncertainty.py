@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+
+# ✅ Ensure repo root is in sys.path so "auto_feat" is importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from auto_feat.eval_module.model_zoo import prepare_matrix
+from auto_feat.eval_module.uncertainty import best_report, bootstrap_metric_ci, compare_intervals, ensemble_importance_ci
+
+
+class TestUncertainty(unittest.TestCase):
+
+    def test_metric_ci_brackets_point_estimate(self):
+        rng = np.random.default_rng(0)
+        y = rng.normal(size=500)
+        pred = y + rng.normal(scale=0.5, size=500)
+        y[::25] = np.nan
+        # Small blocks exercise the blockwise resampling
+        ci = bootstrap_metric_ci(y, pred, n_boot=400, max_cells=10_000)
+        keep = ~np.isnan(y)
+        rmse = np.sqrt(np.mean((y[keep] - pred[keep]) ** 2))
+        self.assertLess(ci["RMSE"]["low"], rmse)
+        self.assertGreater(ci["RMSE"]["high"], rmse)
+        self.assertLess(ci["RMSE"]["high"] - ci["RMSE"]["low"], 0.2)
+
+    def test_classification_ci(self):
+        ci = bootstrap_metric_ci(np.array(["a", "b"] * 50), np.array(["a", "a"] * 50), task="classification")
+        self.assertAlmostEqual(ci["Accuracy"]["mean"], 0.5, delta=0.05)
+
+    def test_compare_intervals(self):
+        prev = {"mean": 1.0, "low": 0.9, "high": 1.1}
+        self.assertEqual(compare_intervals({"mean": 0.7, "low": 0.6, "high": 0.8}, prev, True), "improved")
+        self.assertEqual(compare_intervals({"mean": 0.95, "low": 0.85, "high": 1.05}, prev, True), "inconclusive")
+        self.assertEqual(compare_intervals({"mean": 0.7, "low": 0.6, "high": 0.8}, prev, False), "worse")
+        self.assertEqual(compare_intervals(prev, None, True), "inconclusive")
+
+    def test_best_report_needs_separated_intervals(self):
+        def report(rmse, low=None, high=None):
+            out = {"performance": {"test": {"RMSE": rmse}}}
+            if low is not None:
+                out["uncertainty"] = {"test": {"RMSE": {"mean": rmse, "low": low, "high": high}}}
+            return out
+
+        first, noise, clear = report(1.0, 0.9, 1.1), report(0.95, 0.85, 1.05), report(0.5, 0.4, 0.6)
+        self.assertIs(best_report([first, noise], "regression"), first)       # overlapping: not an improvement
+        self.assertIs(best_report([first, noise, clear], "regression"), clear)
+        self.assertEqual(best_report([report(1.0), report(0.95)], "regression")["performance"]["test"]["RMSE"], 0.95)
+        self.assertIsNone(best_report([{"performance": {"test": {}}}], "regression"))
+
+    def test_ensemble_importance_intervals(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame({"x": rng.normal(size=300), "noise": rng.normal(size=300)})
+        df["y"] = 2 * df["x"] + rng.normal(scale=0.1, size=300)
+        result = ensemble_importance_ci(prepare_matrix(df, ["x", "noise"], "y"), n_models=4, max_workers=2)
+        x, noise = result["feature_importance"]
+        self.assertEqual(x["variable"], "x")
+        self.assertGreater(x["low"], noise["high"])
+
+
+if __name__ == "__main__":
+    unittest.main()